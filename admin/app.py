@@ -6,13 +6,19 @@ Simple web interface for FreeSWITCH configuration management
 
 import os
 import json
+import hashlib
 import subprocess
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, render_template, request, jsonify, session, make_response
 from functools import wraps
 
 # Config store for CRUD operations
 import config_store
+import config_diff
+import provisioning
+import directory_cache
+import fs_callbacks
+import single_flight
 
 # Auto-initialize config from ENV on first run
 config_store.init_config()
@@ -22,6 +28,8 @@ config_store.init_license()
 
 # ESL Event Subscriber for real-time FreeSWITCH events
 import esl_events
+import esl_client
+import event_bus
 
 # Version info
 def get_version_info():
@@ -143,12 +151,13 @@ FS_HOST, FS_PORT, FS_PASS = _get_esl_config()
 _acl_raw = os.environ.get('API_ACL', '') or os.environ.get('FS_ALLOWED_IPS', '127.0.0.1')
 FS_ALLOWED_IPS = [ip.strip() for ip in _acl_raw.split(',') if ip.strip()]
 
-# Try to import ESL library
+# Try to import ESL library (ESL_BACKEND=asyncio uses esl_client.py instead)
 try:
     from greenswitch import InboundESL
-    ESL_AVAILABLE = True
 except ImportError:
-    ESL_AVAILABLE = False
+    InboundESL = None
+ESL_AVAILABLE = esl_events.ESL_AVAILABLE
+if not ESL_AVAILABLE:
     print("WARNING: greenswitch not installed - FreeSWITCH commands will not work")
 
 # Try to import ipaddress for CIDR matching
@@ -582,6 +591,29 @@ def login_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
+def versioned(*sections):
+    """Conditional GET for config data: ETag from the section versions, 304 if unchanged"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            _, section_versions = config_store.get_versions()
+            parts = []
+            for name in sections:
+                info = section_versions.get(name) or {}
+                parts.append(f"{name}.{info.get('version', 0)}.{info.get('hash') or 'x'}")
+            etag = '-'.join(parts)
+
+            if request.if_none_match.contains(etag):
+                response = app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+            response.set_etag(etag)
+            # Let the browser cache but always revalidate
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+        return decorated_function
+    return decorator
+
 ################################################################################
 # FreeSWITCH CLI Helper
 ################################################################################
@@ -594,19 +626,45 @@ def fs_cli(command, allow_empty=False):
 
     Connection: FS_HOST:FS_PORT with FS_PASS
 
+    Read-only status commands are coalesced (single_flight): concurrent
+    identical calls share one request and the result is kept briefly.
+
     Args:
         command: The FreeSWITCH API command to execute
         allow_empty: If True, return empty string instead of None for empty responses
     """
+    ttl = single_flight.ttl_for(command)
+    if ttl is None:
+        # May change state - later status queries must not see an old result
+        single_flight.fs_commands.invalidate()
+        return _fs_cli(command, allow_empty)
+
+    result = single_flight.fs_commands.call(command, ttl, lambda: _fs_cli(command, allow_empty=True))
+    if result == '' and not allow_empty:
+        return None
+    return result
+
+def _fs_cli(command, allow_empty=False):
+    """Send one API command over a new ESL connection"""
     if not ESL_AVAILABLE:
         print("ESL not available - install greenswitch")
         return None
 
+    # FreeSWITCH down/restarting: fail fast instead of waiting for the socket timeout
+    if not esl_events.breaker.allow():
+        return None
+
     try:
+        if esl_events.use_asyncio():
+            data = esl_client.api(FS_HOST, FS_PORT, FS_PASS, command).strip()
+            esl_events.breaker.record_success()
+            return data if data or allow_empty else None
+
         esl = InboundESL(host=FS_HOST, port=FS_PORT, password=FS_PASS)
         esl.connect()
         result = esl.send(f'api {command}')
         esl.stop()
+        esl_events.breaker.record_success()
 
         if result:
             data = result.data if hasattr(result, 'data') else None
@@ -620,6 +678,7 @@ def fs_cli(command, allow_empty=False):
                 return ''
         return None
     except Exception as e:
+        esl_events.breaker.record_failure(e)
         print(f"ESL error ({FS_HOST}:{FS_PORT}): {e}")
         return None
 
@@ -781,6 +840,73 @@ def parse_call_statistics():
 
     return stats
 
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import time
+
+# Independent FreeSWITCH queries run in parallel on a bounded pool, each with
+# a deadline - a slow or dead FreeSWITCH costs one timeout per page, not one per query
+DASHBOARD_WORKERS = int(os.environ.get('DASHBOARD_WORKERS', '8'))
+DASHBOARD_CALL_TIMEOUT = float(os.environ.get('DASHBOARD_CALL_TIMEOUT', '3'))
+DASHBOARD_TOTAL_TIMEOUT = float(os.environ.get('DASHBOARD_TOTAL_TIMEOUT', '5'))
+_dashboard_pool = ThreadPoolExecutor(max_workers=DASHBOARD_WORKERS, thread_name_prefix='dashboard')
+
+def collect_parallel(sources, call_timeout=None, total_timeout=None):
+    """
+    Run data sources {name: (function, fallback)} on the dashboard pool.
+
+    Returns (results, unavailable): a source that raises or misses its
+    deadline gets its fallback value and its name is listed in unavailable.
+    Each call gets call_timeout from the moment a worker starts it (calls
+    queued behind a full pool keep their budget), all of them together at
+    most total_timeout. A call that timed out keeps its worker until the
+    ESL socket timeout.
+    """
+    call_timeout = DASHBOARD_CALL_TIMEOUT if call_timeout is None else call_timeout
+    total_timeout = DASHBOARD_TOTAL_TIMEOUT if total_timeout is None else total_timeout
+    page_deadline = time.monotonic() + total_timeout
+    starts = {}
+
+    def timed(name, function):
+        def run():
+            starts[name] = time.monotonic()
+            return function()
+        return run
+
+    pending = {name: _dashboard_pool.submit(timed(name, function)) for name, (function, _) in sources.items()}
+    results = {}
+    failed = {}
+    while pending:
+        now = time.monotonic()
+        for name, future in list(pending.items()):
+            if future.done():
+                try:
+                    results[name] = future.result()
+                except Exception as e:
+                    failed[name] = e
+            elif now >= page_deadline or (name in starts and now >= starts[name] + call_timeout):
+                future.cancel()
+                failed[name] = TimeoutError(f'no result after {now - starts.get(name, now):.1f}s')
+            else:
+                continue
+            del pending[name]
+        if not pending:
+            break
+        # Sleep until the next deadline or result; queued calls have no deadline yet - poll
+        deadlines = [page_deadline] + [starts[name] + call_timeout for name in pending if name in starts]
+        timeout = min(deadlines) - now
+        if len(deadlines) <= len(pending):
+            timeout = min(timeout, 0.05)
+        wait(pending.values(), timeout=max(timeout, 0), return_when=FIRST_COMPLETED)
+
+    unavailable = []
+    for name in sources:
+        if name in failed:
+            e = failed[name]
+            print(f"[Dashboard] {name} unavailable: {e.__class__.__name__} {e}")
+            results[name] = sources[name][1]
+            unavailable.append(name)
+    return results, unavailable
+
 ################################################################################
 # FreeSWITCH Logs - ESL Event Based (No File Access Needed)
 ################################################################################
@@ -788,8 +914,8 @@ def parse_call_statistics():
 import time
 import re
 
-def get_recent_logs(count=100):
-    """Get recent FreeSWITCH events via ESL Event Subscriber"""
+def _recent_log_events(count):
+    """Last count events of the ESL subscriber (starts it if needed)"""
     if not fs_allowed():
         return []
 
@@ -799,21 +925,24 @@ def get_recent_logs(count=100):
     if not subscriber.running:
         subscriber.start()
 
-    # Get events from buffer
-    events = subscriber.get_events(count)
-
-    # Convert to log format
-    logs = []
-    for event in events:
-        logs.append({
-            'text': event.get('text', ''),
-            'level': event.get('level', 'info'),
-            'timestamp': event.get('timestamp', time.time()),
-            'type': event.get('type', 'UNKNOWN'),
-            'subtype': event.get('subtype', ''),
-        })
+    return subscriber.get_events(count)
+
+def get_recent_logs(count=100):
+    """Get recent FreeSWITCH events via ESL Event Subscriber"""
+    return [event.to_log_dict() for event in _recent_log_events(count)]
 
-    return logs
+def json_list_response(key, fragments, **extra):
+    """JSON response {key: [...], **extra} from already encoded list items
+
+    The items are the events' cached JSON bytes - the response is assembled
+    by joining them instead of encoding the event dicts on every poll.
+    """
+    parts = [b'{', json.dumps(key).encode('utf-8'), b':[', b','.join(fragments), b']']
+    if extra:
+        # '{"count":..}' without its braces
+        parts += [b',', json.dumps(extra, separators=(',', ':'), default=str)[1:-1].encode('utf-8')]
+    parts.append(b'}')
+    return app.response_class(b''.join(parts), mimetype='application/json')
 
 def get_log_status():
     """Get status info about ESL event subscriber"""
@@ -901,6 +1030,17 @@ def get_call_logs(count=50):
 
     return calls
 
+# Dashboard data: {template variable: (source, value when unavailable)}
+DASHBOARD_SOURCES = {
+    'profiles': (parse_sofia_status, []),
+    'gateways': (parse_gateway_status, []),
+    'registrations': (parse_registrations, []),
+    'active_calls': (parse_active_calls, []),
+    'channels_count': (parse_channels_count, 0),
+    'call_stats': (parse_call_statistics, {}),
+    'call_logs': (lambda: get_call_logs(10), []),
+}
+
 ################################################################################
 # Routes
 ################################################################################
@@ -911,23 +1051,18 @@ def dashboard():
     # Check if FS commands are allowed (IP-based security)
     fs_access = fs_allowed()
 
-    profiles = parse_sofia_status() if fs_access else []
-    gateways = parse_gateway_status() if fs_access else []
-    registrations = parse_registrations() if fs_access else []
-    active_calls = parse_active_calls() if fs_access else []
-    channels_count = parse_channels_count() if fs_access else 0
-    call_stats = parse_call_statistics() if fs_access else {}
-
-    call_logs = get_call_logs(10) if fs_access else []
+    # No FreeSWITCH query here: the shell renders from the last snapshot (or
+    # placeholders) and the panels hydrate from /api/dashboard after load
+    if fs_access:
+        data, loading, unavailable = cached_dashboard_data()
+    else:
+        data = {name: fallback for name, (_, fallback) in DASHBOARD_SOURCES.items()}
+        loading, unavailable = [], []
 
     return render_template('dashboard.html',
-        profiles=profiles,
-        gateways=gateways,
-        registrations=registrations,
-        active_calls=active_calls,
-        channels_count=channels_count,
-        call_stats=call_stats,
-        call_logs=call_logs,
+        **data,
+        loading=loading,
+        unavailable=unavailable,
         fs_access=fs_access,
         client_ip=request.remote_addr,
         config={
@@ -1147,12 +1282,147 @@ def api_status():
             'fs_access': False,
             'error': 'Access denied - IP not in FS_ALLOWED_IPS'
         })
-    return jsonify({
-        'profiles': parse_sofia_status(),
-        'gateways': parse_gateway_status(),
-        'registrations': parse_registrations(),
-        'fs_access': True
+    data, unavailable = collect_parallel({
+        name: DASHBOARD_SOURCES[name] for name in ('profiles', 'gateways', 'registrations')
     })
+    data.update({'fs_access': True, 'unavailable': unavailable})
+    return jsonify(data)
+
+# Dashboard snapshot: sections of the dashboard, each with the sources it is built from
+SNAPSHOT_SECTIONS = {
+    'status': ('profiles', 'gateways', 'registrations'),
+    'active_calls': ('active_calls', 'channels_count'),
+    'call_stats': ('call_stats',),
+    'cdr': ('call_logs',),
+    'logs': (),
+}
+# Sections are re-collected at most this often, however many tabs poll
+DASHBOARD_SNAPSHOT_TTL = float(os.environ.get('DASHBOARD_SNAPSHOT_TTL', '1'))
+
+_snapshot_lock = threading.Lock()
+# section -> {'version', 'hash', 'data', 'at', 'stale', 'collecting' (Event while a request collects it)}
+_snapshot = {'version': 0, 'sections': {}}
+# Versions count per process: with several workers a client may poll another
+# one, the epoch tells it that its version does not apply there
+_snapshot_epoch = f'{os.getpid()}-{int(time.time())}'
+
+def _section_data(name, data):
+    """Shape a section like the single-purpose API it replaces"""
+    if name == 'status':
+        return {key: data[key] for key in SNAPSHOT_SECTIONS['status']}
+    if name == 'active_calls':
+        return {'calls': data['active_calls'], 'count': data['channels_count']}
+    if name == 'call_stats':
+        return data['call_stats']
+    if name == 'cdr':
+        return {'calls': data['call_logs']}
+    return {'logs': get_recent_logs(10)}
+
+def update_snapshot(names):
+    """Re-collect the given sections if older than the TTL, bump versions of changed ones"""
+    now = time.monotonic()
+    due = []
+    waiting = []
+    with _snapshot_lock:
+        for name in names:
+            section = _snapshot['sections'].setdefault(
+                name, {'version': 0, 'hash': None, 'data': None, 'at': None, 'stale': False, 'collecting': None})
+            if section['collecting'] is not None:
+                # Another request collects it - wait only if there is nothing to show yet
+                if section['data'] is None:
+                    waiting.append(section['collecting'])
+            elif section['at'] is None or now - section['at'] >= DASHBOARD_SNAPSHOT_TTL:
+                section['collecting'] = threading.Event()
+                due.append(name)
+
+    if due:
+        values = {}
+        try:
+            sources = {source: DASHBOARD_SOURCES[source] for name in due for source in SNAPSHOT_SECTIONS[name]}
+            data, unavailable = collect_parallel(sources) if sources else ({}, [])
+            # Shaped (logs: read from the ESL buffer) and hashed outside the lock
+            for name in due:
+                value = _section_data(name, data)
+                values[name] = (value, hashlib.sha1(
+                    json.dumps(value, sort_keys=True, default=str).encode('utf-8')).hexdigest())
+        finally:
+            with _snapshot_lock:
+                for name in due:
+                    section = _snapshot['sections'][name]
+                    section['collecting'].set()
+                    section['collecting'] = None
+                    if name not in values:
+                        continue
+                    section['at'] = now
+                    # A source missed its deadline: keep the last data, flag it stale
+                    section['stale'] = any(source in unavailable for source in SNAPSHOT_SECTIONS[name])
+                    if section['stale'] and section['data'] is not None:
+                        continue
+                    value, digest = values[name]
+                    if digest != section['hash']:
+                        _snapshot['version'] += 1
+                        section.update({'version': _snapshot['version'], 'hash': digest, 'data': value})
+
+    for event in waiting:
+        event.wait(DASHBOARD_TOTAL_TIMEOUT)
+
+def cached_dashboard_data():
+    """
+    Dashboard template variables from the snapshot as it is, without collecting.
+
+    Returns (data, loading, unavailable) - loading lists the sections never
+    collected yet (rendered as placeholders), unavailable the stale ones.
+    """
+    data = {name: fallback for name, (_, fallback) in DASHBOARD_SOURCES.items()}
+    with _snapshot_lock:
+        sections = {name: section for name, section in _snapshot['sections'].items()
+                    if section['data'] is not None}
+    if 'status' in sections:
+        data.update(sections['status']['data'])
+    if 'active_calls' in sections:
+        data['active_calls'] = sections['active_calls']['data']['calls']
+        data['channels_count'] = sections['active_calls']['data']['count']
+    if 'call_stats' in sections:
+        data['call_stats'] = sections['call_stats']['data']
+    if 'cdr' in sections:
+        data['call_logs'] = sections['cdr']['data']['calls']
+    loading = [name for name in ('status', 'active_calls', 'call_stats', 'cdr') if name not in sections]
+    unavailable = [name for name, section in sections.items() if section.get('stale')]
+    return data, loading, unavailable
+
+@app.route('/api/dashboard')
+@login_required
+def api_dashboard():
+    """
+    Everything the dashboard shows in one versioned snapshot.
+
+    ?sections=status,active_calls,call_stats,cdr,logs (default: all)
+    ?since_version=N returns only sections that changed after version N -
+    pass back the returned 'version' and 'epoch' on the next poll
+    (0 or another epoch = full snapshot).
+    """
+    if not fs_allowed():
+        return jsonify({'fs_access': False, 'version': 0, 'sections': {}, 'stale': [],
+                        'error': 'Access denied - IP not in FS_ALLOWED_IPS'})
+
+    names = [name for name in request.args.get('sections', '').split(',') if name in SNAPSHOT_SECTIONS]
+    names = names or list(SNAPSHOT_SECTIONS)
+    since = request.args.get('since_version', 0, type=int)
+
+    update_snapshot(names)
+    with _snapshot_lock:
+        if since > _snapshot['version'] or request.args.get('epoch', _snapshot_epoch) != _snapshot_epoch:
+            since = 0  # server restarted / other worker - client gets a full snapshot
+        sections = {name: _snapshot['sections'][name] for name in names}
+        return jsonify({
+            'fs_access': True,
+            'version': _snapshot['version'],
+            'epoch': _snapshot_epoch,
+            'full': since == 0,
+            'sections': {name: section['data'] for name, section in sections.items()
+                         if section['version'] > since},
+            'stale': [name for name, section in sections.items() if section.get('stale')],
+        })
 
 @app.route('/api/logs')
 @login_required
@@ -1160,14 +1430,13 @@ def api_logs():
     count = request.args.get('count', 15, type=int)
     # Limit to reasonable values
     count = min(max(count, 1), 1000)
-    logs = get_recent_logs(count)
-    status = get_log_status()
-    return jsonify({
-        'logs': logs,
-        'count': len(logs),
-        'status': status,
-        'fs_connected': fs_allowed() and ESL_AVAILABLE
-    })
+    events = _recent_log_events(count)
+    return json_list_response(
+        'logs', esl_events.get_subscriber().events_json(events, log=True),
+        count=len(events),
+        status=get_log_status(),
+        fs_connected=fs_allowed() and ESL_AVAILABLE,
+    )
 
 @app.route('/api/esl/events')
 @login_required
@@ -1187,18 +1456,21 @@ def api_esl_events():
     else:
         events = subscriber.get_events(count)
 
-    return jsonify({
-        'events': events,
-        'count': len(events),
-        'status': subscriber.get_status()
-    })
+    return json_list_response(
+        'events', subscriber.events_json(events),
+        count=len(events),
+        status=subscriber.get_status(),
+    )
 
 @app.route('/api/esl/status')
 @login_required
 def api_esl_status():
     """Get ESL subscriber status"""
     subscriber = esl_events.get_subscriber()
-    return jsonify(subscriber.get_status())
+    status = subscriber.get_status()
+    status['fs_cli'] = single_flight.fs_commands.stats()
+    status['bus'] = event_bus.status()
+    return jsonify(status)
 
 @app.route('/api/esl/command', methods=['POST'])
 @login_required
@@ -1249,7 +1521,7 @@ def api_esl_clear():
         return jsonify({'success': False, 'error': 'Access denied'})
 
     subscriber = esl_events.get_subscriber()
-    subscriber.buffer.clear()
+    subscriber.clear_events()
     return jsonify({'success': True, 'message': 'Event buffer cleared'})
 
 @app.route('/api/esl/test', methods=['POST'])
@@ -1300,6 +1572,7 @@ def api_registrations():
 def api_reload():
     if not fs_allowed():
         return jsonify({'success': False, 'error': 'Access denied - IP not in FS_ALLOWED_IPS'})
+    config_store.write_json_mirror()
     result = fs_cli('reloadxml')
     if result is not None:
         fs_cli('sofia profile internal rescan')
@@ -1497,6 +1770,7 @@ def api_log_sources():
 
 @app.route('/api/crud/users', methods=['GET'])
 @login_required
+@versioned('users')
 def crud_get_users():
     return jsonify(config_store.get_users())
 
@@ -1531,6 +1805,7 @@ def crud_delete_user(username):
 
 @app.route('/api/crud/acl-users', methods=['GET'])
 @login_required
+@versioned('acl_users')
 def crud_get_acl_users():
     return jsonify(config_store.get_acl_users())
 
@@ -1565,6 +1840,7 @@ def crud_delete_acl_user(username):
 
 @app.route('/api/crud/gateways', methods=['GET'])
 @login_required
+@versioned('gateways')
 def crud_get_gateways():
     return jsonify(config_store.get_gateways())
 
@@ -1603,6 +1879,7 @@ def crud_delete_gateway(name):
 
 @app.route('/api/crud/routes', methods=['GET'])
 @login_required
+@versioned('routes')
 def crud_get_routes():
     return jsonify(config_store.get_routes())
 
@@ -1658,6 +1935,7 @@ def crud_add_user_route():
 
 @app.route('/api/crud/settings', methods=['GET'])
 @login_required
+@versioned('settings')
 def crud_get_settings():
     return jsonify(config_store.get_settings())
 
@@ -1678,6 +1956,17 @@ def crud_get_full_config():
     """Get the full JSON configuration"""
     return jsonify(config_store.get_full_config())
 
+@app.route('/api/crud/changes', methods=['GET'])
+@login_required
+def crud_get_changes():
+    """Change journal since a config version (?since=<version>), with current data of changed sections"""
+    since = request.args.get('since', 0, type=int)
+    changes = config_store.get_changes(since)
+    if changes['sections'] and not changes['reset']:
+        config = config_store.load_config()
+        changes['data'] = {name: config.get(name) for name in changes['sections']}
+    return jsonify(changes)
+
 ################################################################################
 # CRUD API - License
 ################################################################################
@@ -1719,6 +2008,7 @@ def api_license_status():
 
 @app.route('/api/crud/inbound-routes', methods=['GET'])
 @login_required
+@versioned('routes')
 def crud_get_inbound_routes():
     """Get all inbound routes"""
     return jsonify(config_store.get_inbound_routes())
@@ -1755,6 +2045,7 @@ def crud_delete_inbound_route_gw(gateway):
 
 @app.route('/api/crud/user-routes', methods=['GET'])
 @login_required
+@versioned('routes')
 def crud_get_user_routes():
     """Get all user outbound routes"""
     return jsonify(config_store.get_outbound_user_routes())
@@ -1783,6 +2074,7 @@ def crud_delete_user_route_new(username):
 
 @app.route('/api/crud/defaults', methods=['GET'])
 @login_required
+@versioned('routes')
 def crud_get_defaults():
     """Get default gateway/extension"""
     return jsonify({
@@ -1925,30 +2217,307 @@ def crud_export():
     """Export config for provision.sh compatibility"""
     return jsonify(config_store.export_for_provision())
 
+ROUTING_CONFIG_FILE = '/var/lib/freeswitch/routing_config.json'
+
+def load_applied_config():
+    """
+    Last applied export (routing_config.json), None if nothing was applied yet.
+    provision.sh (ENV mode) writes another shape there - not a baseline either.
+    """
+    try:
+        with open(ROUTING_CONFIG_FILE, 'r') as f:
+            applied = json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+    return applied if isinstance(applied, dict) and 'fs_domain' in applied else None
+
+def build_apply_plan(export_data, dry_run=False):
+    """
+    Commands an apply runs: the config diff against the last applied export,
+    plus the reloads the regenerated XML files need (directory, gateways, ACL,
+    dialplan) - e.g. a deleted directory/default/<user>.xml needs reloadxml,
+    flushing the user's cache alone keeps the static entry loaded.
+
+    Provisioning writes only files whose content changed (nothing on dry_run).
+    Returns (plan, files); raises provisioning.ProvisionError / OSError.
+    """
+    plan = config_diff.build_plan(load_applied_config(), export_data)
+    files = None
+    if os.path.isdir(provisioning.FS_CONF):
+        files = provisioning.provision(dry_run=dry_run)
+        changed = files['written'] + files['deleted']
+        if changed:
+            config_diff.merge_commands(plan, provisioning.reload_commands(files),
+                                       'XML files changed (' + ', '.join(changed[:5]) +
+                                       (', ...' if len(changed) > 5 else '') + ')')
+    return plan, files
+
+@app.route('/api/crud/apply/plan', methods=['GET'])
+@login_required
+def crud_apply_plan():
+    """Dry run: show which FreeSWITCH commands an apply would run"""
+    export_data = config_store.export_for_provision()
+    try:
+        plan, files = build_apply_plan(export_data, dry_run=True)
+    except (provisioning.ProvisionError, OSError) as e:
+        return jsonify(dict(config_diff.build_plan(load_applied_config(), export_data),
+                            error=f'Provisioning failed: {e}'))
+    return jsonify(dict(plan, files=files))
+
 @app.route('/api/crud/apply', methods=['POST'])
 @login_required
 def crud_apply():
-    """Export config and reload FreeSWITCH"""
+    """Export config and reload only what changed in FreeSWITCH"""
     if not fs_allowed():
         return jsonify({'success': False, 'error': 'Access denied - IP not in FS_ALLOWED_IPS'})
 
-    # Export config to routing_config.json
+    # SQLite backend: refresh wrapper_config.json for provision.sh / Lua
+    config_store.write_json_mirror()
+
     export_data = config_store.export_for_provision()
-    config_file = '/var/lib/freeswitch/routing_config.json'
     try:
-        with open(config_file, 'w') as f:
-            json.dump(export_data, f, indent=2)
+        plan, files = build_apply_plan(export_data)
+    except (provisioning.ProvisionError, OSError) as e:
+        return jsonify({'success': False, 'error': f'Provisioning failed: {e}',
+                        'plan': config_diff.build_plan(load_applied_config(), export_data)})
+
+    if not plan['commands']:
+        return jsonify({'success': True, 'message': 'No changes - nothing to reload', 'plan': plan,
+                        'files': files})
+
+    # Run the plan; routing_config.json is only updated once FreeSWITCH took it,
+    # so a failed apply is planned again next time
+    for step in plan['commands']:
+        if fs_cli(step['command'], allow_empty=True) is None:
+            return jsonify({'success': False, 'error': f"Failed to run '{step['command']}' on FreeSWITCH", 'plan': plan})
+
+    # Export config to routing_config.json (same writer as provisioning at container start)
+    try:
+        provisioning.write_routing_config_json(export_data, ROUTING_CONFIG_FILE)
     except IOError as e:
-        return jsonify({'success': False, 'error': f'Failed to write config: {e}'})
+        return jsonify({'success': False, 'error': f'FreeSWITCH reloaded but failed to write config: {e}', 'plan': plan})
 
-    # Reload FreeSWITCH
-    result = fs_cli('reloadxml')
-    if result is not None:
-        fs_cli('sofia profile internal rescan')
-        fs_cli('sofia profile external rescan')
-        return jsonify({'success': True, 'message': 'Config applied and FreeSWITCH reloaded'})
+    return jsonify({'success': True, 'message': f"Config applied ({len(plan['commands'])} FreeSWITCH commands)",
+                    'plan': plan, 'files': files})
+
+################################################################################
+# Bulk Import API (JSON array, NDJSON or CSV - one write per request)
+################################################################################
+
+import csv
+import io
 
-    return jsonify({'success': False, 'error': 'Config saved but failed to reload FreeSWITCH'})
+def parse_bulk_rows():
+    """
+    Parse rows of a bulk upload. Accepts:
+    - JSON array (or {"items": [...], "atomic": true})
+    - NDJSON (application/x-ndjson), one object per line
+    - CSV (text/csv) with a header row
+    - multipart upload with a 'file' field (.json / .ndjson / .csv)
+
+    Returns (rows, atomic). NDJSON and CSV are read line by line from the
+    stream; rows that fail to parse are yielded as (line, error message).
+    """
+    atomic = request.args.get('atomic', '').lower() in ('1', 'true', 'yes')
+    stream = request.stream
+    fmt = request.mimetype
+
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        name = (upload.filename or '').lower()
+        fmt = 'text/csv' if name.endswith('.csv') else \
+            'application/x-ndjson' if name.endswith(('.ndjson', '.jsonl')) else 'application/json'
+
+    if fmt in ('text/csv', 'application/csv'):
+        text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        return ((n, row) for n, row in enumerate(csv.DictReader(text), 1)), atomic
+
+    if fmt in ('application/x-ndjson', 'application/jsonl', 'application/json-lines'):
+        def ndjson_rows():
+            for n, line in enumerate(io.TextIOWrapper(stream, encoding='utf-8'), 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield n, json.loads(line)
+                except ValueError as e:
+                    yield n, f"invalid JSON: {e}"
+        return ndjson_rows(), atomic
+
+    try:
+        data = json.load(stream)
+    except ValueError as e:
+        return [(None, f"invalid JSON: {e}")], atomic
+    if isinstance(data, dict):
+        atomic = atomic or bool(data.get('atomic'))
+        data = data.get('items', [])
+    if not isinstance(data, list):
+        return [(None, "expected a JSON array")], atomic
+    return data, atomic
+
+def bulk_response(kind):
+    """Run a bulk import and build the JSON response"""
+    rows, atomic = parse_bulk_rows()
+    added, errors = config_store.bulk_add(kind, rows, atomic=atomic)
+    return jsonify({
+        'success': not errors,
+        'message': f'{added} added, {len(errors)} failed',
+        'added': added,
+        'errors': errors
+    })
+
+@app.route('/api/crud/users/bulk', methods=['POST'])
+@login_required
+def crud_bulk_users():
+    """Bulk import users"""
+    return bulk_response('users')
+
+@app.route('/api/crud/acl-users/bulk', methods=['POST'])
+@login_required
+def crud_bulk_acl_users():
+    """Bulk import ACL users"""
+    return bulk_response('acl_users')
+
+@app.route('/api/crud/gateways/bulk', methods=['POST'])
+@login_required
+def crud_bulk_gateways():
+    """Bulk import gateways"""
+    return bulk_response('gateways')
+
+@app.route('/api/crud/inbound-routes/bulk', methods=['POST'])
+@login_required
+def crud_bulk_inbound_routes():
+    """Bulk import inbound routes (gateway -> extension)"""
+    return bulk_response('inbound_routes')
+
+@app.route('/api/security/blacklist/bulk', methods=['POST'])
+@login_required
+def api_blacklist_bulk():
+    """Bulk add IPs to blacklist"""
+    return bulk_response('blacklist')
+
+################################################################################
+# Route Resolution API (same compiled routes as the xml_curl dialplan)
+################################################################################
+
+import route_matcher
+
+def number_item_error(item):
+    """Why item is not a number string / number object, '' if it is"""
+    if isinstance(item, dict):
+        item = item.get('number', '')
+    if item is None or isinstance(item, str) or (isinstance(item, (int, float)) and not isinstance(item, bool)):
+        return ''
+    return 'expected a number string or {"number": ...} object'
+
+def resolve_item(matcher, item, username='', direction='outbound'):
+    """
+    Resolve one number: a string, or {"number", "username", "direction",
+    "gateway" (inbound gw= parameter), "from_host"}.
+    """
+    gateway = from_host = ''
+    error = number_item_error(item)
+    if error:
+        return {'input': item, 'route': None, 'error': error}
+    if isinstance(item, dict):
+        number = item.get('number', '')
+        username = item.get('username', username)
+        direction = item.get('direction', direction)
+        gateway = item.get('gateway', '')
+        from_host = item.get('from_host', '')
+    else:
+        number = item
+    number = str(number if number is not None else '').strip()
+
+    if direction == 'inbound':
+        result = matcher.resolve_inbound(number, f'gw={gateway}' if gateway else '', from_host)
+    else:
+        result = matcher.resolve_outbound(number, username or '')
+    resolved = {'input': number}
+    resolved.update(result or {'route': None})
+    return resolved
+
+@app.route('/api/routes/resolve', methods=['GET', 'POST'])
+@login_required
+def api_routes_resolve():
+    """
+    Where do numbers go? Applies the generated dialplan logic (user routes,
+    local extensions, pattern routes with strip/prepend, default gateway,
+    country code normalization) and returns gateway + dial string.
+
+    - GET ?number=...&username=...&direction=outbound|inbound&gateway=...
+    - POST JSON {"numbers": [...], "username": "", "direction": "",
+      "routes": {...}} - "routes" resolves against a candidate routes
+      config (merged over the current one) without saving it
+    - POST text/plain (one number per line) or NDJSON: streamed, one
+      NDJSON result line per input line
+
+    The routes are compiled once per request, not per number.
+    """
+    username = request.args.get('username', '')
+    direction = request.args.get('direction', 'outbound')
+
+    if request.method == 'GET':
+        number = request.args.get('number', '')
+        if not number:
+            return jsonify({'success': False, 'message': 'number required'})
+        item = {'number': number, 'gateway': request.args.get('gateway', ''),
+                'from_host': request.args.get('from_host', '')}
+        matcher = route_matcher.get_matcher()
+        return jsonify({'success': True, 'result': resolve_item(matcher, item, username, direction),
+                        'errors': matcher.errors})
+
+    if request.mimetype in ('text/plain', 'application/x-ndjson', 'application/jsonl'):
+        from flask import Response, stream_with_context
+        matcher = route_matcher.get_matcher()
+        ndjson = request.mimetype != 'text/plain'
+
+        def results():
+            for line in io.TextIOWrapper(request.stream, encoding='utf-8'):
+                line = line.strip()
+                if not line:
+                    continue
+                if ndjson:
+                    try:
+                        line = json.loads(line)
+                    except ValueError as e:
+                        yield json.dumps({'input': line, 'error': f'invalid JSON: {e}'}) + '\n'
+                        continue
+                yield json.dumps(resolve_item(matcher, line, username, direction)) + '\n'
+
+        return Response(stream_with_context(results()), mimetype='application/x-ndjson')
+
+    data = request.get_json(silent=True)
+    if isinstance(data, list):
+        data = {'numbers': data}
+    if not isinstance(data, dict) or not isinstance(data.get('numbers'), list):
+        return jsonify({'success': False, 'message': 'expected {"numbers": [...]}'})
+    for index, item in enumerate(data['numbers']):
+        error = number_item_error(item)
+        if error:
+            return jsonify({'success': False, 'message': f'numbers[{index}]: {error}'})
+    if data.get('routes') and not isinstance(data['routes'], dict):
+        return jsonify({'success': False, 'message': 'expected "routes" to be an object'})
+    username = data.get('username', username)
+    direction = data.get('direction', direction)
+
+    if data.get('routes'):
+        matcher = route_matcher.candidate_matcher(data['routes'])
+    else:
+        matcher = route_matcher.get_matcher()
+    results = [resolve_item(matcher, item, username, direction) for item in data['numbers']]
+
+    by_gateway = defaultdict(int)
+    for result in results:
+        by_gateway[result.get('gateway') or result['route'] or 'unrouted'] += 1
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'by_gateway': by_gateway,
+        'results': results,
+        'errors': matcher.errors
+    })
 
 ################################################################################
 # Security API - Blacklist / Whitelist
@@ -1956,12 +2525,14 @@ def crud_apply():
 
 @app.route('/api/security')
 @login_required
+@versioned('security')
 def api_security():
     """Get security settings"""
     return jsonify(config_store.get_security())
 
 @app.route('/api/security/blacklist', methods=['GET'])
 @login_required
+@versioned('security')
 def api_blacklist_get():
     """Get blacklist"""
     security = config_store.get_security()
@@ -2078,6 +2649,12 @@ def api_check_blacklist():
         'message': f"Blocked {len(blocked)} IPs" if blocked else "No IPs blocked"
     })
 
+@app.route('/api/security/directory-stats', methods=['GET'])
+@login_required
+def api_directory_stats():
+    """XML CURL directory counters (found / not found / negative cache / rate limited)"""
+    return jsonify(directory_cache.stats())
+
 ################################################################################
 # Fail2Ban Integration API
 ################################################################################
@@ -2132,86 +2709,10 @@ def api_blacklist_reset_count(ip):
     return jsonify({'success': success, 'message': message})
 
 ################################################################################
-# FreeSWITCH XML CURL Directory (Strict User Authentication)
+# FreeSWITCH XML CURL Callbacks (fs_callbacks.py - also served by fs_api.py)
 ################################################################################
 
-@app.route('/api/freeswitch/directory', methods=['POST'])
-def freeswitch_directory():
-    """
-    XML CURL endpoint for FreeSWITCH directory lookups.
-
-    This enables STRICT username validation - only users that exist in the
-    config can register. Without this, FreeSWITCH's digest auth can accept
-    any username if the password matches ANY user in the directory.
-
-    FreeSWITCH sends POST with:
-    - user: the username trying to authenticate
-    - domain: the SIP domain
-    - action: auth-check, user_call, etc.
-    """
-    # Get POST data from FreeSWITCH
-    user = request.form.get('user', '')
-    domain = request.form.get('domain', '')
-    action = request.form.get('action', '')
-    purpose = request.form.get('purpose', '')
-
-    # Log the request for debugging
-    app.logger.info(f"[XML_CURL] Directory lookup: user={user}, domain={domain}, action={action}, purpose={purpose}")
-
-    # Load config and find user
-    config = config_store.load_config()
-    users = config.get('users', [])
-
-    # Find user by username
-    user_data = None
-    for u in users:
-        if u.get('username') == user and u.get('enabled', True):
-            user_data = u
-            break
-
-    if not user_data:
-        # User not found - return "not found" response
-        app.logger.warning(f"[XML_CURL] REJECTED: User '{user}' not found in directory")
-        return '''<?xml version="1.0" encoding="UTF-8"?>
-<document type="freeswitch/xml">
-  <section name="result">
-    <result status="not found"/>
-  </section>
-</document>''', 200, {'Content-Type': 'text/xml'}
-
-    # User found - return directory entry with password
-    password = user_data.get('password', '')
-    extension = user_data.get('extension', user)
-
-    app.logger.info(f"[XML_CURL] User '{user}' found, returning directory entry")
-
-    xml_response = f'''<?xml version="1.0" encoding="UTF-8"?>
-<document type="freeswitch/xml">
-  <section name="directory">
-    <domain name="{domain}">
-      <params>
-        <param name="dial-string" value="{{^^:sip_invite_domain=${{domain}}:presence_id=${{dialed_user}}@${{domain}}}}{{${{sofia_contact(${{dialed_user}}@${{domain}})}}}}"/>
-      </params>
-      <user id="{user}">
-        <params>
-          <param name="password" value="{password}"/>
-          <param name="vm-password" value="{password}"/>
-        </params>
-        <variables>
-          <variable name="toll_allow" value="domestic,international,local"/>
-          <variable name="accountcode" value="{user}"/>
-          <variable name="user_context" value="default"/>
-          <variable name="effective_caller_id_name" value="{user}"/>
-          <variable name="effective_caller_id_number" value="{extension}"/>
-          <variable name="outbound_caller_id_name" value="{user}"/>
-          <variable name="outbound_caller_id_number" value="{extension}"/>
-        </variables>
-      </user>
-    </domain>
-  </section>
-</document>'''
-
-    return xml_response, 200, {'Content-Type': 'text/xml'}
+app.register_blueprint(fs_callbacks.bp)
 
 
 ################################################################################
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: esl_client.py (asyncio) vs greenswitch receiving events
+
+A fake event socket (benchmarks/fake_freeswitch.py) sends N text/event-plain
+channel events (~3 KB each) right after the subscription. Each client runs
+in its own process and counts the events in its handler:
+- events/s: N / time from "event plain all" to the Nth event
+- memory per event: bytes still allocated per received event when all
+  event objects are kept (tracemalloc, separate run)
+- peak per event: tracemalloc peak during that run / N
+
+Usage: python benchmarks/bench_esl_client.py [--events 50000] [--memory-events 5000]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADMIN_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_freeswitch import FakeFreeSWITCH
+
+
+def receive_greenswitch(port, events, keep):
+    import gevent.event
+    from greenswitch import InboundESL
+
+    received = []
+    count = [0]
+    done = gevent.event.Event()
+
+    def handler(event):
+        if keep:
+            received.append(event)
+        count[0] += 1
+        if count[0] >= events:
+            done.set()
+
+    esl = InboundESL('127.0.0.1', port, 'ClueCon')
+    esl.connect()
+    esl.register_handle('*', handler)
+    start = time.perf_counter()
+    esl.send('event plain all')
+    done.wait()
+    return time.perf_counter() - start, received
+
+
+def receive_asyncio(port, events, keep):
+    import asyncio
+    import esl_client
+
+    received = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        done = loop.create_future()
+        count = 0
+
+        def handler(event):
+            nonlocal count
+            if keep:
+                received.append(event)
+            count += 1
+            if count >= events and not done.done():
+                done.set_result(None)
+
+        connection = esl_client.ESLConnection('127.0.0.1', port, 'ClueCon', on_event=handler)
+        await connection.connect()
+        start = time.perf_counter()
+        await connection.events('all')
+        await done
+        elapsed = time.perf_counter() - start
+        await connection.close()
+        return elapsed
+
+    return asyncio.run(run()), received
+
+
+CLIENTS = {
+    'greenswitch': receive_greenswitch,
+    'asyncio': receive_asyncio,
+}
+
+
+def worker(client, events, memory):
+    """Run one client against its own fake switch, print the result as JSON"""
+    switch = FakeFreeSWITCH(events=events)
+    port = switch.start()
+    if memory:
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        elapsed, received = CLIENTS[client](port, events, keep=True)
+        current, peak = tracemalloc.get_traced_memory()
+        result = {'bytes_per_event': (current - baseline) / len(received),
+                  'peak_per_event': (peak - baseline) / len(received)}
+    else:
+        elapsed, _ = CLIENTS[client](port, events, keep=False)
+        result = {'events_per_s': events / elapsed}
+    print(json.dumps(result))
+
+
+def run(client, events, memory):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', client, '--events', str(events)]
+    if memory:
+        command.append('--memory')
+    output = subprocess.run(command, capture_output=True, text=True, check=True, timeout=600).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=50000)
+    parser.add_argument('--memory-events', type=int, default=5000)
+    parser.add_argument('--clients', nargs='+', default=list(CLIENTS), choices=list(CLIENTS))
+    parser.add_argument('--worker', choices=list(CLIENTS), help=argparse.SUPPRESS)
+    parser.add_argument('--memory', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker, args.events, args.memory)
+        return
+
+    print(f"{args.events} events for throughput, {args.memory_events} kept for memory\n")
+    print(f"{'client':<12} {'events/s':>10} {'bytes/event':>12} {'peak/event':>11}")
+    for client in args.clients:
+        speed = run(client, args.events, memory=False)
+        memory = run(client, args.memory_events, memory=True)
+        print(f"{client:<12} {speed['events_per_s']:>10.0f} {memory['bytes_per_event']:>12.0f} "
+              f"{memory['peak_per_event']:>11.0f}")
+
+
+if __name__ == '__main__':
+    main()
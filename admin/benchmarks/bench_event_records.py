@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ESLEventSubscriber event processing and buffering
+
+Feeds N events (mix of a busy switch: channel state/create/hangup, LOG,
+RE_SCHEDULE, HEARTBEAT, sofia::register) straight into the subscriber's
+event callback - no socket - and reports:
+- us/event: time of the callback (parse + buffer)
+- bytes/event: memory still held per buffered event (tracemalloc), events
+  are created in the loop like the ESL library does and dropped after the
+  callback, so a headers dict counts only if the buffer keeps it; in
+  parentheses the buffer's own estimate (ESLEventBuffer.stats()['bytes'])
+- serialize ms: /api/esl/events-style serialization of the last 1000 events,
+  first poll and repeated poll
+
+Usage: python benchmarks/bench_event_records.py [--events 20000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADMIN_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import esl_events
+from fake_freeswitch import event_headers
+
+
+class FakeEvent:
+    def __init__(self, headers, body=''):
+        # New string objects per event, like the ESL library's parser
+        self.headers = {k.encode().decode(): v.encode().decode() for k, v in headers.items()}
+        self.body = body.encode().decode()
+
+
+def make_event(i):
+    kind = i % 10
+    if kind < 4:
+        return FakeEvent(event_headers(i))
+    if kind == 4:
+        return FakeEvent(dict(event_headers(i), **{'Event-Name': 'CHANNEL_CREATE'}))
+    if kind == 5:
+        return FakeEvent(dict(event_headers(i), **{'Event-Name': 'CHANNEL_HANGUP_COMPLETE',
+                                                   'Hangup-Cause': 'NORMAL_CLEARING'}))
+    if kind in (6, 7):
+        return FakeEvent({'Event-Name': 'LOG', 'Log-Level': '7', 'Log-File': 'switch_core_state_machine.c',
+                          'Log-Line': '584', 'Content-Length': '90'},
+                         f'{i} switch_core_state_machine.c:584 (sofia/internal/1000@10.0.0.1) State EXECUTE\n')
+    if kind == 8:
+        return FakeEvent({'Event-Name': 'RE_SCHEDULE', 'Task-ID': str(i), 'Task-Desc': 'heartbeat',
+                          'Task-Group': 'core', 'Task-Runtime': '1767265220'})
+    return FakeEvent({'Event-Name': 'CUSTOM', 'Event-Subclass': 'sofia::register', 'profile-name': 'internal',
+                      'from-user': '1000', 'from-host': '10.0.0.1', 'network-ip': '10.0.0.50',
+                      'network-port': '5060', 'expires': '3600', 'user-agent': 'Bench Phone 1.0'})
+
+
+def serialize(subscriber, events):
+    """Events as a JSON list, the way /api/esl/events builds it"""
+    if hasattr(subscriber, 'events_json'):
+        return b'[' + b','.join(subscriber.events_json(events)) + b']'
+    to_dict = getattr(events[0], 'to_dict', None) if events else None
+    return json.dumps([e.to_dict() for e in events] if to_dict else events, default=str).encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=20000)
+    args = parser.parse_args()
+
+    subscriber = esl_events.ESLEventSubscriber(buffer_size=args.events)
+    subscriber.buffer.max_bytes = 0  # every event stays buffered
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    for i in range(args.events):
+        subscriber._on_event(make_event(i))
+    held = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    events = [make_event(i) for i in range(args.events)]
+    subscriber.clear_events()
+    start = time.perf_counter()
+    for event in events:
+        subscriber._on_event(event)
+    elapsed = time.perf_counter() - start
+
+    recent = subscriber.get_events(1000)
+    polls = []
+    for _ in range(2):
+        start = time.perf_counter()
+        serialize(subscriber, recent)
+        polls.append((time.perf_counter() - start) * 1000)
+
+    accounted = subscriber.buffer.stats().get('bytes')
+    print(f"{args.events} events: {elapsed / args.events * 1e6:.1f} us/event, "
+          f"{held / args.events:.0f} bytes/event"
+          + (f" ({accounted / args.events:.0f} accounted)" if accounted else '')
+          + f", serialize 1000: {polls[0]:.1f} ms first, "
+          f"{polls[1]:.1f} ms repeated")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Python provisioning engine vs provision.sh
+
+Generates a config with N users (plus gateways, ACL users, routes and a
+blacklist), renders it with provisioning.py and optionally with
+provision.sh (--shell, needs bash + jq; slow at 10k users), then checks
+both trees are byte-identical.
+
+Usage: python benchmarks/bench_provisioning.py [--users 1000 10000] [--shell]
+"""
+
+import argparse
+import filecmp
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROVISION_SH = os.path.join(os.path.dirname(ADMIN_DIR), 'provision.sh')
+sys.path.insert(0, ADMIN_DIR)
+
+
+def make_config(users):
+    """Config with the given number of users and proportional extras"""
+    gateways = max(users // 100, 2)
+    return {
+        'version': 1,
+        'license': {'key': 'BENCH', 'client_name': 'Bench Client'},
+        'settings': {'fs_domain': 'bench.local', 'external_sip_ip': '203.0.113.1',
+                     'external_rtp_ip': '203.0.113.1', 'default_country_code': '49'},
+        'users': [{'username': f'user{i}', 'password': f'pw{i}', 'extension': str(10000 + i),
+                   'enabled': True} for i in range(users)],
+        'acl_users': [{'username': f'pbx{i}', 'ips': [f'10.{i // 250}.{i % 250}.1'],
+                       'extension': str(50000 + i), 'enabled': True} for i in range(users // 20)],
+        'gateways': [{'name': f'gw{i}', 'host': f'sip{i}.example.com', 'port': 5060,
+                      'username': f'trunk{i}', 'password': 'secret', 'register': True,
+                      'transport': 'udp', 'enabled': True} for i in range(gateways)],
+        'routes': {
+            'inbound': [{'gateway': f'gw{i}', 'extension': str(10000 + i)} for i in range(gateways)],
+            'outbound': [{'pattern': '0[1-9].*', 'gateway': 'gw0', 'prepend': '+49', 'strip': '0'}],
+            'user_routes': [{'username': f'user{i}', 'gateway': f'gw{i % gateways}'}
+                            for i in range(0, users, 10)],
+            'default_gateway': 'gw0',
+            'default_extension': '10000',
+            'outbound_caller_id': '',
+        },
+        'security': {'blacklist': [{'ip': f'198.51.{i // 250}.{i % 250}'} for i in range(users // 10)],
+                     'whitelist': []},
+    }
+
+
+def run_python(config_file, fs_conf):
+    os.environ['CONFIG_FILE'] = config_file
+    import config_store
+    import provisioning
+    config_store.CONFIG_FILE = config_file
+    started = time.perf_counter()
+    config = config_store.load_raw_config()
+    files = provisioning.render(config)
+    rendered = time.perf_counter()
+    provisioning.write_files(files, fs_conf)
+    written = time.perf_counter()
+    # Second run: nothing changed, only hashes are compared
+    provisioning.write_files(provisioning.render(config), fs_conf)
+    return rendered - started, written - started, time.perf_counter() - written
+
+
+def run_shell(config_file, fs_conf, workdir):
+    # provision.sh writes routing_config.json to a fixed path - point it into the workdir
+    script = os.path.join(workdir, 'provision.sh')
+    with open(PROVISION_SH) as src, open(script, 'w') as dst:
+        dst.write(src.read().replace('/var/lib/freeswitch/routing_config',
+                                     os.path.join(workdir, 'routing_config')))
+    env = dict(os.environ, CONFIG_FILE=config_file, FS_CONF=fs_conf,
+               BACKUP_DIR=os.path.join(workdir, 'backup'))
+    started = time.perf_counter()
+    subprocess.run(['bash', script], env=env, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - started
+
+
+def same_tree(a, b):
+    import provisioning
+    cmp = filecmp.dircmp(a, b, ignore=[provisioning.MANIFEST_FILE])
+    if cmp.left_only or cmp.right_only or cmp.funny_files:
+        return False
+    _, mismatch, errors = filecmp.cmpfiles(a, b, cmp.common_files, shallow=False)
+    if mismatch or errors:
+        return False
+    return all(same_tree(os.path.join(a, d), os.path.join(b, d)) for d in cmp.common_dirs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--shell', action='store_true', help='also time provision.sh and compare output')
+    args = parser.parse_args()
+
+    for users in args.users:
+        workdir = tempfile.mkdtemp(prefix='bench_provisioning_')
+        try:
+            config_file = os.path.join(workdir, 'wrapper_config.json')
+            with open(config_file, 'w') as f:
+                json.dump(make_config(users), f)
+
+            py_conf = os.path.join(workdir, 'py')
+            render_s, total_s, rerun_s = run_python(config_file, py_conf)
+            print(f"{users:>6} users  python: render {render_s * 1000:8.1f} ms, "
+                  f"render+write {total_s * 1000:8.1f} ms, unchanged re-run {rerun_s * 1000:8.1f} ms")
+
+            if args.shell:
+                sh_conf = os.path.join(workdir, 'sh')
+                shell_s = run_shell(config_file, sh_conf, workdir)
+                print(f"{users:>6} users  shell:  {shell_s * 1000:8.1f} ms "
+                      f"({shell_s / total_s:.0f}x), identical output: {same_tree(sh_conf, py_conf)}")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Benchmark: threaded server (python app.py) vs single gevent hub (serve_gevent.py)
+
+Starts the admin portal in each mode against a fake FreeSWITCH event socket
+(benchmarks/fake_freeswitch.py). Once the subscriber is connected, the
+fake switch sends N events while C keep-alive clients poll the dashboard
+endpoints for D seconds. Reported per mode:
+- requests/s and p50/p99 latency of the polls
+- events/s: N / time until the subscriber's buffer counted all N events
+
+Usage: python benchmarks/bench_server_modes.py [--events 20000] [--clients 20]
+       [--duration 10] [--modes threads gevent]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_freeswitch import FakeFreeSWITCH
+
+SERVERS = {
+    'threads': 'app.py',
+    'gevent': 'serve_gevent.py',
+}
+
+# Polled round-robin by every client
+ENDPOINTS = (
+    '/api/dashboard?sections=status,active_calls',
+    '/api/esl/events?count=50',
+    '/api/esl/status',
+)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def login(port):
+    """Session cookie of a logged-in admin"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('POST', '/login', 'username=admin&password=admin',
+                 {'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    response.read()
+    conn.close()
+    return response.getheader('Set-Cookie').split(';', 1)[0]
+
+
+def get_json(port, cookie, path):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    conn.request('GET', path, headers={'Cookie': cookie})
+    data = json.loads(conn.getresponse().read())
+    conn.close()
+    return data
+
+
+def wait_for(check, timeout=30, interval=0.1):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if check():
+                return True
+        except OSError:
+            pass
+        time.sleep(interval)
+    return False
+
+
+def client(port, cookie, stop, latencies, errors):
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    i = 0
+    while not stop.is_set():
+        path = ENDPOINTS[i % len(ENDPOINTS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path, headers={'Cookie': cookie})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors.append(response.status)
+        except (OSError, http.client.HTTPException) as e:
+            errors.append(str(e))
+            conn.close()
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    conn.close()
+
+
+def run_mode(mode, events, clients, duration):
+    switch = FakeFreeSWITCH(events=events, hold=True)
+    switch.start()
+    port = free_port()
+    workdir = tempfile.mkdtemp(prefix=f'bench_{mode}_')
+    env = dict(os.environ, CONFIG_FILE=os.path.join(workdir, 'config.json'), ADMIN_PORT=str(port),
+               FS_PORT=str(switch.port), FS_HOST='127.0.0.1', ADMIN_USER='admin', ADMIN_PASS='admin')
+    log = open(os.path.join(workdir, 'server.log'), 'w')
+    server = subprocess.Popen([sys.executable, SERVERS[mode]], cwd=ADMIN_DIR, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)
+    try:
+        if not wait_for(lambda: socket.create_connection(('127.0.0.1', port), timeout=1).close() is None):
+            raise RuntimeError(f'{mode}: server did not start, see {log.name}')
+        cookie = login(port)
+        if not wait_for(lambda: get_json(port, cookie, '/api/esl/status')['connected']):
+            raise RuntimeError(f'{mode}: ESL subscriber did not connect, see {log.name}')
+
+        stop = threading.Event()
+        latencies, errors = [], []
+        threads = [threading.Thread(target=client, args=(port, cookie, stop, latencies, errors))
+                   for _ in range(clients)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        switch.release()
+
+        # The event count is polled on its own connection, not part of the load
+        drained = None
+        while time.perf_counter() - started < duration:
+            if drained is None:
+                total = get_json(port, cookie, '/api/esl/status')['buffer_stats']['total_events']
+                # +1: the subscriber's own CONNECTED event
+                if total >= events + 1:
+                    drained = time.perf_counter() - started
+            time.sleep(0.05)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        server.terminate()
+        server.wait()
+        log.close()
+        switch.stop()
+
+    latencies.sort()
+    return {
+        'mode': mode,
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p99_ms': latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0,
+        'errors': len(errors),
+        'events_per_s': events / drained if drained else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=20000)
+    parser.add_argument('--clients', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--modes', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    print(f"{args.events} events, {args.clients} clients, {args.duration:.0f}s per mode\n")
+    print(f"{'mode':<10} {'requests':>9} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'errors':>7} {'events/s':>10}")
+    for mode in args.modes:
+        r = run_mode(mode, args.events, args.clients, args.duration)
+        events = f"{r['events_per_s']:.0f}" if r['events_per_s'] else 'not done'
+        print(f"{r['mode']:<10} {r['requests']:>9} {r['rps']:>8.0f} {r['p50_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['errors']:>7} {events:>10}")
+
+
+if __name__ == '__main__':
+    main()
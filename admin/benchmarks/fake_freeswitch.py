@@ -0,0 +1,222 @@
+"""
+Minimal FreeSWITCH event socket for the benchmarks
+
+Speaks enough of the inbound ESL protocol for the admin portal: auth,
+api (canned responses), bgapi, event plain|json, filter, exit. After an
+"event" subscription each connection gets `events` events (realistic
+channel events, about 3 KB each) as fast as the socket takes them, then
+stays open.
+
+Runs on plain threads, so it can share a process with either client.
+"""
+
+import json
+import socket
+import threading
+import uuid
+from urllib.parse import quote
+
+API_RESPONSES = {
+    'sofia status gateway': 'Gateway Name  Type  State  Status\n'
+                            '=====================================\n'
+                            'external::gw0  gateway  sip:gw0@203.0.113.1  REGED  UP (0)\n'
+                            '=====================================\n',
+    'sofia status': '     Name  Type  Data  State\n'
+                    '=====================================\n'
+                    '  internal  profile  sip:mod_sofia@10.0.0.1:5060  RUNNING (0)\n'
+                    '  external  profile  sip:mod_sofia@10.0.0.1:5080  RUNNING (0)\n'
+                    '=====================================\n',
+    'show calls': '\n0 total.\n',
+    'show channels count': '\n0 total.\n',
+    'version': 'FreeSWITCH Version 1.10.12-release (fake)',
+    'status': 'UP 0 years, 0 days, 1 hour\n0 session(s)\n',
+}
+
+
+def event_headers(sequence):
+    """Headers of a CHANNEL_STATE event like FreeSWITCH sends them"""
+    call = uuid.UUID(int=sequence)
+    headers = {
+        'Event-Name': 'CHANNEL_STATE',
+        'Core-UUID': '6b8a4c7e-9f1d-4c8e-8f0a-2d4e6b8a4c7e',
+        'FreeSWITCH-Hostname': 'fs-bench',
+        'FreeSWITCH-Switchname': 'fs-bench',
+        'FreeSWITCH-IPv4': '10.0.0.1',
+        'FreeSWITCH-IPv6': '::1',
+        'Event-Date-Local': '2026-01-01 12:00:00',
+        'Event-Date-GMT': 'Thu, 01 Jan 2026 11:00:00 GMT',
+        'Event-Date-Timestamp': str(1767265200000000 + sequence),
+        'Event-Calling-File': 'switch_channel.c',
+        'Event-Calling-Function': 'switch_channel_perform_set_running_state',
+        'Event-Calling-Line-Number': '2143',
+        'Event-Sequence': str(sequence),
+        'Channel-State': 'CS_EXECUTE',
+        'Channel-Call-State': 'ACTIVE',
+        'Channel-State-Number': '4',
+        'Channel-Name': 'sofia/internal/1000@10.0.0.1',
+        'Unique-ID': str(call),
+        'Call-Direction': 'inbound',
+        'Presence-Call-Direction': 'inbound',
+        'Channel-HIT-Dialplan': 'true',
+        'Channel-Presence-ID': '1000@10.0.0.1',
+        'Channel-Call-UUID': str(call),
+        'Answer-State': 'answered',
+        'Caller-Direction': 'inbound',
+        'Caller-Logical-Direction': 'inbound',
+        'Caller-Username': '1000',
+        'Caller-Dialplan': 'XML',
+        'Caller-Caller-ID-Name': 'Bench User',
+        'Caller-Caller-ID-Number': '1000',
+        'Caller-Orig-Caller-ID-Name': 'Bench User',
+        'Caller-Orig-Caller-ID-Number': '1000',
+        'Caller-Network-Addr': '10.0.0.50',
+        'Caller-ANI': '1000',
+        'Caller-Destination-Number': '+4930123456',
+        'Caller-Unique-ID': str(call),
+        'Caller-Source': 'mod_sofia',
+        'Caller-Context': 'default',
+        'Caller-Channel-Name': 'sofia/internal/1000@10.0.0.1',
+        'Caller-Profile-Index': '1',
+        'Caller-Profile-Created-Time': '1767265200000000',
+        'Caller-Channel-Created-Time': '1767265200000000',
+        'Caller-Channel-Answered-Time': '1767265201000000',
+        'Caller-Channel-Progress-Time': '0',
+        'Caller-Channel-Progress-Media-Time': '0',
+        'Caller-Channel-Hangup-Time': '0',
+        'Caller-Channel-Transfer-Time': '0',
+        'Caller-Screen-Bit': 'true',
+        'Caller-Privacy-Hide-Name': 'false',
+        'Caller-Privacy-Hide-Number': 'false',
+        'variable_direction': 'inbound',
+        'variable_uuid': str(call),
+        'variable_session_id': str(sequence),
+        'variable_sip_from_user': '1000',
+        'variable_sip_from_host': '10.0.0.1',
+        'variable_sip_req_params': 'transport=udp',
+        'variable_sip_contact_user': '1000',
+        'variable_sip_via_host': '10.0.0.50',
+        'variable_sip_user_agent': 'Bench Phone 1.0',
+        'variable_channel_name': 'sofia/internal/1000@10.0.0.1',
+        'variable_sip_call_id': f'{call.hex}@10.0.0.50',
+        'variable_read_codec': 'PCMA',
+        'variable_write_codec': 'PCMA',
+        'variable_remote_media_ip': '10.0.0.50',
+        'variable_remote_media_port': '16384',
+        'variable_endpoint_disposition': 'ANSWER',
+    }
+    return headers
+
+
+def plain_event(sequence):
+    body = ''.join(f'{k}: {quote(v)}\n' for k, v in event_headers(sequence).items()) + '\n'
+    body = body.encode('utf-8')
+    return b'Content-Length: %d\nContent-Type: text/event-plain\n\n' % len(body) + body
+
+
+def json_event(sequence):
+    body = json.dumps(event_headers(sequence)).encode('utf-8')
+    return b'Content-Length: %d\nContent-Type: text/event-json\n\n' % len(body) + body
+
+
+def _reply(text):
+    return f'Content-Type: command/reply\nReply-Text: {text}\n\n'.encode('utf-8')
+
+
+def _api(body):
+    body = body.encode('utf-8')
+    return b'Content-Type: api/response\nContent-Length: %d\n\n' % len(body) + body
+
+
+class FakeFreeSWITCH:
+    """Threaded fake event socket on 127.0.0.1"""
+
+    def __init__(self, password='ClueCon', events=0, port=0, hold=False):
+        self.password = password
+        self.events = events
+        # hold=True: subscriptions wait for release() before events are sent
+        self.released = threading.Event()
+        if not hold:
+            self.released.set()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(('127.0.0.1', port))
+        self.port = self.server.getsockname()[1]
+        self.connections = 0
+        self.api_calls = 0
+
+    def start(self):
+        self.server.listen(128)
+        threading.Thread(target=self._accept, daemon=True).start()
+        return self.port
+
+    def release(self):
+        """Start sending events to the subscribed connections"""
+        self.released.set()
+
+    def stop(self):
+        self.server.close()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn):
+        conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        lock = threading.Lock()
+
+        def send(data):
+            with lock:
+                conn.sendall(data)
+
+        try:
+            send(b'Content-Type: auth/request\n\n')
+            buf = b''
+            while True:
+                while b'\n\n' not in buf:
+                    data = conn.recv(65536)
+                    if not data:
+                        return
+                    buf += data
+                command, buf = buf.split(b'\n\n', 1)
+                command = command.decode('utf-8').strip()
+                if command.startswith('auth '):
+                    send(_reply('+OK accepted' if command[5:] == self.password else '-ERR invalid'))
+                elif command.startswith('api '):
+                    self.api_calls += 1
+                    send(_api(API_RESPONSES.get(command[4:], '-ERR command not found\n')))
+                elif command.startswith('bgapi '):
+                    send(_reply(f'+OK Job-UUID: {uuid.uuid4()}'))
+                elif command.startswith('event '):
+                    send(_reply('+OK event listener enabled ' + command.split()[1]))
+                    render = json_event if command.split()[1] == 'json' else plain_event
+                    threading.Thread(target=self._stream, args=(send, render), daemon=True).start()
+                elif command.startswith('filter'):
+                    send(_reply('+OK filter added'))
+                elif command == 'exit':
+                    send(_reply('+OK bye'))
+                    send(b'Content-Type: text/disconnect-notice\nContent-Length: 0\n\n')
+                    return
+                else:
+                    send(_reply('-ERR command not found'))
+        except OSError:
+            pass
+        finally:
+            conn.close()
+
+    def _stream(self, send, render):
+        self.released.wait()
+        try:
+            # Batches of pre-rendered events: the fake server should not be the bottleneck
+            batch = b''.join(render(i) for i in range(1, 101))
+            sent = 0
+            while sent < self.events:
+                count = min(100, self.events - sent)
+                send(batch if count == 100 else b''.join(render(i) for i in range(1, count + 1)))
+                sent += count
+        except OSError:
+            pass
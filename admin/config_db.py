@@ -0,0 +1,449 @@
+"""
+Config DB - SQLite storage backend for config_store
+
+Enabled with CONFIG_BACKEND=sqlite. Stores the same config document as
+wrapper_config.json, split into indexed tables:
+- users, acl_users, gateways (one row per entry)
+- routes (inbound / outbound / user_routes, one row per route)
+- security_entries (blacklist / whitelist, one row per IP)
+- meta (everything else: settings, license, scalars - kept as one small
+  "skeleton" document with placeholders where the lists go)
+- journal (change journal: version, time, changed sections)
+
+save() diffs against the stored rows and only writes what changed, and the
+row helpers (find_entry / update_entry / append_entry / delete_entries) touch
+a single row, so hot paths like blacklist counters cost O(1) I/O.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from difflib import SequenceMatcher
+from pathlib import Path
+
+# Database path - can be overridden via environment
+DB_FILE = os.environ.get('CONFIG_DB', '/var/lib/freeswitch/wrapper_config.db')
+
+# List name -> (path in config, table, (kind column, kind value), {column: item fields})
+# Key columns take the first non-empty item field and are indexed.
+LISTS = {
+    'users': (('users',), 'users', None,
+              {'username': ('username',), 'extension': ('extension',)}),
+    'acl_users': (('acl_users',), 'acl_users', None,
+                  {'username': ('username',)}),
+    'gateways': (('gateways',), 'gateways', None,
+                 {'name': ('name',)}),
+    'routes.inbound': (('routes', 'inbound'), 'routes', ('kind', 'inbound'),
+                       {'key': ('did', 'gateway')}),
+    'routes.outbound': (('routes', 'outbound'), 'routes', ('kind', 'outbound'),
+                        {'key': ('pattern',)}),
+    'routes.user_routes': (('routes', 'user_routes'), 'routes', ('kind', 'user_routes'),
+                           {'key': ('username',)}),
+    'security.blacklist': (('security', 'blacklist'), 'security_entries', ('list', 'blacklist'),
+                           {'ip': ('ip',)}),
+    'security.whitelist': (('security', 'whitelist'), 'security_entries', ('list', 'whitelist'),
+                           {'ip': ('ip',)}),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT,
+    extension TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+CREATE INDEX IF NOT EXISTS idx_users_extension ON users(extension);
+CREATE TABLE IF NOT EXISTS acl_users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_acl_users_username ON acl_users(username);
+CREATE TABLE IF NOT EXISTS gateways (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_gateways_name ON gateways(name);
+CREATE TABLE IF NOT EXISTS routes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_routes_kind_key ON routes(kind, key);
+CREATE TABLE IF NOT EXISTS security_entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    list TEXT NOT NULL,
+    ip TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_security_list_ip ON security_entries(list, ip);
+CREATE TABLE IF NOT EXISTS journal (
+    version INTEGER PRIMARY KEY,
+    at TEXT NOT NULL,
+    sections TEXT NOT NULL
+);
+"""
+
+# Change journal entries kept after compaction
+JOURNAL_KEEP = 1000
+
+_local = threading.local()
+
+
+def get_db_path():
+    """Get database path, fall back to admin folder for local development"""
+    path = Path(DB_FILE)
+    if not path.parent.exists():
+        return Path(__file__).parent / 'wrapper_config.db'
+    return path
+
+
+def _conn():
+    """Get this thread's connection (WAL mode, schema created on first use)"""
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = sqlite3.connect(str(get_db_path()), timeout=10, isolation_level=None)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.executescript(SCHEMA)
+        _local.conn = conn
+    return conn
+
+
+def _dumps(item):
+    return json.dumps(item, ensure_ascii=False)
+
+
+def section_hash(value):
+    """Content hash of a config section (section_versions[...]['hash'])"""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:16]
+
+
+def _key_values(spec, item):
+    """Values for the indexed key columns of a list entry"""
+    values = []
+    for fields in spec[3].values():
+        value = None
+        for field in fields:
+            if item.get(field) not in (None, ''):
+                value = str(item[field])
+                break
+        values.append(value)
+    return values
+
+
+def _where(spec):
+    """WHERE clause + params selecting all rows of a list"""
+    if spec[2]:
+        return f"WHERE {spec[2][0]} = ?", [spec[2][1]]
+    return "", []
+
+
+def _insert(conn, spec, item):
+    columns = list(spec[3].keys()) + ['data']
+    values = _key_values(spec, item) + [_dumps(item)]
+    if spec[2]:
+        columns.insert(0, spec[2][0])
+        values.insert(0, spec[2][1])
+    placeholders = ', '.join('?' for _ in columns)
+    conn.execute(f"INSERT INTO {spec[1]} ({', '.join(columns)}) VALUES ({placeholders})", values)
+
+
+def _update(conn, spec, row_id, item):
+    sets = ', '.join(f"{col} = ?" for col in spec[3]) + ', data = ?'
+    conn.execute(f"UPDATE {spec[1]} SET {sets} WHERE id = ?",
+                 _key_values(spec, item) + [_dumps(item), row_id])
+
+
+def _rows(conn, spec):
+    where, params = _where(spec)
+    return conn.execute(f"SELECT id, data FROM {spec[1]} {where} ORDER BY id", params).fetchall()
+
+
+def _bump_revision(conn):
+    conn.execute("INSERT INTO meta (key, value) VALUES ('revision', '1') "
+                 "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1")
+
+
+def _sync_list(conn, spec, items):
+    """Write only the differences between stored rows and items. Returns rows written."""
+    rows = _rows(conn, spec)
+    old = [data for _, data in rows]
+    new = [_dumps(item) for item in items]
+    if old == new:
+        return 0
+
+    written = 0
+    matcher = SequenceMatcher(None, old, new, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if tag == 'delete':
+            conn.executemany(f"DELETE FROM {spec[1]} WHERE id = ?",
+                             [(rows[i][0],) for i in range(i1, i2)])
+            written += i2 - i1
+        elif tag == 'replace' and i2 - i1 == j2 - j1:
+            for offset in range(i2 - i1):
+                _update(conn, spec, rows[i1 + offset][0], items[j1 + offset])
+            written += i2 - i1
+        elif i1 == len(old):
+            # Appended at the end - new ids keep the order
+            for item in items[j1:j2]:
+                _insert(conn, spec, item)
+            written += j2 - j1
+        else:
+            # Inserted in the middle - rewrite the rest of the list
+            conn.executemany(f"DELETE FROM {spec[1]} WHERE id = ?",
+                             [(row_id,) for row_id, _ in rows[i1:]])
+            for item in items[j1:]:
+                _insert(conn, spec, item)
+            written += (len(old) - i1) + (len(items) - j1)
+            break
+    return written
+
+
+def _split(config):
+    """Split config into skeleton (no lists) and {list name: items}"""
+    skeleton = dict(config)
+    lists = {}
+    for name, spec in LISTS.items():
+        path = spec[0]
+        parent = skeleton
+        if len(path) == 2:
+            if not isinstance(skeleton.get(path[0]), dict):
+                continue
+            parent = skeleton[path[0]] = dict(skeleton[path[0]])
+        if path[-1] in parent:
+            lists[name] = parent[path[-1]] or []
+            parent[path[-1]] = None
+    return skeleton, lists
+
+
+# =============================================================================
+# Document API (used by config_store.load_config / save_config)
+# =============================================================================
+
+def is_empty():
+    """True if nothing has been stored yet"""
+    row = _conn().execute("SELECT 1 FROM meta WHERE key = 'skeleton'").fetchone()
+    return row is None
+
+
+def get_revision():
+    """Counter incremented by every write"""
+    row = _conn().execute("SELECT value FROM meta WHERE key = 'revision'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def load(with_lists=True):
+    """Load the full config document, or None if the database is empty.
+
+    with_lists=False returns only the skeleton (lists left as None) - cheap
+    access to settings without reading every user and blacklist row.
+    """
+    conn = _conn()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'skeleton'").fetchone()
+    if row is None:
+        return None
+    config = json.loads(row[0])
+    if not with_lists:
+        return config
+    for spec in LISTS.values():
+        path = spec[0]
+        parent = config
+        if len(path) == 2:
+            parent = config.get(path[0])
+            if not isinstance(parent, dict):
+                continue
+        if path[-1] in parent:
+            parent[path[-1]] = [json.loads(data) for _, data in _rows(conn, spec)]
+    return config
+
+
+def _journal(conn, entry):
+    """Append a change journal entry and drop the oldest ones"""
+    conn.execute("INSERT OR REPLACE INTO journal (version, at, sections) VALUES (?, ?, ?)",
+                 (entry['version'], entry['at'], _dumps(entry['sections'])))
+    conn.execute("DELETE FROM journal WHERE version <= ?", (entry['version'] - JOURNAL_KEEP,))
+
+
+def save(config, journal=None):
+    """Save the full config document, writing only changed rows. Returns rows written."""
+    skeleton, lists = _split(config)
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        written = 0
+        row = conn.execute("SELECT value FROM meta WHERE key = 'skeleton'").fetchone()
+        skeleton_json = _dumps(skeleton)
+        if row is None or row[0] != skeleton_json:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('skeleton', ?)",
+                         (skeleton_json,))
+            written += 1
+        for name, items in lists.items():
+            written += _sync_list(conn, LISTS[name], items)
+        if journal:
+            _journal(conn, journal)
+        _bump_revision(conn)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return written
+
+
+# =============================================================================
+# Row API (single entry reads/writes without loading the document)
+# =============================================================================
+
+def _find(conn, spec, key, column):
+    column = column or next(iter(spec[3]))
+    where, params = _where(spec)
+    where = f"{where} AND {column} = ?" if where else f"WHERE {column} = ?"
+    return conn.execute(f"SELECT id, data FROM {spec[1]} {where} ORDER BY id LIMIT 1",
+                        params + [str(key)]).fetchone()
+
+
+def _section(conn, skeleton, section):
+    """One section of the document as load() returns it (skeleton is not modified)"""
+    if section not in skeleton:
+        return None
+    value = json.loads(_dumps(skeleton[section]))
+    for spec in LISTS.values():
+        path = spec[0]
+        if path[0] != section:
+            continue
+        if len(path) == 1:
+            value = [json.loads(data) for _, data in _rows(conn, spec)]
+        elif isinstance(value, dict) and path[1] in value:
+            value[path[1]] = [json.loads(data) for _, data in _rows(conn, spec)]
+    return value
+
+
+def _touch(conn, name, updated_at):
+    """After a row write: bump config/section version, journal it, bump the revision"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'skeleton'").fetchone()
+    if row:
+        section = LISTS[name][0][0]
+        skeleton = json.loads(row[0])
+        version = skeleton.get('config_version', 0) + 1
+        skeleton['config_version'] = version
+        # Hash left dirty (None): rehashing every blacklist row on each counter
+        # update would undo the O(1) row write - resolve_hashes() fills it in
+        skeleton.setdefault('section_versions', {})[section] = {'version': version, 'hash': None}
+        if updated_at:
+            skeleton['updated_at'] = updated_at
+        conn.execute("UPDATE meta SET value = ? WHERE key = 'skeleton'", (_dumps(skeleton),))
+        _journal(conn, {'version': version, 'at': updated_at or '', 'sections': [section]})
+    _bump_revision(conn)
+
+
+def find_entry(name, key, column=None):
+    """Get the first entry of a list whose key column matches"""
+    row = _find(_conn(), LISTS[name], key, column)
+    return json.loads(row[1]) if row else None
+
+
+def update_entry(name, key, fields, updated_at=None, column=None):
+    """Merge fields (dict, or callable taking the entry) into the first match. Returns the entry or None."""
+    spec = LISTS[name]
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        row = _find(conn, spec, key, column)
+        if row is None:
+            conn.execute('ROLLBACK')
+            return None
+        item = json.loads(row[1])
+        item.update(fields(item) if callable(fields) else fields)
+        _update(conn, spec, row[0], item)
+        _touch(conn, name, updated_at)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return item
+
+
+def append_entry(name, item, updated_at=None):
+    """Append one entry to a list"""
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        _insert(conn, LISTS[name], item)
+        _touch(conn, name, updated_at)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+
+
+def delete_entries(name, key, updated_at=None, column=None):
+    """Delete all entries of a list whose key column matches. Returns count."""
+    spec = LISTS[name]
+    column = column or next(iter(spec[3]))
+    where, params = _where(spec)
+    where = f"{where} AND {column} = ?" if where else f"WHERE {column} = ?"
+    conn = _conn()
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        count = conn.execute(f"DELETE FROM {spec[1]} {where}", params + [str(key)]).rowcount
+        if count:
+            _touch(conn, name, updated_at)
+        conn.execute('COMMIT')
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    return count
+
+
+# =============================================================================
+# Versions & Change Journal
+# =============================================================================
+
+def get_versions():
+    """(config_version, section_versions) from the skeleton"""
+    row = _conn().execute("SELECT value FROM meta WHERE key = 'skeleton'").fetchone()
+    if row is None:
+        return 0, {}
+    skeleton = json.loads(row[0])
+    return skeleton.get('config_version', 0), skeleton.get('section_versions') or {}
+
+
+def resolve_hashes(section_versions):
+    """section_versions with the hashes left dirty by row writes computed from the stored rows"""
+    dirty = [name for name, info in section_versions.items() if isinstance(info, dict) and info.get('hash') is None]
+    if not dirty:
+        return section_versions
+    conn = _conn()
+    row = conn.execute("SELECT value FROM meta WHERE key = 'skeleton'").fetchone()
+    if row is None:
+        return section_versions
+    skeleton = json.loads(row[0])
+    resolved = dict(section_versions)
+    for name in dirty:
+        resolved[name] = dict(section_versions[name], hash=section_hash(_section(conn, skeleton, name)))
+    return resolved
+
+
+def journal_since(version):
+    """Journal entries newer than version, oldest first"""
+    rows = _conn().execute("SELECT version, at, sections FROM journal WHERE version > ? ORDER BY version",
+                           (version,)).fetchall()
+    return [{'version': v, 'at': at, 'sections': json.loads(sections)} for v, at, sections in rows]
+
+
+def journal_oldest():
+    """Oldest version still in the journal (None if empty)"""
+    row = _conn().execute("SELECT MIN(version) FROM journal").fetchone()
+    return row[0] if row else None
@@ -0,0 +1,159 @@
+"""
+Config Diff - incremental apply for SIP Wrapper
+
+Compares the last applied routing_config.json with a fresh
+export_for_provision() and plans the minimal FreeSWITCH commands:
+- changed users      -> xml_flush_cache for each user (directory cache)
+- removed / disabled users -> reloadxml as well: FreeSWITCH keeps the static
+  directory XML it loaded and falls back to it when xml_curl has no user
+- changed gateways   -> killgw + external profile rescan
+- ACL / black-/whitelist -> reloadacl
+- routes             -> reloadxml (dialplan), nothing with XML_CURL_DIALPLAN=true:
+  route_matcher answers from the config, the static route files only catch
+  up on the next reloadxml
+- settings           -> full reload (reloadxml + rescan both profiles)
+- nothing changed    -> no commands
+"""
+
+import os
+
+# Routes are served over mod_xml_curl (route_matcher) - route changes need no reloadxml
+XML_CURL_DIALPLAN = os.environ.get('XML_CURL_DIALPLAN', 'false') == 'true'
+
+# Export keys per section (see config_store.export_for_provision)
+SETTINGS_KEYS = ('fs_domain', 'external_sip_ip', 'external_rtp_ip', 'codec_prefs',
+                 'outbound_codec_prefs', 'sip_user_agent', 'default_country_code')
+ROUTE_KEYS = ('inbound_routes', 'outbound_user_routes', 'outbound_routes',
+              'default_gateway', 'default_extension', 'outbound_caller_id')
+
+# More changed users than this -> one reloadxml instead of per-user flushes
+USER_FLUSH_LIMIT = 50
+
+FULL_RELOAD = [
+    ('reloadxml', 'reload XML configuration'),
+    ('sofia profile internal rescan', 'rescan internal profile'),
+    ('sofia profile external rescan', 'rescan external profile'),
+]
+
+
+def _diff_keyed(old_items, new_items, key):
+    """Compare two lists of dicts by key -> (added, removed, changed) name lists"""
+    old_map = {item.get(key): item for item in old_items or []}
+    new_map = {item.get(key): item for item in new_items or []}
+    added = [k for k in new_map if k not in old_map]
+    removed = [k for k in old_map if k not in new_map]
+    changed = [k for k in new_map if k in old_map and new_map[k] != old_map[k]]
+    return added, removed, changed
+
+
+def _ips(entries):
+    return sorted(e.get('ip', '') for e in entries or [])
+
+
+def diff_configs(old, new):
+    """Summarize what changed between two exported configs"""
+    old = old or {}
+    users = _diff_keyed(old.get('users'), new.get('users'), 'username')
+    gateways = _diff_keyed(old.get('gateways'), new.get('gateways'), 'name')
+    acl_users = _diff_keyed(old.get('acl_users'), new.get('acl_users'), 'username')
+
+    # Blacklist entries carry counters - only the IP set matters for the ACL
+    acl_changed = (any(acl_users)
+                   or _ips(old.get('blacklist')) != _ips(new.get('blacklist'))
+                   or _ips(old.get('whitelist')) != _ips(new.get('whitelist'))
+                   or old.get('whitelist_enabled') != new.get('whitelist_enabled'))
+
+    return {
+        'settings': [k for k in SETTINGS_KEYS if old.get(k) != new.get(k)],
+        'users': {'added': users[0], 'removed': users[1], 'changed': users[2]},
+        'gateways': {'added': gateways[0], 'removed': gateways[1], 'changed': gateways[2]},
+        'acl': acl_changed,
+        'routes': [k for k in ROUTE_KEYS if old.get(k) != new.get(k)],
+    }
+
+
+def build_plan(old, new):
+    """
+    Plan the FreeSWITCH commands needed to go from old to new.
+
+    Returns {'changes': diff, 'full_reload': bool, 'commands': [{'command', 'reason'}]}.
+    old=None (nothing applied yet) always plans a full reload.
+    """
+    if old is None:
+        return {
+            'changes': None,
+            'full_reload': True,
+            'commands': [{'command': c, 'reason': 'no previously applied config - ' + r}
+                         for c, r in FULL_RELOAD],
+        }
+
+    changes = diff_configs(old, new)
+    if changes['settings']:
+        reason = 'settings changed (' + ', '.join(changes['settings']) + ')'
+        return {
+            'changes': changes,
+            'full_reload': True,
+            'commands': [{'command': c, 'reason': reason} for c, _ in FULL_RELOAD],
+        }
+
+    commands = []
+    users = changes['users']
+    gateways = changes['gateways']
+    flush_users = users['added'] + users['removed'] + users['changed']
+    domain = new.get('fs_domain', '')
+
+    # Everything that is read from XML files needs the XML reloaded first
+    routes = [] if XML_CURL_DIALPLAN else changes['routes']
+    needs_reloadxml = (routes or changes['acl'] or any(gateways.values()) or users['removed']
+                       or (flush_users and (not domain or len(flush_users) > USER_FLUSH_LIMIT)))
+    if needs_reloadxml:
+        reasons = []
+        if routes:
+            reasons.append('routes changed (' + ', '.join(routes) + ')')
+        if any(gateways.values()):
+            reasons.append('gateways changed')
+        if changes['acl']:
+            reasons.append('ACL changed')
+        if users['removed']:
+            reasons.append('users removed (' + ', '.join(users['removed']) + ')')
+        if flush_users and (not domain or len(flush_users) > USER_FLUSH_LIMIT):
+            reasons.append(f'{len(flush_users)} users changed')
+        commands.append({'command': 'reloadxml', 'reason': ', '.join(reasons)})
+
+    for name in gateways['removed'] + gateways['changed']:
+        commands.append({'command': f'sofia profile external killgw {name}',
+                         'reason': f'gateway {name} ' + ('removed' if name in gateways['removed'] else 'changed')})
+    if gateways['added'] or gateways['changed']:
+        commands.append({'command': 'sofia profile external rescan',
+                         'reason': 'load new/changed gateways'})
+
+    if changes['acl']:
+        commands.append({'command': 'reloadacl', 'reason': 'ACL users / blacklist / whitelist changed'})
+
+    if flush_users and domain and len(flush_users) <= USER_FLUSH_LIMIT:
+        for username in flush_users:
+            commands.append({'command': f'xml_flush_cache id {username} {domain}',
+                             'reason': f'user {username} ' + ('removed' if username in users['removed'] else 'changed')})
+
+    return {'changes': changes, 'full_reload': False, 'commands': commands}
+
+
+def _phase(command):
+    """Run order: XML first, then gateways, profiles, ACL, cache flushes"""
+    if command == 'reloadxml':
+        return 0
+    if ' killgw ' in command:
+        return 1
+    if command.endswith(' rescan'):
+        return 2
+    if command.startswith('xml_flush_cache'):
+        return 4
+    return 3
+
+
+def merge_commands(plan, commands, reason):
+    """Add commands (e.g. provisioning.reload_commands) missing from the plan, keep the run order"""
+    planned = {step['command'] for step in plan['commands']}
+    steps = plan['commands'] + [{'command': c, 'reason': reason} for c in commands if c not in planned]
+    plan['commands'] = sorted(steps, key=lambda step: _phase(step['command']))
+    return plan
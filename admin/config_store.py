@@ -6,16 +6,29 @@ Single JSON file for all configuration:
 - ACL Users (IP-based users without password)
 - Gateways (SIP providers/trunks)
 - Routes (inbound/outbound routing rules)
+
+Set CONFIG_BACKEND=sqlite to store the same document in SQLite instead
+(config_db.py); the JSON file is then written as a mirror on apply.
 """
 
+import hashlib
 import json
 import os
+import sqlite3
 from pathlib import Path
 from datetime import datetime
 
+import config_db
+
 # Config file path - can be overridden via environment
 CONFIG_FILE = os.environ.get('CONFIG_FILE', '/var/lib/freeswitch/wrapper_config.json')
 
+# Compact user table for auth_user.lua, written next to the config file
+USERS_INDEX_NAME = 'users_index.json'
+
+# Storage backend: 'json' (single file, default) or 'sqlite' (see config_db.py)
+CONFIG_BACKEND = os.environ.get('CONFIG_BACKEND', 'json').lower()
+
 # Default config structure
 DEFAULT_CONFIG = {
     "version": 1,
@@ -73,6 +86,11 @@ DEFAULT_CONFIG = {
 }
 
 
+def _use_db():
+    """True if the SQLite backend is selected"""
+    return CONFIG_BACKEND == 'sqlite'
+
+
 def get_config_path():
     """Get config file path, create directory if needed"""
     path = Path(CONFIG_FILE)
@@ -83,35 +101,85 @@ def get_config_path():
     return path
 
 
-def load_config():
-    """Load config from JSON file. Merges missing keys from defaults."""
+def _merge_defaults(config):
+    """Merge missing keys from defaults into a loaded config"""
+    # Merge with defaults for any missing top-level keys
+    for key in DEFAULT_CONFIG:
+        if key not in config:
+            config[key] = DEFAULT_CONFIG[key]
+    # Merge nested settings defaults (for new settings like esl_*)
+    if 'settings' in config:
+        for key in DEFAULT_CONFIG.get('settings', {}):
+            if key not in config['settings']:
+                config['settings'][key] = DEFAULT_CONFIG['settings'][key]
+    # Merge nested license defaults (for new trial fields)
+    if 'license' in config:
+        for key in DEFAULT_CONFIG.get('license', {}):
+            if key not in config['license']:
+                config['license'][key] = DEFAULT_CONFIG['license'][key]
+    return config
+
+
+def _load_json_file():
+    """Load raw config from the JSON file, None if missing or broken"""
     path = get_config_path()
     if path.exists():
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-                # Merge with defaults for any missing top-level keys
-                for key in DEFAULT_CONFIG:
-                    if key not in config:
-                        config[key] = DEFAULT_CONFIG[key]
-                # Merge nested settings defaults (for new settings like esl_*)
-                if 'settings' in config:
-                    for key in DEFAULT_CONFIG.get('settings', {}):
-                        if key not in config['settings']:
-                            config['settings'][key] = DEFAULT_CONFIG['settings'][key]
-                # Merge nested license defaults (for new trial fields)
-                if 'license' in config:
-                    for key in DEFAULT_CONFIG.get('license', {}):
-                        if key not in config['license']:
-                            config['license'][key] = DEFAULT_CONFIG['license'][key]
-                return config
+                return json.load(f)
         except (json.JSONDecodeError, IOError) as e:
             print(f"Error loading config: {e}")
+    return None
+
+
+def load_config():
+    """Load config from JSON file (or SQLite). Merges missing keys from defaults."""
+    if _use_db():
+        try:
+            config = config_db.load()
+        except sqlite3.Error as e:
+            print(f"Error loading config: {e}")
+            config = None
+    else:
+        # Stamp taken before reading: a concurrent write makes it stale, never wrong
+        stamp = _config_stamp()
+        config = _load_json_file()
+        if config is not None:
+            if stamp != _version_cache[0]:
+                # File changed since last seen (also edits outside the admin app)
+                write_users_index(config)
+            _remember_versions(stamp, config)
+    if config is not None:
+        return _merge_defaults(config)
     return DEFAULT_CONFIG.copy()
 
 
+def load_raw_config():
+    """Load config exactly as stored (no defaults merged), None if there is none"""
+    if _use_db():
+        try:
+            return config_db.load()
+        except sqlite3.Error as e:
+            print(f"Error loading config: {e}")
+            return None
+    return _load_json_file()
+
+
 def init_config():
     """Initialize config on first run. Creates config from ENV if no config exists."""
+    if _use_db():
+        if not config_db.is_empty():
+            return False
+        # Transparent migration: existing JSON config is copied into the database
+        config = _load_json_file()
+        if config is not None:
+            print(f"[Config] Migrating {get_config_path()} to SQLite ({config_db.get_db_path()})...")
+            save_config(_merge_defaults(config))
+            return False
+        print("[Config] First run - creating config from environment variables...")
+        import_from_env()
+        return True
+
     path = get_config_path()
     if not path.exists():
         print("[Config] First run - creating config from environment variables...")
@@ -121,18 +189,294 @@ def init_config():
 
 
 def save_config(config):
-    """Save config to JSON file"""
-    path = get_config_path()
+    """Save config to JSON file (or SQLite, writing only changed rows)"""
     config['updated_at'] = datetime.now().isoformat()
+    if _use_db():
+        # Row writes leave the section hash dirty - compare against the stored rows
+        config['section_versions'] = config_db.resolve_hashes(config.get('section_versions') or {})
+    changed = _stamp_versions(config)
+    entry = None
+    if changed:
+        entry = {'version': config['config_version'], 'at': config['updated_at'], 'sections': changed}
+
+    if _use_db():
+        try:
+            config_db.save(config, journal=entry)
+            _invalidate_indexes()
+        except sqlite3.Error as e:
+            print(f"Error saving config: {e}")
+            return False
+        write_users_index(config)
+        return True
+
+    path = get_config_path()
     try:
         # Create parent directory if needed
         path.parent.mkdir(parents=True, exist_ok=True)
         with open(path, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
-        return True
+        _invalidate_indexes()
+        _remember_versions(_config_stamp(), config)
+        if entry:
+            _append_journal(entry)
     except IOError as e:
         print(f"Error saving config: {e}")
         return False
+    write_users_index(config)
+    return True
+
+
+def write_json_mirror():
+    """Write the SQLite config to the JSON file read by provision.sh and auth_user.lua"""
+    if not _use_db():
+        return True
+    path = get_config_path()
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(load_config(), f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        return True
+    except IOError as e:
+        print(f"Error writing config mirror: {e}")
+        return False
+
+
+def get_users_index_path():
+    return get_config_path().with_name(USERS_INDEX_NAME)
+
+
+def write_users_index(config):
+    """
+    Write users_index.json for auth_user.lua: enabled users only,
+    {username: {"password", "extension"}}, so the Lua side parses a few
+    bytes per user instead of the whole config.
+
+    The file starts with {"version":"<content hash>", ...}: the Lua cache
+    compares that instead of mtime + size (1 s resolution, two writes in
+    the same second with the same size would look unchanged). The file is
+    only rewritten when that hash differs from the one on disk, so callers
+    run it on every save and whenever the config file changed on disk.
+    """
+    users = {}
+    for user in config.get('users', []):
+        username = user.get('username')
+        if username and user.get('password') and user.get('enabled', True) is not False:
+            # First entry wins, same as the directory endpoint
+            users.setdefault(username, {
+                'password': user['password'],
+                'extension': user.get('extension') or username,
+            })
+    path = get_users_index_path()
+    tmp_path = path.with_name(path.name + '.tmp')
+    payload = json.dumps(users, ensure_ascii=False, separators=(',', ':'))
+    version = hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read(64).startswith('{"version":"' + version + '"'):
+                return True
+    except (IOError, UnicodeDecodeError):
+        pass
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('{"version":"' + version + '","users":' + payload + '}')
+        os.replace(tmp_path, path)
+        return True
+    except IOError as e:
+        print(f"Error writing users index: {e}")
+        return False
+
+
+# =============================================================================
+# Versions & Change Journal
+# =============================================================================
+
+# Sections with their own version (used for ETags on the CRUD GETs)
+VERSIONED_SECTIONS = ('license', 'settings', 'users', 'acl_users', 'gateways', 'routes', 'security')
+
+# JSON backend: journal is compacted to the last entries once it grows past this
+JOURNAL_MAX_BYTES = 1024 * 1024
+
+# (file stamp, config_version, section_versions) - JSON backend only
+_version_cache = (None, 0, {})
+
+
+_section_hash = config_db.section_hash
+
+
+def _stamp_versions(config):
+    """Bump config_version and the version of every section that changed. Returns changed sections."""
+    previous = config.get('section_versions') or {}
+    version = config.get('config_version', 0) + 1
+    sections = {}
+    changed = []
+    for name in VERSIONED_SECTIONS:
+        section_hash = _section_hash(config.get(name))
+        old = previous.get(name) or {}
+        if old.get('hash') == section_hash:
+            sections[name] = old
+        else:
+            sections[name] = {'version': version, 'hash': section_hash}
+            changed.append(name)
+    config['section_versions'] = sections
+    if changed:
+        config['config_version'] = version
+    else:
+        config.setdefault('config_version', version - 1)
+    return changed
+
+
+def _remember_versions(stamp, config):
+    global _version_cache
+    _version_cache = (stamp, config.get('config_version', 0), config.get('section_versions') or {})
+
+
+def get_versions():
+    """Get (config_version, {section: {'version', 'hash'}}) without loading the config if unchanged"""
+    if _use_db():
+        return config_db.get_versions()
+    stamp = _config_stamp()
+    if stamp is None or stamp != _version_cache[0]:
+        load_config()
+    return _version_cache[1], _version_cache[2]
+
+
+def get_journal_path():
+    """Change journal (NDJSON) next to the config file"""
+    return get_config_path().with_suffix('.journal')
+
+
+def _append_journal(entry):
+    """Append a journal entry (JSON backend), compacting when the file gets large"""
+    path = get_journal_path()
+    try:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        if path.stat().st_size > JOURNAL_MAX_BYTES:
+            entries = _read_journal()[-config_db.JOURNAL_KEEP:]
+            tmp_path = path.with_name(path.name + '.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(e, ensure_ascii=False) + '\n' for e in entries)
+            os.replace(tmp_path, path)
+    except IOError as e:
+        print(f"Error writing change journal: {e}")
+
+
+def _read_journal():
+    entries = []
+    try:
+        with open(get_journal_path(), 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    continue
+    except IOError:
+        pass
+    return entries
+
+
+def get_changes(since):
+    """
+    Get journal entries newer than version 'since'.
+
+    'reset' is True if the journal no longer reaches back that far (or
+    'since' is from another config) - the client must then reload everything.
+    """
+    version, _ = get_versions()
+    if _use_db():
+        entries = config_db.journal_since(since)
+        oldest = config_db.journal_oldest()
+    else:
+        journal = _read_journal()
+        entries = [e for e in journal if e.get('version', 0) > since]
+        oldest = journal[0].get('version') if journal else None
+
+    reset = since > version or (since < version and (oldest is None or oldest > since + 1))
+    sections = sorted({s for e in entries for s in e.get('sections', [])})
+    return {
+        'version': version,
+        'since': since,
+        'reset': reset,
+        'changes': entries,
+        'sections': sections
+    }
+
+
+# =============================================================================
+# Lookup Indexes (derived from config, rebuilt only when the file changes)
+# =============================================================================
+
+# (file stamp, indexes) - replaced as a whole so readers never see a mix
+_index_cache = (None, None)
+
+
+def _config_stamp():
+    """Identify the current config file version (mtime, size, inode)"""
+    if _use_db():
+        return ('sqlite', config_db.get_revision())
+    try:
+        st = os.stat(get_config_path())
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def build_indexes(config):
+    """Build hash indexes for O(1) lookups from a config dict"""
+    indexes = {
+        'users_by_name': {},
+        'users_by_extension': {},
+        'acl_users_by_name': {},
+        'acl_users_by_ip': {},
+        'gateways_by_name': {},
+    }
+
+    # setdefault: first entry wins, same as the old linear scans
+    for user in config.get('users', []):
+        indexes['users_by_name'].setdefault(user.get('username'), user)
+        if user.get('extension'):
+            indexes['users_by_extension'].setdefault(str(user['extension']), user)
+
+    for acl in config.get('acl_users', []):
+        indexes['acl_users_by_name'].setdefault(acl.get('username'), acl)
+        # ACL users carry either 'ip_address' (CRUD) or 'ips' (ENV import)
+        ips = list(acl.get('ips') or [])
+        if acl.get('ip_address'):
+            ips.append(acl['ip_address'])
+        for ip in ips:
+            indexes['acl_users_by_ip'].setdefault(ip, acl)
+
+    for gw in config.get('gateways', []):
+        indexes['gateways_by_name'].setdefault(gw.get('name'), gw)
+
+    return indexes
+
+
+def get_indexes(config=None):
+    """Get lookup indexes, rebuilding them only if the config file changed.
+
+    Indexes are shared - treat the returned entries as read-only.
+    If the caller already loaded the config, pass it to avoid a second read.
+    """
+    global _index_cache
+    stamp = _config_stamp()
+    cached_stamp, cached = _index_cache
+    if stamp is not None and stamp == cached_stamp:
+        return cached
+    if config is not None:
+        # Caller's copy may be older than the stamp - don't cache it
+        return build_indexes(config)
+    indexes = build_indexes(load_config())
+    _index_cache = (stamp, indexes)
+    return indexes
+
+
+def _invalidate_indexes():
+    """Drop cached indexes (called after every save)"""
+    global _index_cache
+    _index_cache = (None, None)
 
 
 # =============================================================================
@@ -147,20 +491,22 @@ def get_users():
 
 def get_user(username):
     """Get user by username"""
-    users = get_users()
-    for user in users:
-        if user.get('username') == username:
-            return user
-    return None
+    user = get_indexes()['users_by_name'].get(username)
+    return dict(user) if user else None
+
+
+def get_user_by_extension(extension):
+    """Get user by extension"""
+    user = get_indexes()['users_by_extension'].get(str(extension))
+    return dict(user) if user else None
 
 
 def add_user(username, password, extension, enabled=True):
     """Add new user"""
     config = load_config()
     # Check if exists
-    for user in config['users']:
-        if user.get('username') == username:
-            return False, "User already exists"
+    if username in get_indexes(config)['users_by_name']:
+        return False, "User already exists"
 
     config['users'].append({
         'username': username,
@@ -204,12 +550,17 @@ def get_acl_users():
     return config.get('acl_users', [])
 
 
+def get_acl_user_by_ip(ip_address):
+    """Get ACL user by source IP"""
+    user = get_indexes()['acl_users_by_ip'].get(ip_address)
+    return dict(user) if user else None
+
+
 def add_acl_user(username, ip_address, extension, caller_id=""):
     """Add new ACL user"""
     config = load_config()
-    for user in config['acl_users']:
-        if user.get('username') == username:
-            return False, "ACL user already exists"
+    if username in get_indexes(config)['acl_users_by_name']:
+        return False, "ACL user already exists"
 
     config['acl_users'].append({
         'username': username,
@@ -256,20 +607,16 @@ def get_gateways():
 
 def get_gateway(name):
     """Get gateway by name"""
-    gateways = get_gateways()
-    for gw in gateways:
-        if gw.get('name') == name:
-            return gw
-    return None
+    gw = get_indexes()['gateways_by_name'].get(name)
+    return dict(gw) if gw else None
 
 
 def add_gateway(name, host, port=5060, username="", password="",
                 register=True, transport="udp", auth_username=""):
     """Add new gateway"""
     config = load_config()
-    for gw in config['gateways']:
-        if gw.get('name') == name:
-            return False, "Gateway already exists"
+    if name in get_indexes(config)['gateways_by_name']:
+        return False, "Gateway already exists"
 
     config['gateways'].append({
         'name': name,
@@ -527,6 +874,167 @@ def set_outbound_caller_id(caller_id):
     return True, "Outbound caller ID updated"
 
 
+# =============================================================================
+# Bulk Import (validate all rows, then a single write)
+# =============================================================================
+
+def _to_bool(value, default=True):
+    """Parse booleans from JSON or CSV ('true', '1', 'yes', ...)"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _text(row, key, default=''):
+    value = row.get(key)
+    return default if value is None else str(value).strip()
+
+
+def _build_user(row):
+    entry = {
+        'username': _text(row, 'username'),
+        'password': _text(row, 'password'),
+        'extension': _text(row, 'extension'),
+        'enabled': _to_bool(row.get('enabled'))
+    }
+    if not entry['username'] or not entry['password'] or not entry['extension']:
+        return None, "username, password and extension are required"
+    return entry, None
+
+
+def _build_acl_user(row):
+    entry = {
+        'username': _text(row, 'username'),
+        'ip_address': _text(row, 'ip_address'),
+        'extension': _text(row, 'extension'),
+        'caller_id': _text(row, 'caller_id'),
+        'enabled': _to_bool(row.get('enabled'))
+    }
+    if not entry['username'] or not entry['ip_address'] or not entry['extension']:
+        return None, "username, ip_address and extension are required"
+    return entry, None
+
+
+def _build_gateway(row):
+    port = _text(row, 'port') or '5060'
+    if not port.isdigit():
+        return None, f"invalid port '{port}'"
+    transport = (_text(row, 'transport') or 'udp').lower()
+    if transport not in ('udp', 'tcp', 'tls'):
+        return None, f"invalid transport '{transport}'"
+    entry = {
+        'name': _text(row, 'name'),
+        'host': _text(row, 'host'),
+        'port': int(port),
+        'username': _text(row, 'username'),
+        'password': _text(row, 'password'),
+        'register': _to_bool(row.get('register')),
+        'transport': transport,
+        'auth_username': _text(row, 'auth_username'),
+        'enabled': _to_bool(row.get('enabled'))
+    }
+    if not entry['name'] or not entry['host']:
+        return None, "name and host are required"
+    return entry, None
+
+
+def _build_inbound_route(row):
+    entry = {
+        'gateway': _text(row, 'gateway'),
+        'extension': _text(row, 'extension')
+    }
+    if not entry['gateway'] or not entry['extension']:
+        return None, "gateway and extension are required"
+    return entry, None
+
+
+def _build_blacklist_entry(row):
+    import ipaddress
+
+    ip = _text(row, 'ip')
+    try:
+        ipaddress.ip_network(ip, strict=False)
+    except ValueError:
+        return None, f"invalid IP address '{ip}'"
+    now = datetime.now().isoformat()
+    return {
+        'ip': ip,
+        'comment': _text(row, 'comment'),
+        'added_at': now,
+        'blocked_count': 1,
+        'last_blocked': now,
+        'fail2ban_banned': False
+    }, None
+
+
+# kind -> (entry builder, key field, duplicate message, existing keys, target list)
+BULK_KINDS = {
+    'users': (_build_user, 'username', "User already exists",
+              lambda c: get_indexes(c)['users_by_name'],
+              lambda c: c['users']),
+    'acl_users': (_build_acl_user, 'username', "ACL user already exists",
+                  lambda c: get_indexes(c)['acl_users_by_name'],
+                  lambda c: c['acl_users']),
+    'gateways': (_build_gateway, 'name', "Gateway already exists",
+                 lambda c: get_indexes(c)['gateways_by_name'],
+                 lambda c: c['gateways']),
+    'inbound_routes': (_build_inbound_route, 'gateway', "Route for this gateway already exists",
+                       lambda c: {r.get('gateway') for r in c['routes'].setdefault('inbound', [])},
+                       lambda c: c['routes']['inbound']),
+    'blacklist': (_build_blacklist_entry, 'ip', "IP already in blacklist",
+                  lambda c: {e.get('ip') for e in c['security'].setdefault('blacklist', [])},
+                  lambda c: c['security']['blacklist']),
+}
+
+
+def bulk_add(kind, rows, atomic=False):
+    """Validate and add many entries with a single save.
+
+    rows is an iterable of dicts, or of (row_number, dict | error string)
+    for rows the caller already failed to parse. Returns (added, errors)
+    where errors is a list of {'row': n, 'error': msg}. With atomic=True
+    nothing is written if any row fails.
+    """
+    build, key_field, duplicate_msg, existing_keys, target = BULK_KINDS[kind]
+    config = load_config()
+    if 'security' not in config:
+        config['security'] = DEFAULT_CONFIG['security'].copy()
+    existing = existing_keys(config)
+
+    entries = []
+    errors = []
+    seen = set()
+    for number, row in enumerate(rows, 1):
+        if isinstance(row, tuple):
+            number, row = row
+        if isinstance(row, str):
+            errors.append({'row': number, 'error': row})
+            continue
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'error': "expected an object"})
+            continue
+        entry, error = build(row)
+        if error:
+            errors.append({'row': number, 'error': error})
+            continue
+        key = entry[key_field]
+        if key in existing or key in seen:
+            errors.append({'row': number, 'error': f"{duplicate_msg}: {key}"})
+            continue
+        seen.add(key)
+        entries.append(entry)
+
+    if not entries or (atomic and errors):
+        return 0, errors
+
+    target(config).extend(entries)
+    if not save_config(config):
+        return 0, errors + [{'row': None, 'error': "Failed to save config"}]
+    return len(entries), errors
+
+
 # =============================================================================
 # Import from ENV (one-time migration)
 # =============================================================================
@@ -768,6 +1276,9 @@ def update_security(security_data):
 
 def add_to_blacklist(ip, comment=""):
     """Add IP to blacklist or increment blocked_count if exists"""
+    if _use_db():
+        return _add_to_blacklist_db(ip, comment)
+
     config = load_config()
     if 'security' not in config:
         config['security'] = DEFAULT_CONFIG['security'].copy()
@@ -796,8 +1307,36 @@ def add_to_blacklist(ip, comment=""):
     return True, "IP added to blacklist"
 
 
+def _add_to_blacklist_db(ip, comment=""):
+    """add_to_blacklist for SQLite - touches only the blacklist row"""
+    now = datetime.now().isoformat()
+    entry = config_db.update_entry(
+        'security.blacklist', ip,
+        lambda e: {'blocked_count': e.get('blocked_count', 1) + 1, 'last_blocked': now},
+        updated_at=now)
+    if entry:
+        # Check if we should trigger fail2ban
+        check_fail2ban_threshold(ip, entry['blocked_count'])
+        return True, f"IP blocked again (count: {entry['blocked_count']})"
+
+    config_db.append_entry('security.blacklist', {
+        'ip': ip,
+        'comment': comment,
+        'added_at': now,
+        'blocked_count': 1,
+        'last_blocked': now,
+        'fail2ban_banned': False
+    }, updated_at=now)
+    return True, "IP added to blacklist"
+
+
 def remove_from_blacklist(ip):
     """Remove IP from blacklist"""
+    if _use_db():
+        if config_db.delete_entries('security.blacklist', ip, updated_at=datetime.now().isoformat()):
+            return True, "IP removed from blacklist"
+        return False, "IP not found"
+
     config = load_config()
     if 'security' not in config:
         return False, "IP not found"
@@ -815,6 +1354,17 @@ def remove_from_blacklist(ip):
 
 def add_to_whitelist(ip, comment=""):
     """Add IP to whitelist"""
+    if _use_db():
+        if config_db.find_entry('security.whitelist', ip):
+            return False, "IP already in whitelist"
+        now = datetime.now().isoformat()
+        config_db.append_entry('security.whitelist', {
+            'ip': ip,
+            'comment': comment,
+            'added_at': now
+        }, updated_at=now)
+        return True, "IP added to whitelist"
+
     config = load_config()
     if 'security' not in config:
         config['security'] = DEFAULT_CONFIG['security'].copy()
@@ -835,6 +1385,11 @@ def add_to_whitelist(ip, comment=""):
 
 def remove_from_whitelist(ip):
     """Remove IP from whitelist"""
+    if _use_db():
+        if config_db.delete_entries('security.whitelist', ip, updated_at=datetime.now().isoformat()):
+            return True, "IP removed from whitelist"
+        return False, "IP not found"
+
     config = load_config()
     if 'security' not in config:
         return False, "IP not found"
@@ -885,7 +1440,8 @@ def update_auto_blacklist_settings(settings):
 
 def get_fail2ban_settings():
     """Get Fail2Ban integration settings"""
-    config = load_config()
+    # SQLite: settings live in the skeleton, no need to read the lists
+    config = (config_db.load(with_lists=False) or {}) if _use_db() else load_config()
     security = config.get('security', {})
     return security.get('fail2ban', DEFAULT_CONFIG['security']['fail2ban'])
 
@@ -935,6 +1491,14 @@ def trigger_fail2ban(ip):
 
         if result.returncode == 0:
             # Mark as banned in our blacklist
+            if _use_db():
+                now = datetime.now().isoformat()
+                config_db.update_entry('security.blacklist', ip, {
+                    'fail2ban_banned': True,
+                    'fail2ban_banned_at': now
+                }, updated_at=now)
+                print(f"Fail2Ban: Banned IP {ip} in jail {jail_name}")
+                return True
             config = load_config()
             for entry in config.get('security', {}).get('blacklist', []):
                 if entry.get('ip') == ip:
@@ -977,6 +1541,11 @@ def unban_from_fail2ban(ip):
 
         if result.returncode == 0:
             # Update our blacklist
+            if _use_db():
+                config_db.update_entry('security.blacklist', ip, {'fail2ban_banned': False},
+                                       updated_at=datetime.now().isoformat())
+                print(f"Fail2Ban: Unbanned IP {ip}")
+                return True
             config = load_config()
             for entry in config.get('security', {}).get('blacklist', []):
                 if entry.get('ip') == ip:
@@ -1055,6 +1624,12 @@ def get_fail2ban_status():
 
 def reset_blocked_count(ip):
     """Reset blocked_count for an IP in blacklist"""
+    if _use_db():
+        if config_db.update_entry('security.blacklist', ip, {'blocked_count': 0},
+                                  updated_at=datetime.now().isoformat()):
+            return True, "Blocked count reset"
+        return False, "IP not found"
+
     config = load_config()
     for entry in config.get('security', {}).get('blacklist', []):
         if entry.get('ip') == ip:
@@ -0,0 +1,235 @@
+"""
+Directory Cache - pre-rendered XML CURL directory responses
+
+/api/freeswitch/directory is hit on every REGISTER / auth challenge. Instead
+of building the XML per request, every enabled user's document is rendered
+once per config version and kept as bytes, keyed by (domain, user):
+- the configured fs_domain is rendered for all users up front
+- other domains are rendered on first use (bounded, see EXTRA_DOMAIN_DOCS)
+- unknown / disabled users get the constant NOT_FOUND document
+
+The cache follows config_store.get_indexes(): a new index object (config
+file changed or saved) triggers a rebuild, otherwise lookups are dict hits.
+
+check() adds a guard against SIP scanners (random usernames):
+- token buckets per source IP and per (username, source IP); over the limit
+  the request gets NOT_FOUND without a lookup. The username bucket is keyed
+  by source too, so a scanner hammering a known username only limits itself
+  and the real phone still gets its document
+- an LRU of unknown usernames, so repeated misses are recognized (and not
+  logged again) until the config changes
+- counters for all outcomes (stats())
+A Bloom filter is not needed: the known users are already an in-memory dict.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from xml.sax.saxutils import escape
+
+import config_store
+
+NOT_FOUND = b'''<?xml version="1.0" encoding="UTF-8"?>
+<document type="freeswitch/xml">
+  <section name="result">
+    <result status="not found"/>
+  </section>
+</document>'''
+
+_HEAD = '''<?xml version="1.0" encoding="UTF-8"?>
+<document type="freeswitch/xml">
+  <section name="directory">
+    <domain name="%(domain)s">
+      <params>
+        <param name="dial-string" value="{^^:sip_invite_domain=${domain}:presence_id=${dialed_user}@${domain}}{${sofia_contact(${dialed_user}@${domain})}}"/>
+      </params>
+'''
+
+_USER = '''      <user id="%(user)s">
+        <params>
+          <param name="password" value="%(password)s"/>
+          <param name="vm-password" value="%(password)s"/>
+        </params>
+        <variables>
+          <variable name="toll_allow" value="domestic,international,local"/>
+          <variable name="accountcode" value="%(user)s"/>
+          <variable name="user_context" value="default"/>
+          <variable name="effective_caller_id_name" value="%(user)s"/>
+          <variable name="effective_caller_id_number" value="%(extension)s"/>
+          <variable name="outbound_caller_id_name" value="%(user)s"/>
+          <variable name="outbound_caller_id_number" value="%(extension)s"/>
+        </variables>
+      </user>
+    </domain>
+  </section>
+</document>'''
+
+# Documents for domains other than fs_domain are cached up to this many
+EXTRA_DOMAIN_DOCS = 10000
+
+# (indexes the cache was built from, {user: body bytes}, {(domain, user): document bytes})
+_cache = (None, {}, {})
+
+# Token buckets: sustained requests/second and burst, per source IP and per
+# (username, source IP) (0 disables the limit). One NAT address can front many phones - keep the IP limit high.
+RATE_PER_IP = float(os.environ.get('DIRECTORY_RATE_IP', '50'))
+BURST_PER_IP = float(os.environ.get('DIRECTORY_BURST_IP', '200'))
+RATE_PER_USER = float(os.environ.get('DIRECTORY_RATE_USER', '5'))
+BURST_PER_USER = float(os.environ.get('DIRECTORY_BURST_USER', '20'))
+MAX_BUCKETS = 50000
+NEGATIVE_CACHE_SIZE = 10000
+
+_guard_lock = threading.Lock()
+_buckets = {'ip': OrderedDict(), 'user': OrderedDict()}  # ip or (user, ip) -> [tokens, last refill]
+_negative = OrderedDict()  # unknown username -> None, oldest first
+_counters = {
+    'lookups': 0,
+    'found': 0,
+    'not_found': 0,
+    'negative_hits': 0,
+    'rate_limited_ip': 0,
+    'rate_limited_user': 0,
+}
+
+
+def _attr(value):
+    """Escape a value for an XML attribute"""
+    return escape(str(value), {'"': '&quot;'})
+
+
+def _head(domain):
+    return (_HEAD % {'domain': _attr(domain)}).encode('utf-8')
+
+
+def _build(indexes):
+    """Render the user part of every enabled user, plus full docs for fs_domain"""
+    bodies = {}
+    for name, user in indexes['users_by_name'].items():
+        if not name or not user.get('enabled', True):
+            continue
+        bodies[name] = (_USER % {
+            'user': _attr(name),
+            'password': _attr(user.get('password', '')),
+            'extension': _attr(user.get('extension', name)),
+        }).encode('utf-8')
+
+    domain = config_store.get_settings().get('fs_domain', '')
+    head = _head(domain)
+    docs = {(domain, name): head + body for name, body in bodies.items()}
+    return bodies, docs
+
+
+def _current():
+    global _cache
+    indexes = config_store.get_indexes()
+    cached_indexes, bodies, docs = _cache
+    if indexes is not cached_indexes:
+        bodies, docs = _build(indexes)
+        _cache = (indexes, bodies, docs)
+        # Users may have been added - forget cached misses
+        with _guard_lock:
+            _negative.clear()
+    return bodies, docs
+
+
+def lookup(domain, user):
+    """Directory document for (domain, user) as bytes, None if not found"""
+    bodies, docs = _current()
+    return _lookup(bodies, docs, domain, user)
+
+
+def _lookup(bodies, docs, domain, user):
+    doc = docs.get((domain, user))
+    if doc is not None:
+        return doc
+    body = bodies.get(user)
+    if body is None:
+        return None
+    doc = _head(domain) + body
+    if len(docs) < len(bodies) + EXTRA_DOMAIN_DOCS:
+        docs[(domain, user)] = doc
+    return doc
+
+
+def invalidate():
+    """Drop all rendered documents (next lookup rebuilds)"""
+    global _cache
+    _cache = (None, {}, {})
+
+
+# =============================================================================
+# Lookup Guard (rate limits + negative cache)
+# =============================================================================
+
+def _take(kind, key, rate, burst, now):
+    """Take one token from the bucket of key, False if it is empty"""
+    buckets = _buckets[kind]
+    bucket = buckets.get(key)
+    if bucket is None:
+        bucket = buckets[key] = [burst, now]
+        if len(buckets) > MAX_BUCKETS:
+            buckets.popitem(last=False)
+    else:
+        bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+        bucket[1] = now
+        buckets.move_to_end(key)
+    if bucket[0] < 1:
+        return False
+    bucket[0] -= 1
+    return True
+
+
+def check(domain, user, source_ip=''):
+    """
+    Rate-limited lookup for the XML CURL endpoint.
+
+    Returns (document bytes, outcome) - outcome is 'found', 'not_found'
+    (first miss for this username), 'negative' (known unknown username) or
+    'rate_limited'. Every outcome but 'found' returns NOT_FOUND.
+    """
+    with _guard_lock:
+        _counters['lookups'] += 1
+        now = time.monotonic()
+        if source_ip and RATE_PER_IP > 0 and not _take('ip', source_ip, RATE_PER_IP, BURST_PER_IP, now):
+            _counters['rate_limited_ip'] += 1
+            return NOT_FOUND, 'rate_limited'
+        if user and RATE_PER_USER > 0 and not _take('user', (user, source_ip), RATE_PER_USER, BURST_PER_USER, now):
+            _counters['rate_limited_user'] += 1
+            return NOT_FOUND, 'rate_limited'
+
+    bodies, docs = _current()
+    with _guard_lock:
+        if user in _negative:
+            _negative.move_to_end(user)
+            _counters['negative_hits'] += 1
+            return NOT_FOUND, 'negative'
+
+    doc = _lookup(bodies, docs, domain, user)
+    with _guard_lock:
+        if doc is not None:
+            _counters['found'] += 1
+            return doc, 'found'
+        _counters['not_found'] += 1
+        _negative[user] = None
+        if len(_negative) > NEGATIVE_CACHE_SIZE:
+            _negative.popitem(last=False)
+    return NOT_FOUND, 'not_found'
+
+
+def stats():
+    """Counters and cache sizes of the directory endpoint"""
+    with _guard_lock:
+        result = dict(_counters)
+        result.update({
+            'negative_cache_size': len(_negative),
+            'ip_buckets': len(_buckets['ip']),
+            'user_buckets': len(_buckets['user']),
+            'cached_users': len(_cache[1]),
+            'cached_documents': len(_cache[2]),
+            'limits': {
+                'per_ip': {'rate': RATE_PER_IP, 'burst': BURST_PER_IP},
+                'per_user': {'rate': RATE_PER_USER, 'burst': BURST_PER_USER},
+            },
+        })
+    return result
@@ -0,0 +1,257 @@
+"""
+ESL Client - asyncio event socket client for FreeSWITCH (ESL_BACKEND=asyncio)
+
+Alternative to greenswitch (gevent) for the subscriber and fs_cli:
+- auth, api, bgapi, event plain|json, filter, exit
+- frames are cut from one bytearray receive buffer: the header block is
+  located with find() and decoded once (no per-line reads or string
+  concatenation), the body is decoded straight from a memoryview of the
+  buffer, consumed bytes are dropped once per read
+- event-plain header blocks are url-decoded with one unquote() per block
+  (value by value only when a value contains an encoded line break)
+
+ESLConnection is the asyncio API; api() is a blocking helper for the
+request threads (one connection per call, like the greenswitch path).
+"""
+
+import asyncio
+import json
+from urllib.parse import unquote
+
+READ_SIZE = 65536
+
+
+class ESLError(Exception):
+    pass
+
+
+class Event:
+    """Event or reply from FreeSWITCH: headers dict and body text"""
+
+    def __init__(self, headers, body=''):
+        self.headers = headers
+        self.body = body
+
+    @property
+    def data(self):
+        """Body, like greenswitch's reply .data"""
+        return self.body
+
+
+def _headers(view, start, end, unquote_values=False):
+    """Header block view[start:end] as dict (one decode for the whole block)"""
+    text = str(view[start:end], 'utf-8', 'replace')
+    if unquote_values and '%' in text:
+        if '%0A' in text or '%0a' in text:
+            # Encoded line breaks would split values - decode value by value
+            return {key: unquote(value) for key, sep, value in
+                    (line.partition(': ') for line in text.split('\n')) if sep}
+        text = unquote(text)
+    headers = {}
+    for line in text.split('\n'):
+        key, sep, value = line.partition(': ')
+        if sep:
+            headers[key] = value
+    return headers
+
+
+class FrameParser:
+    """Splits the ESL byte stream into Event frames"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self._pending = None  # (headers, body start) of a frame whose body is incomplete
+
+    def feed(self, data):
+        """Append received bytes, return the frames completed by them"""
+        buf = self.buffer
+        buf += data
+        frames = []
+        pos = 0
+        with memoryview(buf) as view:
+            while True:
+                if self._pending is not None:
+                    headers, body_start = self._pending
+                else:
+                    end = buf.find(b'\n\n', pos)
+                    if end < 0:
+                        break
+                    headers = _headers(view, pos, end)
+                    body_start = end + 2
+                length = int(headers.get('Content-Length') or 0)
+                if len(buf) - body_start < length:
+                    self._pending = (headers, body_start - pos)
+                    break
+                self._pending = None
+                frames.append(self._frame(buf, view, headers, body_start, body_start + length))
+                pos = body_start + length
+        if pos:
+            del buf[:pos]
+        return frames
+
+    @staticmethod
+    def _frame(buf, view, headers, start, end):
+        content_type = headers.get('Content-Type', '')
+        if content_type == 'text/event-plain':
+            # Body: url-encoded event headers, blank line, optional event body
+            split = buf.find(b'\n\n', start, end)
+            header_end = split if split >= 0 else end
+            event = _headers(view, start, header_end, unquote_values=True)
+            body = ''
+            if split >= 0 and event.get('Content-Length'):
+                body = str(view[split + 2:end], 'utf-8', 'replace')
+            return Event(event, body)
+        if content_type == 'text/event-json':
+            event = json.loads(str(view[start:end], 'utf-8', 'replace'))
+            body = event.pop('_body', '')
+            return Event({key: str(value) for key, value in event.items()}, body)
+        body = str(view[start:end], 'utf-8', 'replace') if end > start else ''
+        return Event(headers, body)
+
+
+class ESLConnection:
+    """Inbound event socket connection"""
+
+    def __init__(self, host, port, password, timeout=5, on_event=None):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.timeout = timeout
+        self.on_event = on_event  # called with every event (and log/data) Event
+        self.connected = False
+        self._reader = None
+        self._writer = None
+        self._replies = []  # futures of sent commands, FIFO like FreeSWITCH answers
+        self._auth = None
+        self._read_task = None
+        self.closed = None
+
+    async def connect(self):
+        loop = asyncio.get_running_loop()
+        self.closed = loop.create_future()
+        self._auth = loop.create_future()
+        try:
+            self._reader, self._writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port), self.timeout)
+            self.connected = True
+            self._read_task = asyncio.ensure_future(self._read())
+            await asyncio.wait_for(asyncio.shield(self._auth), self.timeout)
+            reply = await asyncio.wait_for(self.send(f'auth {self.password}'), self.timeout)
+            if not reply.headers.get('Reply-Text', '').startswith('+OK'):
+                raise ESLError('Invalid password.')
+        except BaseException:
+            # Timeout, rejection, bad password or cancel: no socket / read task left behind
+            await self.close()
+            raise
+        return self
+
+    async def _read(self):
+        parser = FrameParser()
+        try:
+            while True:
+                data = await self._reader.read(READ_SIZE)
+                if not data:
+                    break
+                for frame in parser.feed(data):
+                    self._dispatch(frame)
+        except (OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connected = False
+            error = ESLError('Connection closed')
+            for future in self._replies:
+                if not future.done():
+                    future.set_exception(error)
+            self._replies.clear()
+            if not self._auth.done():
+                self._auth.set_exception(error)
+            if not self.closed.done():
+                self.closed.set_result(None)
+
+    def _dispatch(self, frame):
+        content_type = frame.headers.get('Content-Type')
+        if content_type in ('command/reply', 'api/response'):
+            if self._replies:
+                future = self._replies.pop(0)
+                if not future.done():
+                    future.set_result(frame)
+        elif content_type == 'auth/request':
+            if not self._auth.done():
+                self._auth.set_result(None)
+        elif content_type in ('text/disconnect-notice', 'text/rude-rejection'):
+            if not self._auth.done():
+                self._auth.set_exception(ESLError(frame.body.strip() or 'Rejected'))
+            self.connected = False
+        elif self.on_event is not None:
+            self.on_event(frame)
+
+    async def send(self, command):
+        """Send a command, return the reply Event"""
+        if not self.connected:
+            raise ESLError('Not connected')
+        future = asyncio.get_running_loop().create_future()
+        self._replies.append(future)
+        self._writer.write(command.encode('utf-8') + b'\n\n')
+        await self._writer.drain()
+        return await future
+
+    async def api(self, command):
+        """Result text of a blocking API command"""
+        return (await self.send(f'api {command}')).body
+
+    async def bgapi(self, command):
+        """Job-UUID of a background API command"""
+        reply = await self.send(f'bgapi {command}')
+        text = reply.headers.get('Reply-Text', '')
+        if not text.startswith('+OK'):
+            raise ESLError(text)
+        return reply.headers.get('Job-UUID') or text.split('Job-UUID: ', 1)[-1]
+
+    async def events(self, names='all', format='plain'):
+        """Subscribe to events (format plain or json)"""
+        return await self._ok(f'event {format} {names}')
+
+    async def filter(self, header, value):
+        """Only receive events with header == value"""
+        return await self._ok(f'filter {header} {value}')
+
+    async def _ok(self, command):
+        reply = await self.send(command)
+        text = reply.headers.get('Reply-Text', '')
+        if not text.startswith('+OK'):
+            raise ESLError(text)
+        return text
+
+    async def close(self):
+        if self.connected:
+            try:
+                await asyncio.wait_for(self.send('exit'), 1)
+            except (ESLError, OSError, asyncio.TimeoutError):
+                pass
+        self.connected = False
+        if self._auth is not None and not self._auth.done():
+            self._auth.cancel()  # nobody waits for auth any more
+        if self._writer is not None:
+            self._writer.close()
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+
+    async def wait_closed(self):
+        """Wait until FreeSWITCH closes the connection"""
+        await self.closed
+
+
+def api(host, port, password, command, timeout=5):
+    """Run one API command on a new connection (blocking), result text"""
+    async def run():
+        connection = ESLConnection(host, port, password, timeout)
+        try:
+            await connection.connect()
+            return await asyncio.wait_for(connection.api(command), timeout)
+        finally:
+            await connection.close()
+    return asyncio.run(run())
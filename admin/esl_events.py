@@ -7,6 +7,8 @@ All communication with FreeSWITCH goes through ESL - no file access needed.
 Uses gevent for async operations (required by greenswitch).
 """
 
+import asyncio
+import json
 import os
 import time
 import threading
@@ -29,21 +31,47 @@ def _get_esl_settings():
 
 FS_HOST, FS_PORT, FS_PASS = _get_esl_settings()
 
+import esl_client
+
+# ESL implementation: greenswitch (gevent, default) or asyncio (esl_client.py)
+ESL_BACKEND = os.environ.get('ESL_BACKEND', 'greenswitch').lower()
+
 # Try to import greenswitch (requires gevent)
 try:
     import gevent
+    import gevent.monkey
     from greenswitch import InboundESL
-    ESL_AVAILABLE = True
+    GREENSWITCH_AVAILABLE = True
 except ImportError:
-    ESL_AVAILABLE = False
+    GREENSWITCH_AVAILABLE = False
     gevent = None
+
+# The asyncio backend needs only the standard library
+ESL_AVAILABLE = GREENSWITCH_AVAILABLE or ESL_BACKEND == 'asyncio'
+if not ESL_AVAILABLE:
     print("WARNING: greenswitch not installed - ESL events will not work")
 
 
+def single_hub():
+    """True when the process runs on one gevent hub (serve_gevent.py patched threading)"""
+    return gevent is not None and gevent.monkey.is_module_patched('threading')
+
+
+def use_asyncio():
+    """True if ESL connections use esl_client (never on the single gevent hub)"""
+    return ESL_BACKEND == 'asyncio' and not single_hub()
+
+
 def test_esl_connection(host, port, password):
     """Test ESL connection without subscribing to events. Returns status dict."""
     if not ESL_AVAILABLE:
         return {'success': False, 'error': 'greenswitch not installed'}
+    if use_asyncio():
+        try:
+            version = esl_client.api(host, int(port), password, 'version')
+            return {'success': True, 'version': version.strip()}
+        except Exception as e:
+            return {'success': False, 'error': str(e)}
     try:
         esl = InboundESL(host=host, port=int(port), password=password)
         esl.connect()
@@ -59,19 +87,500 @@ def test_esl_connection(host, port, password):
         return {'success': False, 'error': str(e)}
 
 
+class ESLCircuitBreaker:
+    """Fail-fast guard shared by all ESL command paths (fs_cli, send_command)
+
+    closed:    commands go through; N consecutive failures open the breaker
+    open:      commands fail immediately (no connect, no socket timeout),
+               except one probe per probe_interval (half_open)
+    half_open: the probe decides - success closes, failure re-opens
+    The event subscriber closes it as soon as it reports CONNECTED.
+    """
+
+    def __init__(self, failure_threshold=3, probe_interval=5.0):
+        self.failure_threshold = failure_threshold
+        self.probe_interval = probe_interval
+        self.lock = threading.Lock()
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.last_probe = 0.0
+        self.probe_in_flight = False
+        self.last_error = None
+        self.rejected = 0
+
+    def allow(self):
+        """True if a command may try to connect now"""
+        with self.lock:
+            if self.state == 'closed':
+                return True
+            now = time.monotonic()
+            if not self.probe_in_flight and now - self.last_probe >= self.probe_interval:
+                self.state = 'half_open'
+                self.probe_in_flight = True
+                self.last_probe = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record_success(self):
+        with self.lock:
+            if self.state != 'closed':
+                print("[ESL] Circuit closed - FreeSWITCH reachable again")
+            self.state = 'closed'
+            self.failures = 0
+            self.opened_at = None
+            self.probe_in_flight = False
+
+    def record_failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.last_error = str(error)
+            self.probe_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                if self.state == 'closed':
+                    print(f"[ESL] Circuit open after {self.failures} failures: {error}")
+                    self.opened_at = time.time()
+                self.state = 'open'
+                self.last_probe = time.monotonic()
+
+    def reset(self):
+        """Close the breaker (subscriber connected)"""
+        self.record_success()
+
+    def status(self):
+        with self.lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'probe_interval': self.probe_interval,
+                'opened_at': self.opened_at,
+                'last_error': self.last_error,
+                'rejected': self.rejected,
+            }
+
+
+# Shared by app.fs_cli and ESLEventSubscriber.send_command
+breaker = ESLCircuitBreaker(
+    failure_threshold=int(os.environ.get('ESL_BREAKER_FAILURES', '3')),
+    probe_interval=float(os.environ.get('ESL_BREAKER_PROBE_INTERVAL', '5')),
+)
+
+UNAVAILABLE_ERROR = 'FreeSWITCH unavailable (ESL circuit open)'
+
+
+def _header_setting(value):
+    """ESL_EVENT_HEADERS: true (all), false (none) or comma-separated header names"""
+    if value.strip().lower() in ('', 'true'):
+        return True
+    if value.strip().lower() == 'false':
+        return False
+    return tuple(name.strip() for name in value.split(',') if name.strip())
+
+
+# Headers kept by buffered events: all, none (extracted fields only) or a
+# whitelist like Unique-ID,Hangup-Cause - trimmed when the event is buffered
+ESL_EVENT_HEADERS = _header_setting(os.environ.get('ESL_EVENT_HEADERS', 'true'))
+
+# Memory budget of the event buffer in MB (approximate, oldest events are
+# evicted first); 0 = limited by event count only
+ESL_BUFFER_MB = float(os.environ.get('ESL_BUFFER_MB', '8'))
+
+# (second, text) of the last rendered datetime - events come in bursts
+_datetime_cache = (None, '')
+
+
+def _format_datetime(timestamp):
+    global _datetime_cache
+    second = int(timestamp)
+    cached_second, text = _datetime_cache
+    if cached_second != second:
+        text = datetime.fromtimestamp(second).strftime('%Y-%m-%d %H:%M:%S')
+        _datetime_cache = (second, text)
+    return text
+
+
+# Keys of EventRecord.to_dict() that are not extracted fields
+RECORD_KEYS = ('type', 'subtype', 'timestamp', 'datetime', 'level', 'text', 'headers')
+
+
+class EventRecord:
+    """Buffered ESL event
+
+    Holds what _process_event extracted (type, subtype, level, a few fields,
+    LOG body) and a reference to the ESL library's headers dict - no copy.
+    text and datetime are rendered when the event is serialized (text by
+    the EventHandler's formatter), most buffered events never are.
+    """
+
+    __slots__ = ('timestamp', 'type', 'subtype', 'level', 'fields', 'headers', 'body', 'handler', 'size',
+                 'buffered', '_text', '_json', '_log_json')
+
+    def __init__(self, type, subtype='', level='info', fields=None, headers=None, body=None,
+                 text=None, timestamp=None, handler=None):
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.type = type
+        self.subtype = subtype
+        self.level = level
+        self.fields = fields
+        self.headers = headers
+        self.body = body
+        self.handler = handler
+        self.size = 0  # approximate bytes, set by ESLEventBuffer.add
+        self.buffered = False  # in an ESLEventBuffer (counted in its bytes)
+        self._text = text  # given for SYSTEM events, else rendered on first use
+        self._json = None  # JSON bytes of to_dict() / to_log_dict(), see ESLEventBuffer.json_fragments
+        self._log_json = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record from to_dict() output (event bus followers)"""
+        fields = {key: value for key, value in data.items() if key not in RECORD_KEYS}
+        return cls(data.get('type', 'UNKNOWN'), data.get('subtype', ''), data.get('level', 'info'),
+                   fields or None, data.get('headers'), text=data.get('text', ''),
+                   timestamp=data.get('timestamp'))
+
+    def get(self, name, default=''):
+        """Extracted field (caller_id, user, gateway, ...)"""
+        if self.fields is None:
+            return default
+        return self.fields.get(name, default)
+
+    @property
+    def datetime(self):
+        return _format_datetime(self.timestamp)
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self._format_text()
+        return self._text
+
+    def _format_text(self):
+        if self.handler is not None and self.handler.format is not None:
+            return self.handler.format(self)
+        return f"{self.type} {self.subtype}".strip()
+
+    def to_dict(self):
+        """API shape of the event"""
+        data = {
+            'type': self.type,
+            'subtype': self.subtype,
+            'timestamp': self.timestamp,
+            'datetime': self.datetime,
+            'level': self.level,
+            'text': self.text,
+        }
+        if self.headers is not None:
+            data['headers'] = self.headers
+        if self.fields:
+            data.update(self.fields)
+        return data
+
+    def to_log_dict(self):
+        """/api/logs shape of the event"""
+        return {
+            'text': self.text,
+            'level': self.level,
+            'timestamp': self.timestamp,
+            'type': self.type,
+            'subtype': self.subtype,
+        }
+
+
+class EventHandler:
+    """How _process_event handles one (Event-Name, Event-Subclass)
+
+    level:   level of the buffered event
+    extract: headers -> dict of fields for the record (None: no fields)
+    format:  record -> text, called when the event is first serialized
+    body:    keep up to this many characters of the event body (LOG)
+    hooks:   callables(record, headers) run for every event of this type
+    """
+
+    __slots__ = ('level', 'extract', 'format', 'body', 'hooks')
+
+    def __init__(self, level='info', extract=None, format=None, body=0):
+        self.level = level
+        self.extract = extract
+        self.format = format
+        self.body = body
+        self.hooks = []
+
+
+def _event_level(event_name):
+    """Level of event types without an explicit one"""
+    if 'HANGUP' in event_name:
+        return 'warning'
+    elif 'FAILURE' in event_name or 'ERROR' in event_name:
+        return 'error'
+    elif event_name == 'LOG' or event_name == 'HEARTBEAT':
+        return 'debug'
+    return 'info'
+
+
+def _call_fields(headers):
+    return {
+        'caller_id': headers.get('Caller-Caller-ID-Number', ''),
+        'callee': headers.get('Caller-Destination-Number', ''),
+        'uuid': headers.get('Unique-ID', ''),
+        'direction': headers.get('Call-Direction', ''),
+    }
+
+
+def _hangup_fields(headers):
+    fields = _call_fields(headers)
+    fields['cause'] = headers.get('Hangup-Cause', '')
+    return fields
+
+
+def _register_fields(headers):
+    return {
+        'user': headers.get('from-user', headers.get('user', '')),
+        'ip': headers.get('network-ip', headers.get('ip', '')),
+        'profile': headers.get('profile-name', ''),
+    }
+
+
+def _gateway_fields(headers):
+    return {'gateway': headers.get('Gateway', ''), 'state': headers.get('State', '')}
+
+
+def _heartbeat_fields(headers):
+    return {'sessions': headers.get('Session-Count', '0'), 'uptime': headers.get('Up-Time', '')}
+
+
+def _log_fields(headers):
+    return {
+        'log_level': headers.get('Log-Level', ''),
+        'log_file': headers.get('Log-File', ''),
+        'log_line': headers.get('Log-Line', ''),
+    }
+
+
+def _format_create(r):
+    return f"Call {r.get('direction')}: {r.get('caller_id') or 'unknown'} -> {r.get('callee') or 'unknown'}"
+
+
+def _format_answer(r):
+    return f"Answered: {r.get('caller_id') or 'unknown'} -> {r.get('callee') or 'unknown'}"
+
+
+def _format_hangup(r):
+    return f"Hangup: {r.get('caller_id') or 'unknown'} ({r.get('cause') or 'unknown'})"
+
+
+def _format_register(r):
+    return f"Register: {r.get('user') or 'unknown'}@{r.get('ip')} [{r.get('profile')}]"
+
+
+def _format_unregister(r):
+    return f"Unregister: {r.get('user') or 'unknown'}@{r.get('ip')} [{r.get('profile')}]"
+
+
+def _format_register_failure(r):
+    return f"Register FAILED: {r.get('user') or 'unknown'}@{r.get('ip')} [{r.get('profile')}]"
+
+
+def _format_gateway(r):
+    return f"Gateway {r.get('gateway') or 'unknown'}: {r.get('state') or 'unknown'}"
+
+
+def _format_heartbeat(r):
+    return f"Heartbeat: {r.get('sessions') or '0'} sessions, uptime: {r.get('uptime')}"
+
+
+def _format_log(r):
+    return r.body or f"[LOG] {r.get('log_file')}"
+
+
+def _register_handler_for(event_name, event_subclass):
+    if 'FAILURE' in event_name or 'failure' in event_subclass:
+        format = _format_register_failure
+    elif 'UNREGISTER' in event_name or 'unregister' in event_subclass:
+        format = _format_unregister
+    else:
+        format = _format_register
+    return EventHandler(_event_level(event_name), _register_fields, format)
+
+
+def _resolve_handler(event_name, event_subclass):
+    """Handler for a type missing from the table (derived once, then cached)"""
+    if 'REGISTER' in event_name or 'register' in event_subclass:
+        return _register_handler_for(event_name, event_subclass)
+    if 'gateway' in event_subclass:
+        return EventHandler(_event_level(event_name), _gateway_fields, _format_gateway)
+    return EventHandler(_event_level(event_name))
+
+
+# (Event-Name, Event-Subclass) -> EventHandler; unknown types are added by
+# handler_for() on first sight, so every event costs one dict lookup
+EVENT_HANDLERS = {
+    ('CHANNEL_CREATE', ''): EventHandler('info', _call_fields, _format_create),
+    ('CHANNEL_ANSWER', ''): EventHandler('info', _call_fields, _format_answer),
+    ('CHANNEL_HANGUP', ''): EventHandler('warning', _hangup_fields, _format_hangup),
+    ('CHANNEL_HANGUP_COMPLETE', ''): EventHandler('warning', _hangup_fields, _format_hangup),
+    ('SOFIA::GATEWAY_STATE', ''): EventHandler('info', _gateway_fields, _format_gateway),
+    ('HEARTBEAT', ''): EventHandler('debug', _heartbeat_fields, _format_heartbeat),
+    ('LOG', ''): EventHandler('debug', _log_fields, _format_log, body=500),
+}
+for _name, _subclass in (('SOFIA::REGISTER', ''), ('SOFIA::UNREGISTER', ''), ('SOFIA::REGISTER_ATTEMPT', ''),
+                         ('SOFIA::REGISTER_FAILURE', ''), ('CUSTOM', 'sofia::register'),
+                         ('CUSTOM', 'sofia::unregister'), ('CUSTOM', 'sofia::register_attempt'),
+                         ('CUSTOM', 'sofia::register_failure'), ('CUSTOM', 'sofia::pre_register'),
+                         ('CUSTOM', 'sofia::gateway_state'), ('CUSTOM', 'sofia::gateway_add'),
+                         ('CUSTOM', 'sofia::gateway_delete')):
+    EVENT_HANDLERS[(_name, _subclass)] = _resolve_handler(_name, _subclass)
+
+MAX_HANDLERS = 1024  # cap for cached unknown types (CUSTOM subclasses are open-ended)
+
+# Hooks for every event type: callables(record, headers)
+ALL_EVENT_HOOKS = []
+
+
+def handler_for(event_name, event_subclass=''):
+    """EventHandler of an event type"""
+    handler = EVENT_HANDLERS.get((event_name, event_subclass))
+    if handler is None:
+        handler = _resolve_handler(event_name, event_subclass)
+        if len(EVENT_HANDLERS) < MAX_HANDLERS:
+            handler = EVENT_HANDLERS.setdefault((event_name, event_subclass), handler)
+    return handler
+
+
+def register_handler(event_name, event_subclass='', level=None, extract=None, format=None, body=None):
+    """Set level / extractor / formatter / body length of an event type (None = keep)"""
+    key = (event_name, event_subclass)
+    handler = EVENT_HANDLERS.get(key) or EVENT_HANDLERS.setdefault(key, _resolve_handler(*key))
+    if level is not None:
+        handler.level = level
+    if extract is not None:
+        handler.extract = extract
+    if format is not None:
+        handler.format = format
+    if body is not None:
+        handler.body = body
+    return handler
+
+
+def add_hook(event_name, hook, event_subclass=''):
+    """Run hook(record, headers) for every event of a type ('*': all types)
+
+    For derived state (call table, metrics, security) - runs in the thread
+    of the subscriber, after the event is buffered; keep it short. With
+    several gunicorn workers the followers run it for the leader's events
+    (headers as kept by ESL_EVENT_HEADERS).
+    """
+    if event_name == '*':
+        ALL_EVENT_HOOKS.append(hook)
+    else:
+        register_handler(event_name, event_subclass).hooks.append(hook)
+
+
+def run_hooks(handler, record, headers):
+    for hook in (handler.hooks + ALL_EVENT_HOOKS) if ALL_EVENT_HOOKS else handler.hooks:
+        try:
+            hook(record, headers)
+        except Exception as e:
+            print(f"[ESL] Event hook error ({record.type}): {e}")
+
+
+# Approximate memory of a buffered event (CPython, tracemalloc on parsed
+# events): record and fields dict, per header (dict slot, key and value
+# strings) plus the value length, per extracted field (values are shared
+# with the headers)
+EVENT_BYTES = 250
+HEADER_BYTES = 135
+FIELD_BYTES = 100
+
+
+def approx_bytes(event):
+    """Approximate memory held by a buffered EventRecord"""
+    size = EVENT_BYTES
+    if event.fields:
+        size += FIELD_BYTES * len(event.fields)
+    if event.headers:
+        # join: one C loop, faster than sum(map(len, ...)) for 50-150 values
+        size += HEADER_BYTES * len(event.headers) + len(''.join(event.headers.values()))
+    if event.body:
+        size += len(event.body)
+    if event._text:
+        size += len(event._text)
+    return size
+
+
 class ESLEventBuffer:
-    """Thread-safe circular buffer for ESL events"""
+    """Thread-safe circular buffer for ESL events
 
-    def __init__(self, max_size=1000):
+    Bounded by event count (max_size) and approximate memory (max_bytes,
+    0 = no budget), the oldest events are evicted first. headers: True
+    keeps all event headers, False none, a tuple of names only those.
+    JSON bytes cached by json_fragments() count toward the budget.
+    """
+
+    def __init__(self, max_size=1000, max_bytes=0, headers=True):
         self.buffer = deque(maxlen=max_size)
+        self.max_bytes = max_bytes
+        self.headers = headers
         self.lock = threading.Lock()
         self.event_count = 0
+        self.bytes = 0
+        self.evictions = 0  # events dropped for the memory budget
 
     def add(self, event):
         """Add event to buffer"""
+        if event.headers is not None and self.headers is not True:
+            keep, headers = self.headers, event.headers
+            event.headers = {name: headers[name] for name in keep if name in headers} if keep else None
+        event.size = approx_bytes(event)
         with self.lock:
-            self.buffer.append(event)
+            buffer = self.buffer
+            if len(buffer) == buffer.maxlen:
+                self._drop()
+            buffer.append(event)
+            event.buffered = True
+            self.bytes += event.size
             self.event_count += 1
+            self._evict()
+
+    def _drop(self):
+        event = self.buffer.popleft()
+        event.buffered = False
+        self.bytes -= event.size
+
+    def _evict(self):
+        """Drop the oldest events while over the memory budget (lock held)"""
+        while self.max_bytes and self.bytes > self.max_bytes and len(self.buffer) > 1:
+            self._drop()
+            self.evictions += 1
+
+    def json_fragments(self, events, log=False):
+        """JSON bytes of each event (to_dict, or to_log_dict with log=True)
+
+        Rendered once per event, outside the lock, and cached on the record -
+        every later poll only joins bytes.
+        """
+        attr = '_log_json' if log else '_json'
+        fragments = []
+        rendered = []
+        for event in events:
+            data = getattr(event, attr)
+            if data is None:
+                data = json.dumps(event.to_log_dict() if log else event.to_dict(),
+                                  separators=(',', ':'), default=str).encode('utf-8')
+                rendered.append((event, data))
+            fragments.append(data)
+        if rendered:
+            with self.lock:
+                for event, data in rendered:
+                    if getattr(event, attr) is None:
+                        setattr(event, attr, data)
+                        event.size += len(data)
+                        if event.buffered:
+                            self.bytes += len(data)
+                self._evict()
+        return fragments
 
     def get_recent(self, count=100):
         """Get last N events"""
@@ -82,13 +591,17 @@ class ESLEventBuffer:
     def get_since(self, timestamp):
         """Get events since timestamp"""
         with self.lock:
-            return [e for e in self.buffer if e.get('timestamp', 0) > timestamp]
+            return [e for e in self.buffer if e.timestamp > timestamp]
 
     def clear(self):
         """Clear all events"""
         with self.lock:
+            for event in self.buffer:
+                event.buffered = False
             self.buffer.clear()
             self.event_count = 0
+            self.bytes = 0
+            self.evictions = 0
 
     def stats(self):
         """Get buffer statistics"""
@@ -96,7 +609,10 @@ class ESLEventBuffer:
             return {
                 'total_events': self.event_count,
                 'buffer_size': len(self.buffer),
-                'max_size': self.buffer.maxlen
+                'max_size': self.buffer.maxlen,
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
             }
 
 
@@ -137,8 +653,11 @@ class ESLEventSubscriber:
         self.port = port or FS_PORT
         self.password = password or FS_PASS
 
-        self.buffer = ESLEventBuffer(max_size=buffer_size)
+        self.buffer = ESLEventBuffer(max_size=buffer_size, max_bytes=int(ESL_BUFFER_MB * 1024 * 1024),
+                                     headers=ESL_EVENT_HEADERS)
         self.esl = None
+        self._loop = None  # asyncio backend: loop of the subscriber thread
+        self._wakeup = None
         self.running = False
         self.connected = False
         self.thread = None
@@ -147,6 +666,11 @@ class ESLEventSubscriber:
         self.connection_attempts = 0
         self.last_event_time = None
 
+        # Called with {'event': ...} / {'clear': True} for every buffer change
+        # (event_bus forwards them to the other workers)
+        self.listeners = []
+        self.publish_lock = threading.Lock()
+
     def start(self):
         """Start the event subscriber in a thread with gevent hub"""
         if self.running:
@@ -157,13 +681,20 @@ class ESLEventSubscriber:
             return
 
         self.running = True
-        # Use a regular thread that runs gevent's event loop internally
-        self.thread = threading.Thread(target=self._thread_main, daemon=True)
-        self.thread.start()
+        if single_hub():
+            # Everything already runs on the one hub - just another greenlet
+            self.thread = gevent.spawn(self._run)
+        else:
+            # Use a regular thread that runs gevent's event loop internally
+            self.thread = threading.Thread(target=self._thread_main, daemon=True)
+            self.thread.start()
         print(f"[ESL] Event subscriber started for {self.host}:{self.port}")
 
     def _thread_main(self):
         """Thread entry point - runs gevent hub"""
+        if use_asyncio():
+            asyncio.run(self._run_async())
+            return
         # Spawn the main loop as a greenlet and run gevent's event loop
         greenlet = gevent.spawn(self._run)
         greenlet.join()  # This runs the gevent event loop
@@ -171,7 +702,13 @@ class ESLEventSubscriber:
     def stop(self):
         """Stop the event subscriber"""
         self.running = False
-        if self.esl:
+        if self._loop is not None:
+            # asyncio backend: wake the loop, it closes the connection itself
+            try:
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+            except RuntimeError:
+                pass  # loop already finished
+        elif self.esl:
             try:
                 self.esl.stop()
             except:
@@ -206,6 +743,7 @@ class ESLEventSubscriber:
         self.esl.connect()
         self.connected = True
         self.last_error = None
+        breaker.reset()
 
         print(f"[ESL] Connected! esl.connected={self.esl.connected}")
 
@@ -217,16 +755,56 @@ class ESLEventSubscriber:
         print(f"[ESL] Subscribed to all events, result={result}")
 
         # Add initial connection event
-        self._add_event({
-            'type': 'SYSTEM',
-            'subtype': 'CONNECTED',
-            'text': f'ESL connected to {self.host}:{self.port}',
-            'level': 'info'
-        })
+        self._add_system_event('CONNECTED', f'ESL connected to {self.host}:{self.port}', 'info')
 
         # Start receiving events (blocking call)
         self._receive_events()
 
+    async def _run_async(self):
+        """Main subscriber loop on asyncio (ESL_BACKEND=asyncio)"""
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        while self.running:
+            try:
+                await self._connect_and_subscribe_async()
+            except Exception as e:
+                self.last_error = str(e)
+                self.connected = False
+                print(f"[ESL] Connection error: {e}")
+
+            if self.running:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.reconnect_delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _connect_and_subscribe_async(self):
+        """Connect with esl_client, subscribe, wait for disconnect or stop()"""
+        self.connection_attempts += 1
+        print(f"[ESL] Connecting to {self.host}:{self.port} (attempt {self.connection_attempts}, asyncio)")
+
+        self.esl = esl_client.ESLConnection(self.host, self.port, self.password, on_event=self._on_event)
+        await self.esl.connect()
+        try:
+            self.connected = True
+            self.last_error = None
+            breaker.reset()
+
+            result = await self.esl.events('all')
+            print(f"[ESL] Subscribed to all events, result={result}")
+
+            self._add_system_event('CONNECTED', f'ESL connected to {self.host}:{self.port}', 'info')
+
+            stopped = asyncio.ensure_future(self._wakeup.wait())
+            await asyncio.wait([self.esl.closed, stopped], return_when=asyncio.FIRST_COMPLETED)
+            stopped.cancel()
+
+            if self.running:
+                self._add_system_event('DISCONNECTED', f'ESL disconnected from {self.host}:{self.port}', 'warning')
+        finally:
+            self.connected = False
+            await self.esl.close()
+
     def _on_event(self, event):
         """Callback for incoming ESL events"""
         try:
@@ -240,8 +818,11 @@ class ESLEventSubscriber:
             # greenswitch uses gevent - start_event_handlers spawns:
             # - _receive_events_greenlet (reads socket, puts in queue)
             # - _process_events_greenlet (calls handlers from queue)
-            print(f"[ESL] Starting event handlers, esl.connected={self.esl.connected}")
-            self.esl.start_event_handlers()
+            # connect() already starts them in greenswitch 0.0.12 - a second
+            # reader on the same socket dies at once and forces a reconnect
+            if not getattr(self.esl, '_receive_events_greenlet', None):
+                print(f"[ESL] Starting event handlers, esl.connected={self.esl.connected}")
+                self.esl.start_event_handlers()
             print(f"[ESL] Event handlers started, esl.connected={self.esl.connected}")
 
             # Wait for the receive greenlet to finish (it runs while connected)
@@ -260,140 +841,56 @@ class ESLEventSubscriber:
 
             # Add disconnect event
             if self.running:
-                self._add_event({
-                    'type': 'SYSTEM',
-                    'subtype': 'DISCONNECTED',
-                    'text': f'ESL disconnected from {self.host}:{self.port}',
-                    'level': 'warning'
-                })
+                self._add_system_event('DISCONNECTED', f'ESL disconnected from {self.host}:{self.port}', 'warning')
 
         except Exception as e:
             if self.running:
                 print(f"[ESL] Receive error: {e}")
-                self._add_event({
-                    'type': 'SYSTEM',
-                    'subtype': 'ERROR',
-                    'text': f'ESL error: {e}',
-                    'level': 'error'
-                })
+                self._add_system_event('ERROR', f'ESL error: {e}', 'error')
         finally:
             self.connected = False
 
     def _process_event(self, event):
         """Process incoming ESL event"""
         try:
-            event_name = event.headers.get('Event-Name', 'UNKNOWN')
-            event_subclass = event.headers.get('Event-Subclass', '')
-
-            # Parse event into our format
-            parsed = {
-                'type': event_name,
-                'subtype': event_subclass,
-                'timestamp': time.time(),
-                'datetime': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                'level': self._get_event_level(event_name),
-                'text': self._format_event_text(event),
-                'headers': dict(event.headers) if hasattr(event, 'headers') else {},
-            }
-
-            # Extract useful fields based on event type
-            if event_name in ('CHANNEL_CREATE', 'CHANNEL_ANSWER', 'CHANNEL_HANGUP', 'CHANNEL_HANGUP_COMPLETE'):
-                parsed['caller_id'] = event.headers.get('Caller-Caller-ID-Number', '')
-                parsed['callee'] = event.headers.get('Caller-Destination-Number', '')
-                parsed['uuid'] = event.headers.get('Unique-ID', '')
-                parsed['direction'] = event.headers.get('Call-Direction', '')
-
-            elif 'SOFIA::REGISTER' in event_name or 'register' in event_subclass:
-                parsed['user'] = event.headers.get('from-user', event.headers.get('user', ''))
-                parsed['ip'] = event.headers.get('network-ip', event.headers.get('ip', ''))
-                parsed['profile'] = event.headers.get('profile-name', '')
-
-            elif event_name == 'SOFIA::GATEWAY_STATE' or 'gateway' in event_subclass:
-                parsed['gateway'] = event.headers.get('Gateway', '')
-                parsed['state'] = event.headers.get('State', '')
-
-            elif event_name == 'LOG':
-                parsed['log_level'] = event.headers.get('Log-Level', '')
-                parsed['log_file'] = event.headers.get('Log-File', '')
-                parsed['log_line'] = event.headers.get('Log-Line', '')
-                # Body contains the actual log message
-                if hasattr(event, 'body') and event.body:
-                    parsed['text'] = event.body[:500]
-
-            self._add_event(parsed)
+            headers = event.headers
+            event_name = headers.get('Event-Name', 'UNKNOWN')
+            event_subclass = headers.get('Event-Subclass', '')
+            handler = handler_for(event_name, event_subclass)
+
+            body = None
+            if handler.body:
+                body = getattr(event, 'body', None)
+                body = body[:handler.body] if body else None
+
+            record = EventRecord(event_name, event_subclass, handler.level,
+                                 handler.extract(headers) if handler.extract else None,
+                                 headers, body, handler=handler)
+            self._add_event(record)
+            if handler.hooks or ALL_EVENT_HOOKS:
+                run_hooks(handler, record, headers)
             self.last_event_time = time.time()
 
         except Exception as e:
             print(f"[ESL] Event processing error: {e}")
 
-    def _get_event_level(self, event_name):
-        """Determine log level from event type"""
-        if 'HANGUP' in event_name:
-            return 'warning'
-        elif 'FAILURE' in event_name or 'ERROR' in event_name:
-            return 'error'
-        elif 'REGISTER' in event_name:
-            return 'info'
-        elif event_name == 'LOG':
-            return 'debug'
-        elif event_name == 'HEARTBEAT':
-            return 'debug'
-        else:
-            return 'info'
-
-    def _format_event_text(self, event):
-        """Format event into readable text"""
-        event_name = event.headers.get('Event-Name', 'UNKNOWN')
-        event_subclass = event.headers.get('Event-Subclass', '')
-
-        if event_name == 'CHANNEL_CREATE':
-            caller = event.headers.get('Caller-Caller-ID-Number', 'unknown')
-            dest = event.headers.get('Caller-Destination-Number', 'unknown')
-            direction = event.headers.get('Call-Direction', '')
-            return f"Call {direction}: {caller} -> {dest}"
-
-        elif event_name == 'CHANNEL_ANSWER':
-            caller = event.headers.get('Caller-Caller-ID-Number', 'unknown')
-            dest = event.headers.get('Caller-Destination-Number', 'unknown')
-            return f"Answered: {caller} -> {dest}"
-
-        elif event_name == 'CHANNEL_HANGUP' or event_name == 'CHANNEL_HANGUP_COMPLETE':
-            caller = event.headers.get('Caller-Caller-ID-Number', 'unknown')
-            cause = event.headers.get('Hangup-Cause', 'unknown')
-            return f"Hangup: {caller} ({cause})"
-
-        elif 'REGISTER' in event_name or 'register' in event_subclass:
-            user = event.headers.get('from-user', event.headers.get('user', 'unknown'))
-            ip = event.headers.get('network-ip', event.headers.get('ip', ''))
-            profile = event.headers.get('profile-name', '')
-            if 'FAILURE' in event_name or 'failure' in event_subclass:
-                return f"Register FAILED: {user}@{ip} [{profile}]"
-            elif 'UNREGISTER' in event_name or 'unregister' in event_subclass:
-                return f"Unregister: {user}@{ip} [{profile}]"
-            else:
-                return f"Register: {user}@{ip} [{profile}]"
-
-        elif event_name == 'SOFIA::GATEWAY_STATE' or 'gateway' in event_subclass:
-            gw = event.headers.get('Gateway', 'unknown')
-            state = event.headers.get('State', 'unknown')
-            return f"Gateway {gw}: {state}"
-
-        elif event_name == 'HEARTBEAT':
-            uptime = event.headers.get('Up-Time', '')
-            sessions = event.headers.get('Session-Count', '0')
-            return f"Heartbeat: {sessions} sessions, uptime: {uptime}"
-
-        elif event_name == 'LOG':
-            if hasattr(event, 'body') and event.body:
-                return event.body[:300]
-            return f"[LOG] {event.headers.get('Log-File', '')}"
-
-        else:
-            return f"{event_name} {event_subclass}".strip()
+    def _add_system_event(self, subtype, text, level):
+        """Buffer an event of the subscriber itself (connect, disconnect, error)"""
+        self._add_event(EventRecord('SYSTEM', subtype, level, text=text))
 
     def _add_event(self, event):
         """Add event to buffer"""
-        self.buffer.add(event)
+        with self.publish_lock:
+            self.buffer.add(event)
+            for listener in self.listeners:
+                listener({'event': event})
+
+    def clear_events(self):
+        """Clear the event buffer"""
+        with self.publish_lock:
+            self.buffer.clear()
+            for listener in self.listeners:
+                listener({'clear': True})
 
     def get_events(self, count=100):
         """Get recent events"""
@@ -403,6 +900,10 @@ class ESLEventSubscriber:
         """Get events since timestamp"""
         return self.buffer.get_since(timestamp)
 
+    def events_json(self, events, log=False):
+        """Cached JSON bytes of events from get_events / get_events_since"""
+        return self.buffer.json_fragments(events, log)
+
     def get_status(self):
         """Get subscriber status"""
         return {
@@ -413,7 +914,8 @@ class ESLEventSubscriber:
             'connection_attempts': self.connection_attempts,
             'last_event_time': self.last_event_time,
             'buffer_stats': self.buffer.stats(),
-            'esl_available': ESL_AVAILABLE
+            'esl_available': ESL_AVAILABLE,
+            'breaker': breaker.status()
         }
 
     def send_command(self, command):
@@ -421,12 +923,21 @@ class ESLEventSubscriber:
         if not ESL_AVAILABLE:
             return {'success': False, 'error': 'ESL not available'}
 
+        if not breaker.allow():
+            return {'success': False, 'error': UNAVAILABLE_ERROR}
+
         try:
+            if use_asyncio():
+                output = esl_client.api(self.host, self.port, self.password, command)
+                breaker.record_success()
+                return {'success': True, 'output': output.strip()}
+
             # Use a separate connection for commands
             esl = InboundESL(host=self.host, port=self.port, password=self.password)
             esl.connect()
             result = esl.send(f'api {command}')
             esl.stop()
+            breaker.record_success()
 
             if result:
                 data = result.data if hasattr(result, 'data') else None
@@ -438,19 +949,31 @@ class ESLEventSubscriber:
             return {'success': True, 'output': ''}
 
         except Exception as e:
+            breaker.record_failure(e)
             return {'success': False, 'error': str(e)}
 
 
 # Global subscriber instance
 _subscriber = None
 
+# Creates the global subscriber - event_bus replaces it in multi-worker mode
+subscriber_factory = ESLEventSubscriber
+
 def get_subscriber():
     """Get or create the global ESL subscriber"""
     global _subscriber
     if _subscriber is None:
-        _subscriber = ESLEventSubscriber()
+        _subscriber = subscriber_factory()
     return _subscriber
 
+def replace_subscriber(subscriber):
+    """Install subscriber as the global one (stops the previous one)"""
+    global _subscriber
+    previous, _subscriber = _subscriber, subscriber
+    if previous is not None and previous is not subscriber and previous.running:
+        previous.stop()
+    return subscriber
+
 def start_subscriber():
     """Start the global ESL subscriber"""
     sub = get_subscriber()
@@ -0,0 +1,364 @@
+"""
+Event Bus - one ESL subscriber shared by all gunicorn workers
+
+With several workers (ADMIN_WORKERS > 1, gunicorn.conf.py) every worker
+would otherwise open its own FreeSWITCH event connection and keep its own,
+diverging event buffer. Instead start() (called once per worker) elects a
+leader with a non-blocking flock on EVENT_BUS_LOCK:
+- the leader runs the real ESLEventSubscriber and serves a Unix socket
+  (EVENT_BUS_SOCKET); every follower gets the buffered events first, then
+  each new event / buffer clear, and the subscriber status once a second
+- followers install a BusSubscriber: same interface as ESLEventSubscriber,
+  filled from the socket, so /api/esl/* answers the same in every worker;
+  clearing the buffer is forwarded to the leader, which clears everywhere
+- the kernel releases the lock when the leader exits: followers lose the
+  socket, one of them takes the lock and becomes the new leader (keeping
+  its copy of the buffer), the others reconnect to it
+
+Messages are JSON lines: {"backlog": [...]}, {"event": {...}},
+{"clear": true}, {"status": {...}}; followers send {"clear": true}.
+
+Without start() (python app.py, single process) nothing changes: the
+subscriber is started by app.py and no socket is opened.
+"""
+
+import fcntl
+import json
+import os
+import queue
+import socket
+import threading
+import time
+
+import esl_events
+
+LOCK_PATH = os.environ.get('EVENT_BUS_LOCK', '/tmp/sip-wrapper-esl.lock')
+SOCKET_PATH = os.environ.get('EVENT_BUS_SOCKET', '/tmp/sip-wrapper-events.sock')
+
+STATUS_INTERVAL = 1.0  # seconds between status messages
+RECONNECT_DELAY = 1.0  # follower: seconds between connect / election attempts
+FOLLOWER_QUEUE = 10000  # messages; a follower this far behind is dropped (reconnects with backlog)
+
+_lock = threading.Lock()
+_bus = None
+
+
+def _default(value):
+    # Buffered events are EventRecords - sent in their API shape
+    if isinstance(value, esl_events.EventRecord):
+        return value.to_dict()
+    return str(value)
+
+
+def _encode(message):
+    return (json.dumps(message, default=_default) + '\n').encode('utf-8')
+
+
+def _try_lock():
+    """Lock file descriptor if this process is now the leader, None if another one is"""
+    fd = os.open(LOCK_PATH, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(fd)
+        return None
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    return fd
+
+
+# =============================================================================
+# Leader
+# =============================================================================
+
+class _Follower:
+    """Connection of one follower worker, fed by its own writer thread"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.queue = queue.Queue(maxsize=FOLLOWER_QUEUE)
+        self.closed = False
+
+    def send(self, data):
+        try:
+            self.queue.put_nowait(data)
+        except queue.Full:
+            self.close()
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            try:
+                self.conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            try:
+                self.queue.put_nowait(None)  # wake the writer
+            except queue.Full:
+                pass  # writer is busy and sees closed
+
+
+class Leader:
+    """Owns the ESL subscriber, publishes its events to the followers"""
+
+    role = 'leader'
+
+    def __init__(self, lock_fd, buffer=None):
+        self.lock_fd = lock_fd
+        self.buffer = buffer
+        self.followers = []
+        self.followers_lock = threading.Lock()
+        self.server = None
+        self.running = False
+
+    def start(self):
+        self.running = True
+        esl_events.subscriber_factory = self._create_subscriber
+        esl_events.replace_subscriber(self._create_subscriber()).start()
+
+        if os.path.exists(SOCKET_PATH):
+            os.unlink(SOCKET_PATH)  # left by a previous leader - we hold the lock
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(SOCKET_PATH)
+        os.chmod(SOCKET_PATH, 0o600)
+        self.server.listen(16)
+        threading.Thread(target=self._accept, daemon=True).start()
+        threading.Thread(target=self._publish_status, daemon=True).start()
+        print(f"[EventBus] Worker {os.getpid()} is leader - serving events on {SOCKET_PATH}")
+
+    def stop(self):
+        self.running = False
+        if self.server is not None:
+            self.server.close()
+        with self.followers_lock:
+            for follower in self.followers:
+                follower.close()
+        esl_events.stop_subscriber()
+        os.close(self.lock_fd)
+
+    def _create_subscriber(self):
+        """ESL subscriber whose buffer changes go out on the bus"""
+        subscriber = esl_events.ESLEventSubscriber()
+        if self.buffer is not None:
+            subscriber.buffer, self.buffer = self.buffer, None
+        subscriber.listeners.append(self._publish)
+        return subscriber
+
+    def _publish(self, message):
+        data = _encode(message)
+        with self.followers_lock:
+            for follower in self.followers:
+                follower.send(data)
+
+    def _publish_status(self):
+        last = None
+        while self.running:
+            status = esl_events.get_subscriber().get_status()
+            status.pop('buffer_stats', None)
+            status.pop('breaker', None)  # every worker has its own breaker
+            data = _encode({'status': status})
+            if data != last:
+                last = data
+                with self.followers_lock:
+                    for follower in self.followers:
+                        follower.send(data)
+            time.sleep(STATUS_INTERVAL)
+
+    def _accept(self):
+        while self.running:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            follower = _Follower(conn)
+            subscriber = esl_events.get_subscriber()
+            # Backlog and registration under the publish lock: no event is missed or sent twice
+            with subscriber.publish_lock:
+                follower.send(_encode({'backlog': subscriber.buffer.get_recent(subscriber.buffer.buffer.maxlen)}))
+                with self.followers_lock:
+                    self.followers.append(follower)
+            threading.Thread(target=self._write, args=(follower,), daemon=True).start()
+            threading.Thread(target=self._read, args=(follower,), daemon=True).start()
+
+    def _write(self, follower):
+        try:
+            while True:
+                data = follower.queue.get()
+                if data is None or follower.closed:
+                    break
+                follower.conn.sendall(data)
+        except OSError:
+            pass
+        finally:
+            follower.close()
+            follower.conn.close()
+            with self.followers_lock:
+                if follower in self.followers:
+                    self.followers.remove(follower)
+
+    def _read(self, follower):
+        """Requests from a follower (buffer clear)"""
+        try:
+            for line in follower.conn.makefile('rb'):
+                message = json.loads(line)
+                if message.get('clear'):
+                    esl_events.get_subscriber().clear_events()
+        except (OSError, ValueError):
+            pass
+        finally:
+            follower.close()
+
+    def status(self):
+        with self.followers_lock:
+            followers = len(self.followers)
+        return {'role': self.role, 'pid': os.getpid(), 'socket': SOCKET_PATH, 'followers': followers}
+
+
+# =============================================================================
+# Follower
+# =============================================================================
+
+class BusSubscriber(esl_events.ESLEventSubscriber):
+    """Event subscriber of a follower worker - the events come from the leader"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.leader_status = {}
+        self.bus_connected = False
+        self.sock = None
+
+    def start(self):
+        """Follow the leader (no own FreeSWITCH connection)"""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._follow, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def _follow(self):
+        while self.running:
+            lock_fd = _try_lock()
+            if lock_fd is not None:
+                # Leader gone - take over with the events received so far
+                self.running = False
+                _promote(lock_fd, self.buffer)
+                return
+            try:
+                self._receive()
+            except (OSError, ValueError) as e:
+                self.last_error = str(e)
+            self.bus_connected = False
+            if self.running:
+                time.sleep(RECONNECT_DELAY)
+
+    def _receive(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self.sock.connect(SOCKET_PATH)
+            self.bus_connected = True
+            for line in self.sock.makefile('rb'):
+                message = json.loads(line)
+                if 'event' in message:
+                    record = esl_events.EventRecord.from_dict(message['event'])
+                    self.buffer.add(record)
+                    handler = esl_events.handler_for(record.type, record.subtype)
+                    if handler.hooks or esl_events.ALL_EVENT_HOOKS:
+                        esl_events.run_hooks(handler, record, record.headers or {})
+                    self.last_event_time = time.time()
+                elif 'status' in message:
+                    self.leader_status = message['status']
+                elif 'backlog' in message:
+                    self.buffer.clear()
+                    for event in message['backlog']:
+                        self.buffer.add(esl_events.EventRecord.from_dict(event))
+                elif message.get('clear'):
+                    self.buffer.clear()
+        finally:
+            self.sock.close()
+
+    def clear_events(self):
+        """Clear the buffer of all workers (through the leader)"""
+        try:
+            self.sock.sendall(_encode({'clear': True}))
+        except (AttributeError, OSError):
+            self.buffer.clear()
+
+    def get_status(self):
+        status = super().get_status()
+        status.update(self.leader_status)
+        status.update({
+            'connected': self.bus_connected and self.leader_status.get('connected', False),
+            'running': self.running,
+            'buffer_stats': self.buffer.stats(),
+            'breaker': esl_events.breaker.status(),
+            'bus_connected': self.bus_connected,
+        })
+        return status
+
+
+class Follower:
+    """Worker that reads the leader's events"""
+
+    role = 'follower'
+
+    def start(self):
+        esl_events.subscriber_factory = BusSubscriber
+        esl_events.replace_subscriber(BusSubscriber()).start()
+        print(f"[EventBus] Worker {os.getpid()} follows the leader on {SOCKET_PATH}")
+
+    def stop(self):
+        esl_events.stop_subscriber()
+
+    def status(self):
+        subscriber = esl_events.get_subscriber()
+        return {'role': self.role, 'pid': os.getpid(), 'socket': SOCKET_PATH,
+                'connected': getattr(subscriber, 'bus_connected', False)}
+
+
+# =============================================================================
+# Worker API
+# =============================================================================
+
+def _promote(lock_fd, buffer=None):
+    global _bus
+    with _lock:
+        _bus = Leader(lock_fd, buffer)
+        _bus.start()
+
+
+def start():
+    """Join the bus: become the leader if nobody is, follow it otherwise"""
+    global _bus
+    if not esl_events.ESL_AVAILABLE:
+        print("[EventBus] greenswitch not installed - no ESL events")
+        return
+    lock_fd = _try_lock()
+    if lock_fd is not None:
+        _promote(lock_fd)
+        return
+    with _lock:
+        _bus = Follower()
+        _bus.start()
+
+
+def stop():
+    """Leave the bus (worker exit) - a leader releases the lock for a follower"""
+    global _bus
+    with _lock:
+        if _bus is not None:
+            _bus.stop()
+            _bus = None
+
+
+def status():
+    """Role of this worker on the bus, None if the bus is not used"""
+    bus = _bus
+    return bus.status() if bus is not None else None
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+FreeSWITCH API Server - serves only the mod_xml_curl callbacks
+
+Runs the fs_callbacks blueprint on its own port (FS_API_PORT, default 8889)
+with gevent's WSGI server: one greenlet per connection, HTTP keep-alive, no
+admin UI routes, sessions or subprocess calls in the same process. Config is
+read through the same caches as the admin app (config_store indexes and
+directory_cache, rebuilt when the config file / DB changes), so both
+processes always answer from the current config.
+
+Started by docker-entrypoint.sh when FS_API_SERVER=true; provisioning then
+points xml_curl at this port (XML_CURL_PORT).
+"""
+
+import os
+
+from flask import Flask
+
+import config_store
+import fs_callbacks
+
+# Try to import gevent's WSGI server (installed with greenswitch)
+try:
+    from gevent.pywsgi import WSGIServer
+    GEVENT_AVAILABLE = True
+except ImportError:
+    WSGIServer = None
+    GEVENT_AVAILABLE = False
+
+# Same host FreeSWITCH is told to call (ADMIN_HOST in the xml_curl URL)
+FS_API_HOST = os.environ.get('FS_API_HOST') or os.environ.get('ADMIN_HOST') or '127.0.0.1'
+FS_API_PORT = int(os.environ.get('FS_API_PORT', 8889))
+
+app = Flask(__name__)
+app.register_blueprint(fs_callbacks.bp)
+
+
+@app.route('/health')
+def health():
+    return {'status': 'ok'}
+
+
+def main():
+    # Warm the caches so the first REGISTER does not pay for the build
+    config_store.get_indexes()
+    fs_callbacks.directory_cache.lookup('', '')
+
+    print(f"[FS-API] Serving FreeSWITCH callbacks on http://{FS_API_HOST}:{FS_API_PORT}")
+    if GEVENT_AVAILABLE:
+        # log=None: no access log line per REGISTER
+        server = WSGIServer((FS_API_HOST, FS_API_PORT), app, log=None)
+        server.serve_forever()
+    else:
+        print("[FS-API] WARNING: gevent not installed - using threaded development server")
+        app.run(host=FS_API_HOST, port=FS_API_PORT, threaded=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+FreeSWITCH Callbacks - endpoints FreeSWITCH calls via mod_xml_curl
+
+Registered on the admin app (same URLs as before) and served standalone by
+fs_api.py on its own port, so registrations do not wait behind admin UI
+requests. Handlers only read the shared config caches (directory_cache,
+route_matcher, config_store indexes) - no sessions, no subprocesses.
+"""
+
+from flask import Blueprint, request, current_app
+
+import directory_cache
+import route_matcher
+
+bp = Blueprint('freeswitch', __name__)
+
+################################################################################
+# Directory (Strict User Authentication)
+################################################################################
+
+@bp.route('/api/freeswitch/directory', methods=['POST'])
+def freeswitch_directory():
+    """
+    XML CURL endpoint for FreeSWITCH directory lookups.
+
+    This enables STRICT username validation - only users that exist in the
+    config can register. Without this, FreeSWITCH's digest auth can accept
+    any username if the password matches ANY user in the directory.
+
+    FreeSWITCH sends POST with:
+    - user: the username trying to authenticate
+    - domain: the SIP domain
+    - action: auth-check, user_call, etc.
+    """
+    # Get POST data from FreeSWITCH
+    user = request.form.get('user', '')
+    domain = request.form.get('domain', '')
+    action = request.form.get('action', '')
+    purpose = request.form.get('purpose', '')
+
+    # Log the request for debugging
+    current_app.logger.info(f"[XML_CURL] Directory lookup: user={user}, domain={domain}, action={action}, purpose={purpose}")
+
+    # Source of the SIP request: 'ip' is the packet source, sip_contact_host the Contact header
+    source_ip = request.form.get('ip', '') or request.form.get('sip_contact_host', '')
+
+    # Rate limits + negative cache, then the pre-rendered document (rebuilt only on config change)
+    xml_response, outcome = directory_cache.check(domain, user, source_ip)
+
+    if outcome == 'not_found':
+        # First miss for this username - repeats and rate-limited requests are only counted
+        current_app.logger.warning(f"[XML_CURL] REJECTED: User '{user}' not found in directory (from {source_ip or 'unknown'})")
+    elif outcome == 'found':
+        current_app.logger.info(f"[XML_CURL] User '{user}' found, returning directory entry")
+
+    return xml_response, 200, {'Content-Type': 'text/xml'}
+
+
+################################################################################
+# Dialplan (Routes from the Admin Config)
+################################################################################
+
+@bp.route('/api/freeswitch/dialplan', methods=['POST'])
+def freeswitch_dialplan():
+    """
+    XML CURL endpoint for FreeSWITCH dialplan lookups (XML_CURL_DIALPLAN=true).
+
+    Answers the default (outbound) and public (inbound) contexts from the
+    compiled routes, so route changes apply without reloadxml. Anything
+    else gets "not found" and FreeSWITCH uses the static dialplan XML.
+
+    FreeSWITCH sends POST with the channel variables, among them:
+    - Hunt-Context / Hunt-Destination-Number: context and dialed number
+    - Caller-Username: the calling user (user routes)
+    - variable_sip_req_params / variable_sip_from_host: inbound gateway match
+    """
+    context = request.form.get('Hunt-Context') or request.form.get('Caller-Context', '')
+    number = request.form.get('Hunt-Destination-Number') or request.form.get('Caller-Destination-Number', '')
+    username = request.form.get('Caller-Username', '')
+
+    xml_response, result = route_matcher.get_matcher().dialplan(
+        context, number, username,
+        sip_req_params=request.form.get('variable_sip_req_params', ''),
+        sip_from_host=request.form.get('variable_sip_from_host', ''),
+    )
+
+    if result is None:
+        current_app.logger.info(f"[XML_CURL] Dialplan: no route for {number} in '{context}' - static dialplan")
+    else:
+        current_app.logger.info(f"[XML_CURL] Dialplan: {number} in '{context}' -> {result['extension']}")
+
+    return xml_response, 200, {'Content-Type': 'text/xml'}
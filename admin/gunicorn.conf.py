@@ -0,0 +1,35 @@
+"""
+Gunicorn settings for the admin portal (multi-worker mode)
+
+docker-entrypoint.sh uses this when ADMIN_WORKERS is set:
+    gunicorn -c gunicorn.conf.py app:app
+
+Each worker joins the event bus after it starts: the first one takes the
+ESL subscription, the others receive its events over a Unix socket (see
+event_bus.py). The app is not preloaded, so no ESL thread exists before
+the fork.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('ADMIN_PORT', '8888')}"
+workers = int(os.environ.get('ADMIN_WORKERS', '2') or 2)
+# Threads per worker: FreeSWITCH queries block on the ESL socket
+worker_class = 'gthread'
+threads = int(os.environ.get('ADMIN_THREADS', '8'))
+# /api/routes/resolve streams large inputs, dashboard waits for FreeSWITCH
+timeout = 120
+graceful_timeout = 10
+preload_app = False
+accesslog = None
+errorlog = '-'
+
+
+def post_worker_init(worker):
+    import event_bus
+    event_bus.start()
+
+
+def worker_exit(server, worker):
+    import event_bus
+    event_bus.stop()
@@ -4,34 +4,43 @@
 
 local json = require("cjson")
 
--- Config file path
+-- Compact user table written by the admin app (config_store.write_users_index),
+-- full config as fallback for setups without the admin app
+local USERS_INDEX_FILE = "/var/lib/freeswitch/users_index.json"
 local CONFIG_FILE = "/var/lib/freeswitch/wrapper_config.json"
 
+-- LuaFileSystem is optional (full config fallback only): with it the cache
+-- is validated by mtime + size, without it by comparing the file content
+local has_lfs, lfs = pcall(require, "lfs")
+
+-- Module-level cache: kept as long as this Lua state lives
+-- { path = ..., stamp = ..., users = {...} }
+local cache = nil
+
 -- Log function
 local function log(level, msg)
     freeswitch.consoleLog(level, "[AUTH] " .. msg .. "\n")
 end
 
--- Load users from config
-local function load_users()
-    local file = io.open(CONFIG_FILE, "r")
+-- Read a file, nil if it cannot be opened
+local function read_file(path)
+    local file = io.open(path, "r")
     if not file then
-        log("ERR", "Cannot open config file: " .. CONFIG_FILE)
-        return {}
+        return nil
     end
-
     local content = file:read("*all")
     file:close()
+    return content
+end
 
-    local ok, config = pcall(json.decode, content)
-    if not ok or not config then
-        log("ERR", "Failed to parse config JSON")
-        return {}
+-- Build the users table from a decoded users_index.json or full config
+local function users_from(path, data)
+    if path == USERS_INDEX_FILE then
+        return data.users or {}
     end
-
     local users = {}
-    if config.users then
-        for _, user in ipairs(config.users) do
+    if data.users then
+        for _, user in ipairs(data.users) do
             if user.username and user.password and user.enabled ~= false then
                 users[user.username] = {
                     password = user.password,
@@ -40,11 +49,74 @@ local function load_users()
             end
         end
     end
+    return users
+end
+
+-- Parse content and cache the users table under stamp
+local function parse(path, content, stamp)
+    local ok, data = pcall(json.decode, content)
+    if not ok or type(data) ~= "table" then
+        log("ERR", "Failed to parse " .. path)
+        return {}
+    end
+
+    local users = users_from(path, data)
+    -- table.getn only counts array entries - count the keys
+    local count = 0
+    for _ in pairs(users) do
+        count = count + 1
+    end
+    log("INFO", "Loaded " .. count .. " users from " .. path)
 
-    log("INFO", "Loaded " .. table.getn(users) .. " users from config")
+    cache = { path = path, stamp = stamp, users = users }
     return users
 end
 
+-- Load users, parsing only when the file changed since the last call
+local function load_users()
+    -- users_index.json starts with {"version":"<content hash>" - only that
+    -- prefix is read while the version is unchanged
+    local file = io.open(USERS_INDEX_FILE, "r")
+    if file then
+        local head = file:read(64) or ""
+        local version = head:match('^{"version":"(%x+)"')
+        if version and cache and cache.path == USERS_INDEX_FILE and cache.stamp == version then
+            file:close()
+            return cache.users
+        end
+        local content = head .. (file:read("*all") or "")
+        file:close()
+        return parse(USERS_INDEX_FILE, content, version or content)
+    end
+
+    local path = CONFIG_FILE
+    local stamp = nil
+    if has_lfs then
+        local attr = lfs.attributes(path)
+        -- mtime has 1 s resolution: a file modified within the last second
+        -- can change again under the same stamp, compare its content instead
+        if attr and attr.modification < os.time() - 1 then
+            stamp = attr.modification .. ":" .. attr.size
+            if cache and cache.path == path and cache.stamp == stamp then
+                return cache.users
+            end
+        end
+    end
+
+    local content = read_file(path)
+    if not content then
+        log("ERR", "Cannot open config file: " .. CONFIG_FILE)
+        return {}
+    end
+    if not stamp then
+        stamp = content
+        if cache and cache.path == path and cache.stamp == stamp then
+            return cache.users
+        end
+    end
+    return parse(path, content, stamp)
+end
+
 -- Main auth function
 local function auth_user(username, domain, password_param)
     log("INFO", "Auth request for user: " .. tostring(username) .. "@" .. tostring(domain))
@@ -0,0 +1,1296 @@
+#!/usr/bin/env python3
+"""
+Provisioning - Python engine for the FreeSWITCH XML configuration
+
+Renders the same files as provision.sh (JSON config mode) in one process:
+the config is read once and every file is built from the templates below,
+instead of one jq call per field. Output is byte-identical to provision.sh
+on the same config, including its jq quirks (null/false values fall back to
+the default; "enabled" is the exception, false disables the entry like in
+export_for_provision).
+
+Runs are incremental: $FS_CONF/.provision_manifest.json keeps a hash per
+written file, only files whose content changed are rewritten, generated
+files that are no longer rendered are deleted, and the changed set is
+returned so callers only reload what is needed (reload_commands).
+
+Used by docker-entrypoint.sh (PROVISION_ENGINE=python) and by the admin
+apply endpoint. ENV-only setups (no JSON config) still go through
+provision.sh - main() exits with code 2 so the entrypoint can fall back.
+
+Usage: python provisioning.py [--fs-conf DIR] [--no-backup] [--no-apply]
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tarfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import config_store
+
+FS_CONF = os.environ.get('FS_CONF', '/etc/freeswitch')
+BACKUP_DIR = os.environ.get('BACKUP_DIR', '/var/backups/freeswitch')
+ROUTING_CONFIG_FILE = '/var/lib/freeswitch/routing_config.json'
+DEFAULT_USER_AGENT = 'InsideDynamic-Wrapper'
+
+# Globs removed before writing (same as clean_config in provision.sh)
+CLEAN_GLOBS = (
+    'dialplan/default/*.xml',
+    'dialplan/public/*.xml',
+    'directory/default/*.xml',
+    'directory/default.xml',
+    'sip_profiles/external/*.xml',
+    'sip_profiles/internal/*.xml',
+    'sip_profiles/internal.xml',
+    'sip_profiles/external.xml',
+)
+# Hashes of the files written by the last run (see plan_files)
+MANIFEST_FILE = '.provision_manifest.json'
+# Changing these needs the SIP profiles rescanned
+PROFILE_FILES = ('vars.xml', 'sip_profiles/internal.xml', 'sip_profiles/external.xml')
+# Route dialplan files: with XML_CURL_DIALPLAN=true route_matcher answers from the
+# config, these are only the fallback and need no reloadxml of their own
+ROUTE_FILES = ('dialplan/default/000_user_routing.xml', 'dialplan/default/00_outbound.xml',
+               'dialplan/public/00_inbound.xml')
+CONF_DIRS = ('dialplan/default', 'dialplan/public', 'directory/default',
+             'sip_profiles/internal', 'sip_profiles/external', 'autoload_configs')
+
+
+class ProvisionError(Exception):
+    """Config cannot be provisioned (same cases where provision.sh exits 1)"""
+
+
+def _log(message):
+    print(f"[{datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S UTC')}] {message}")
+
+
+def _env(name, default=''):
+    """${NAME:-default} - unset and empty both give the default"""
+    return os.environ.get(name) or default
+
+
+# =============================================================================
+# jq semantics
+# =============================================================================
+
+def _get(obj, *path):
+    """Walk dict keys / list indexes like a jq path, None where jq gives null"""
+    for key in path:
+        if isinstance(key, int):
+            if not isinstance(obj, list) or key >= len(obj):
+                return None
+        elif not isinstance(obj, dict) or key not in obj:
+            return None
+        obj = obj[key]
+    return obj
+
+
+def _jq(value, default=''):
+    """Value as `jq -r '.x // default'` prints it inside $(...)"""
+    if value is None or value is False:
+        return default
+    if value is True:
+        return 'true'
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    if isinstance(value, (dict, list)):
+        value = json.dumps(value, indent=2, ensure_ascii=False)
+    # Command substitution drops trailing newlines
+    return str(value).rstrip('\n')
+
+
+def _jq_raw(value):
+    """Value as `jq -r '.x'` (no alternative) prints it"""
+    if value is None:
+        return 'null'
+    if value is False:
+        return 'false'
+    return _jq(value)
+
+
+def _enabled(item):
+    """`enabled` as provision.sh reads it: missing/null = true, false = disabled"""
+    value = _get(item, 'enabled')
+    return _jq(True if value is None else value) == 'true'
+
+
+def _value(config, path, default=''):
+    """get_json_value from provision.sh: default for empty, null and "null" """
+    value = _jq(_get(config, *path))
+    if value and value != 'null':
+        return value
+    return default
+
+
+def _length(value):
+    """`jq 'x | length // 0'`"""
+    if isinstance(value, (list, dict, str)):
+        return len(value)
+    return 0
+
+
+def _items(config, *path):
+    value = _get(config, *path)
+    return value if isinstance(value, list) else []
+
+
+def _file_name(name, kind):
+    """provision.sh writes <name>.xml - refuse names that leave the directory"""
+    if '/' in name or name in ('.', '..'):
+        raise ProvisionError(f"Invalid {kind} name for a file: {name!r}")
+    return name
+
+
+# =============================================================================
+# Templates
+# =============================================================================
+
+VARS_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <!-- Global Variables -->
+  <X-PRE-PROCESS cmd="set" data="domain=%(domain)s"/>
+  <X-PRE-PROCESS cmd="set" data="external_sip_ip=%(ext_sip)s"/>
+  <X-PRE-PROCESS cmd="set" data="external_rtp_ip=%(ext_rtp)s"/>
+
+  <!-- Network Settings -->
+  <X-PRE-PROCESS cmd="set" data="internal_sip_port=%(int_port)s"/>
+  <X-PRE-PROCESS cmd="set" data="external_sip_port=%(ext_port)s"/>
+
+  <!-- RTP Port Range -->
+  <X-PRE-PROCESS cmd="set" data="rtp_start_port=%(rtp_start)s"/>
+  <X-PRE-PROCESS cmd="set" data="rtp_end_port=%(rtp_end)s"/>
+
+  <!-- SIP Settings -->
+  <X-PRE-PROCESS cmd="set" data="sip_tls_version=%(tls_version)s"/>
+
+  <!-- Codec Settings -->
+  <X-PRE-PROCESS cmd="set" data="global_codec_prefs=%(codec)s"/>
+  <X-PRE-PROCESS cmd="set" data="outbound_codec_prefs=%(out_codec)s"/>
+</include>
+'''
+
+MODULES_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<configuration name="modules.conf" description="Modules">
+  <modules>
+    <!-- Loggers -->
+    <load module="mod_console"/>
+    <load module="mod_logfile"/>
+
+    <!-- XML Interfaces - CRITICAL: mod_xml_curl for strict user auth -->
+    <load module="mod_xml_curl"/>
+
+    <!-- Event Handlers -->
+    <load module="mod_event_socket"/>
+
+    <!-- Applications -->
+    <load module="mod_commands"/>
+    <load module="mod_dptools"/>
+    <load module="mod_dialplan_xml"/>
+    <load module="mod_sofia"/>
+    <load module="mod_db"/>
+    <load module="mod_hash"/>
+
+    <!-- Codecs -->
+    <load module="mod_g711"/>
+    <load module="mod_g729"/>
+    <load module="mod_opus"/>
+    <load module="mod_amr"/>
+
+    <!-- File Formats -->
+    <load module="mod_sndfile"/>
+    <load module="mod_native_file"/>
+    <load module="mod_tone_stream"/>
+
+    <!-- Speech -->
+    <load module="mod_spandsp"/>
+
+    <!-- Languages -->
+    <load module="mod_say_en"/>
+    <load module="mod_say_de"/>
+  </modules>
+</configuration>
+'''
+
+EVENT_SOCKET_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<configuration name="event_socket.conf" description="Socket Client">
+  <settings>
+    <param name="nat-map" value="false"/>
+    <param name="listen-ip" value="::"/>
+    <param name="listen-port" value="%(port)s"/>
+    <param name="password" value="%(password)s"/>
+    <param name="apply-inbound-acl" value="%(acl)s"/>
+  </settings>
+</configuration>
+'''
+
+XML_CURL_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<configuration name="xml_curl.conf" description="XML CURL for Dynamic Directory">
+  <bindings>
+    <!-- Directory binding for strict user authentication -->
+    <!-- Only users that exist in the config can register -->
+    <binding name="directory">
+      <param name="gateway-url" value="%(url)s" bindings="directory"/>
+      <param name="method" value="POST"/>
+      <param name="timeout" value="5"/>
+      <!-- Disable caching to always get fresh user data -->
+      <param name="disable-100-continue" value="true"/>
+    </binding>%(dialplan_binding)s
+  </bindings>
+</configuration>
+'''
+XML_CURL_DIALPLAN_BINDING = '''
+    <!-- Dialplan binding: routes answered from the admin config (no reloadxml) -->
+    <!-- Calls without a matching route fall back to the static dialplan XML -->
+    <binding name="dialplan">
+      <param name="gateway-url" value="%s" bindings="dialplan"/>
+      <param name="method" value="POST"/>
+      <param name="timeout" value="5"/>
+      <param name="disable-100-continue" value="true"/>
+    </binding>'''
+
+INTERNAL_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<profile name="internal">
+  <settings>
+    <!-- Network -->
+    <param name="sip-ip" value="$${local_ip_v4}"/>
+    <param name="ext-sip-ip" value="$${external_sip_ip}"/>
+    <param name="sip-port" value="$${internal_sip_port}"/>
+
+    <!-- RTP -->
+    <param name="rtp-ip" value="$${local_ip_v4}"/>
+    <param name="ext-rtp-ip" value="$${external_rtp_ip}"/>
+    <param name="rtp-start-port" value="$${rtp_start_port}"/>
+    <param name="rtp-end-port" value="$${rtp_end_port}"/>
+
+    <!-- Security -->
+    <param name="auth-calls" value="true"/>
+    <param name="auth-all-packets" value="false"/>
+    <param name="accept-blind-auth" value="false"/>
+    <param name="accept-blind-reg" value="false"/>
+    <!-- CRITICAL: Force username to match directory entry -->
+    <!-- Without this, ANY password from directory may work for ANY username -->
+    <param name="inbound-reg-force-matching-username" value="true"/>
+
+    <!-- NAT Handling -->
+    <param name="apply-nat-acl" value="rfc1918.auto"/>
+    <param name="apply-inbound-acl" value="%(inbound_acl)s"/>
+    %(register_acl_line)s
+    <param name="local-network-acl" value="localnet.auto"/>
+
+    <!-- NAT Traversal - CRITICAL: Fix audio for clients behind NAT -->
+    <!-- Force rport: always use source IP/port from packet, not SIP headers -->
+    <param name="NDLB-force-rport" value="safe"/>
+    <!-- Store actual received IP in registration contact -->
+    <param name="NDLB-received-in-nat-reg-contact" value="true"/>
+    <!-- Fix RTP going to wrong IP: rewrite SDP with detected public IP -->
+    <param name="NDLB-sendrecv-in-session" value="true"/>
+    <!-- Force symmetric RTP: always send to where packets come from -->
+    <param name="NDLB-connectile-dysfunction" value="true"/>
+    <!-- Force media through FreeSWITCH - required for NAT traversal -->
+    <param name="inbound-bypass-media" value="false"/>
+
+    <!-- Registration -->
+    <param name="force-register-domain" value="$${domain}"/>
+    <param name="force-register-db-domain" value="$${domain}"/>
+    <param name="force-subscription-domain" value="$${domain}"/>
+
+    <!-- Context -->
+    <param name="context" value="default"/>
+    <param name="dialplan" value="XML"/>
+
+    <!-- DTMF -->
+    <param name="dtmf-type" value="rfc2833"/>
+    <param name="dtmf-duration" value="2000"/>
+
+    <!-- Codecs -->
+    <param name="inbound-codec-prefs" value="$${global_codec_prefs}"/>
+    <param name="outbound-codec-prefs" value="$${outbound_codec_prefs}"/>
+    <param name="inbound-codec-negotiation" value="generous"/>
+
+    <!-- SIP -->
+    <param name="nonce-ttl" value="60"/>
+    <param name="aggressive-nat-detection" value="true"/>
+    <param name="disable-register" value="false"/>
+    <param name="disable-transfer" value="false"/>
+    <param name="manual-redirect" value="false"/>
+    <!-- Custom User-Agent: hide FreeSWITCH identity -->
+    <param name="user-agent-string" value="%(user_agent)s"/>
+
+    <!-- Caller ID Passthrough - show original client info -->
+    <param name="pass-callee-id" value="true"/>
+    <param name="caller-id-type" value="rpid"/>
+
+    <!-- Media - disable late negotiation to establish RTP earlier -->
+    <param name="inbound-late-negotiation" value="false"/>
+    <param name="inbound-zrtp-passthru" value="true"/>
+    <!-- Force symmetric RTP for NAT -->
+    <param name="enable-soa" value="true"/>
+
+    <!-- RTP NAT Fix: Handle clients behind NAT properly -->
+    <param name="rtp-autoflush-during-bridge" value="true"/>
+    <param name="rtp-rewrite-timestamps" value="true"/>
+    <param name="rtp-timeout-sec" value="300"/>
+    <param name="rtp-hold-timeout-sec" value="1800"/>
+
+    <!-- Debug -->
+    <param name="debug" value="%(sip_debug)s"/>
+    <param name="sip-trace" value="%(sip_trace)s"/>
+    <param name="log-auth-failures" value="true"/>
+    <param name="log-level" value="info"/>
+  </settings>
+</profile>
+'''
+
+EXTERNAL_BLACKLIST_ACL = '''
+    <!-- Blacklist ACL -->
+    <param name="apply-inbound-acl" value="blacklist"/>'''
+
+EXTERNAL_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<profile name="external">
+  <gateways>
+    <!-- Gateways will be included here -->
+    <X-PRE-PROCESS cmd="include" data="external/*.xml"/>
+  </gateways>
+
+  <settings>
+    <!-- Network -->
+    <param name="sip-ip" value="$${local_ip_v4}"/>
+    <param name="ext-sip-ip" value="$${external_sip_ip}"/>
+    <param name="sip-port" value="$${external_sip_port}"/>
+
+    <!-- RTP -->
+    <param name="rtp-ip" value="$${local_ip_v4}"/>
+    <param name="ext-rtp-ip" value="$${external_rtp_ip}"/>
+    <param name="rtp-start-port" value="$${rtp_start_port}"/>
+    <param name="rtp-end-port" value="$${rtp_end_port}"/>
+
+    <!-- Security -->
+    <param name="auth-calls" value="false"/>
+    <param name="auth-all-packets" value="false"/>
+    <param name="accept-blind-auth" value="true"/>
+    <param name="accept-blind-reg" value="true"/>
+
+    <!-- NAT -->
+    <param name="apply-nat-acl" value="rfc1918.auto"/>
+    <param name="local-network-acl" value="localnet.auto"/>
+%(blacklist_acl)s
+    <!-- Context -->
+    <param name="context" value="public"/>
+    <param name="dialplan" value="XML"/>
+
+    <!-- DTMF -->
+    <param name="dtmf-type" value="rfc2833"/>
+    <param name="dtmf-duration" value="2000"/>
+
+    <!-- Codecs -->
+    <param name="inbound-codec-prefs" value="$${global_codec_prefs}"/>
+    <param name="outbound-codec-prefs" value="$${outbound_codec_prefs}"/>
+    <param name="inbound-codec-negotiation" value="generous"/>
+
+    <!-- SIP -->
+    <param name="aggressive-nat-detection" value="true"/>
+    <!-- SECURITY: Disable registrations on external profile (port 5080) -->
+    <!-- Gateways/trunks don't register TO us - we register TO them -->
+    <!-- All user registrations must go through internal profile (port 5060) with auth -->
+    <param name="disable-register" value="true"/>
+    <param name="disable-transfer" value="false"/>
+    <param name="manual-redirect" value="false"/>
+    <!-- Custom User-Agent: hide FreeSWITCH identity -->
+    <param name="user-agent-string" value="%(user_agent)s"/>
+
+    <!-- Media -->
+    <param name="inbound-late-negotiation" value="true"/>
+    <param name="inbound-zrtp-passthru" value="true"/>
+
+    <!-- Caller ID Passthrough - show original client info, not FreeSWITCH -->
+    <param name="pass-callee-id" value="true"/>
+    <param name="caller-id-type" value="rpid"/>
+
+    <!-- Debug -->
+    <param name="debug" value="%(sip_debug)s"/>
+    <param name="sip-trace" value="%(sip_trace)s"/>
+    <param name="log-level" value="info"/>
+  </settings>
+</profile>
+'''
+
+DIRECTORY_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <domain name="$${domain}">
+    <params>
+      <param name="dial-string" value="{^^:sip_invite_domain=$${domain}:presence_id=${dialed_user}@$${domain}}{${sofia_contact(${dialed_user}@$${domain})}}"/>
+      <param name="jsonrpc-allowed-methods" value="verto"/>
+    </params>
+
+    <variables>
+      <variable name="record_stereo" value="true"/>
+      <variable name="default_gateway" value="$${default_gateway}"/>
+      <variable name="default_areacode" value="$${default_areacode}"/>
+      <variable name="transfer_fallback_extension" value="operator"/>
+    </variables>
+
+    <groups>
+      <group name="default">
+        <users>
+          <X-PRE-PROCESS cmd="include" data="default/*.xml"/>
+        </users>
+      </group>
+    </groups>
+  </domain>
+</include>
+'''
+
+USER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <user id="%(username)s" number-alias="%(extension)s">
+    <params>
+      <param name="password" value="%(password)s"/>
+      <param name="vm-password" value="%(password)s"/>
+    </params>
+    <variables>
+      <variable name="user_context" value="default"/>
+      <variable name="effective_caller_id_number" value="%(caller_id)s"/>
+      <variable name="effective_caller_id_name" value="%(username)s"/>
+      <variable name="outbound_caller_id_number" value="%(caller_id)s"/>
+      <variable name="outbound_caller_id_name" value="%(username)s"/>
+      <!-- NAT Traversal - applied to ALL calls from this user -->
+      <variable name="rtp_auto_adjust" value="true"/>
+      <variable name="sip_comedia" value="true"/>
+      <variable name="bypass_media" value="false"/>
+      <variable name="sip_nat_detected" value="true"/>
+    </variables>
+  </user>
+</include>
+'''
+
+ACL_USER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <user id="%(username)s" number-alias="%(extension)s">
+    <params>
+      <param name="a1-hash" value="disabled"/>
+    </params>
+    <variables>
+      <variable name="user_context" value="default"/>
+      <variable name="effective_caller_id_number" value="%(caller_id)s"/>
+      <variable name="effective_caller_id_name" value="%(username)s"/>
+      <variable name="outbound_caller_id_number" value="%(caller_id)s"/>
+      <variable name="outbound_caller_id_name" value="%(username)s"/>
+    </variables>
+  </user>
+</include>
+'''
+
+ACL_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<configuration name="acl.conf" description="Network Lists">
+  <network-lists>
+    <list name="domains" default="deny">
+      <node type="allow" domain="$${domain}"/>
+    </list>
+    <!-- ACL for IP-based authentication (no password required) -->
+    <list name="acl_users" default="deny">
+'''
+ACL_ALLOW_NODE = '      <node type="allow" cidr="%s"/>\n'
+ACL_LIST_END = '    </list>\n'
+ACL_BLACKLIST_HEADER = '''    <!-- Blacklist - blocked IPs -->
+    <list name="blacklist" default="allow">
+'''
+ACL_DENY_NODE = '      <node type="deny" cidr="%s"/>\n'
+ACL_FOOTER = '''  </network-lists>
+</configuration>
+'''
+
+GATEWAY_HEADER = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <gateway name="%(name)s">
+'''
+GATEWAY_USER = '''    <param name="username" value="%(username)s"/>
+    <param name="from-user" value="%(from_user)s"/>
+'''
+GATEWAY_AUTH_USER = '    <param name="auth-username" value="%s"/>\n'
+GATEWAY_PASSWORD = '    <param name="password" value="%s"/>\n'
+GATEWAY_FOOTER = '''    <param name="realm" value="%(host)s"/>
+    <param name="from-domain" value="%(host)s"/>
+    <param name="proxy" value="%(host)s:%(port)s"/>
+    <param name="register" value="%(register)s"/>
+    <param name="register-transport" value="%(transport)s"/>
+    <param name="retry-seconds" value="30"/>
+    <param name="expire-seconds" value="600"/>
+    <param name="caller-id-in-from" value="false"/>
+    <param name="extension-in-contact" value="true"/>
+    <!-- contact-params: empty to keep Contact clean -->
+    <param name="contact-params" value=""/>
+  </gateway>
+</include>
+'''
+
+LOCAL_EXTENSION_XML = '''
+    <!-- Route calls to local extensions (1000-1999) -->
+    <extension name="local_extensions">
+      <condition field="destination_number" expression="^(1[0-9]{3})$">
+        <!-- NAT Traversal: use real IP from SIP packets, not SDP -->
+        <action application="export" data="rtp_auto_adjust=true"/>
+        <action application="export" data="sip_comedia=true"/>
+        <action application="set" data="hangup_after_bridge=true"/>
+        <action application="set" data="continue_on_fail=true"/>
+        <!-- Lookup user by extension (number-alias) and get real username, then call -->
+        <action application="set" data="target_user=${user_data(${destination_number}@$${domain} attr id)}"/>
+        <action application="bridge" data="${sofia_contact(${target_user}@$${domain})}"/>
+      </condition>
+    </extension>
+'''
+LOCAL_EXTENSIONS_XML = ('<!-- Local extension routing - included by default.xml wrapper -->\n'
+                        + LOCAL_EXTENSION_XML)
+
+# Shared body of every outbound bridge extension
+_BRIDGE_ACTIONS = '''        <action application="set" data="effective_caller_id_number=${outbound_caller_id_number}"/>
+        <action application="set" data="effective_caller_id_name=${outbound_caller_id_name}"/>
+        <!-- NAT Traversal: ignore SDP address, use real IP from SIP packets -->
+        <action application="export" data="rtp_auto_adjust=true"/>
+        <action application="export" data="sip_comedia=true"/>
+        <action application="set" data="ignore_sdp_addr=true"/>
+        <action application="set" data="hangup_after_bridge=true"/>
+'''
+
+USER_ROUTING_HEADER = '<!-- User-based outbound routing - HIGHEST PRIORITY (processed before default gateway) -->\n'
+USER_ROUTE_COMMENT = '''
+    <!-- User %(username)s routes to gateway %(gateway)s -->
+'''
+# One extension per number format, in dialplan order (see route_matcher.NUMBER_FORMATS)
+USER_ROUTE_EXTENSIONS = ('''
+    <!-- International format: +49... or 00... -->
+    <extension name="user_%(username)s_international">
+      <condition field="username" expression="^%(username)s$"/>
+      <condition field="destination_number" expression="^(\\+|00)(.+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/$1$2"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- Country code format: 49... → +49... -->
+    <extension name="user_%(username)s_with_country_code">
+      <condition field="username" expression="^%(username)s$"/>
+      <condition field="destination_number" expression="^(%(country_code)s[1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+$1"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- National format: 0123... → +49123... -->
+    <extension name="user_%(username)s_national">
+      <condition field="username" expression="^%(username)s$"/>
+      <condition field="destination_number" expression="^0([1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+%(country_code)s$1"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- Default: add country code -->
+    <extension name="user_%(username)s_default">
+      <condition field="username" expression="^%(username)s$"/>
+      <condition field="destination_number" expression="^([1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+%(country_code)s$1"/>
+      </condition>
+    </extension>
+''')
+USER_ROUTE_XML = USER_ROUTE_COMMENT + ''.join(USER_ROUTE_EXTENSIONS)
+
+OUTBOUND_HEADER = '<!-- Outbound dialplan rules - included by default.xml wrapper -->\n'
+OUTBOUND_DEFAULT_EXTENSIONS = ('''
+    <!-- Normalize international format: +49... or 00... -->
+    <extension name="outbound_international">
+      <condition field="destination_number" expression="^(\\+|00)(.+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/$1$2"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- Numbers already with country code: 49123... → +49123... -->
+    <extension name="outbound_with_country_code">
+      <condition field="destination_number" expression="^(%(country_code)s[1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+$1"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- Normalize national format: 0123... → +49123... -->
+    <extension name="outbound_national">
+      <condition field="destination_number" expression="^0([1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+%(country_code)s$1"/>
+      </condition>
+    </extension>
+''', '''
+    <!-- Fallback: no prefix, add country code -->
+    <extension name="outbound_default">
+      <condition field="destination_number" expression="^([1-9][0-9]+)$">
+''' + _BRIDGE_ACTIONS + '''        <action application="bridge" data="sofia/gateway/%(gateway)s/+%(country_code)s$1"/>
+      </condition>
+    </extension>
+''')
+OUTBOUND_DEFAULT_XML = ''.join(OUTBOUND_DEFAULT_EXTENSIONS)
+OUTBOUND_ROUTE_HEADER = '''
+    <!-- Route: %(pattern)s via %(gateway)s -->
+    <extension name="outbound_%(gateway)s_%(index)s">
+      <condition field="destination_number" expression="^(%(pattern)s)$">
+'''
+OUTBOUND_ROUTE_STRIP = '''        <action application="set" data="effective_caller_id_number=${outbound_caller_id_number}"/>
+        <action application="set" data="effective_caller_id_name=${outbound_caller_id_name}"/>
+        <action application="set" data="stripped_number=${regex($1|^%s(.*)|$1)}"/>
+'''
+OUTBOUND_ROUTE_PREPEND = '        <action application="set" data="final_number=%s"/>\n'
+OUTBOUND_ROUTE_FOOTER = '''        <!-- NAT Traversal: ignore SDP address, use real IP from SIP packets -->
+        <action application="export" data="rtp_auto_adjust=true"/>
+        <action application="export" data="sip_comedia=true"/>
+        <action application="set" data="ignore_sdp_addr=true"/>
+        <action application="set" data="hangup_after_bridge=true"/>
+        <action application="bridge" data="sofia/gateway/%(gateway)s/%(dial_number)s"/>
+      </condition>
+    </extension>
+'''
+
+INBOUND_HEADER = '''<!-- Inbound dialplan rules - included by public.xml wrapper -->
+<!-- Routes match on 'gw=' parameter from SIP request URI (e.g., gw=fritz-rt) -->
+'''
+INBOUND_TO_GATEWAY_XML = '''
+    <!-- Inbound: gateway %(gateway)s -> outbound gateway %(out_gateway)s -->
+    <extension name="inbound_%(gateway)s">
+      <condition field="${sip_req_params}" expression="(^|;)gw=%(gateway)s($|;)">
+        <action application="set" data="domain_name=$${domain}"/>
+        <action application="export" data="rtp_auto_adjust=true"/>
+        <action application="export" data="sip_comedia=true"/>
+        <action application="set" data="hangup_after_bridge=true"/>
+        <action application="bridge" data="sofia/gateway/%(out_gateway)s/${destination_number}"/>
+      </condition>
+    </extension>
+'''
+INBOUND_TO_EXTENSION_XML = '''
+    <!-- Inbound: gateway %(gateway)s -> extension %(extension)s (via gw= parameter) -->
+    <extension name="inbound_%(gateway)s">
+      <condition field="${sip_req_params}" expression="(^|;)gw=%(gateway)s($|;)">
+        <action application="set" data="domain_name=$${domain}"/>
+        <action application="transfer" data="%(extension)s XML default"/>
+      </condition>
+    </extension>
+'''
+INBOUND_VIA_REGISTRATION_XML = '''
+    <!-- Inbound: gateway %(gateway)s -> extension %(extension)s (via registered gateway) -->
+    <!-- This handles calls from PBX systems (like 3CX) that send to registered contact without gw= param -->
+    <!-- Matches on sip_from_host containing gateway host domain -->
+    <extension name="inbound_%(gateway)s_via_registration">
+      <condition field="${sip_from_host}" expression="%(host)s" break="on-false"/>
+      <condition field="destination_number" expression="^(.+)$">
+        <action application="set" data="domain_name=$${domain}"/>
+        <action application="log" data="INFO Inbound from registered gateway %(gateway)s (host %(host)s) to extension %(extension)s"/>
+        <action application="transfer" data="%(extension)s XML default"/>
+      </condition>
+    </extension>
+'''
+INBOUND_DEFAULT_GATEWAY_XML = '''
+    <!-- Default inbound route to gateway -->
+    <extension name="inbound_default">
+      <condition field="destination_number" expression="^(.+)$">
+        <action application="set" data="domain_name=$${domain}"/>
+        <action application="export" data="rtp_auto_adjust=true"/>
+        <action application="export" data="sip_comedia=true"/>
+        <action application="set" data="hangup_after_bridge=true"/>
+        <action application="bridge" data="sofia/gateway/%s/$1"/>
+      </condition>
+    </extension>
+'''
+INBOUND_DEFAULT_XML = '''
+    <!-- Default inbound route -->
+    <extension name="inbound_default">
+      <condition field="destination_number" expression="^(.+)$">
+        <action application="set" data="domain_name=$${domain}"/>
+        <action application="transfer" data="%s XML default"/>
+      </condition>
+    </extension>
+'''
+
+DIALPLAN_WRAPPER_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<include>
+  <context name="%(context)s">
+    <X-PRE-PROCESS cmd="include" data="%(context)s/*.xml"/>
+  </context>
+</include>
+'''
+
+_GATEWAY_REF = re.compile(r'gateway@(.+)', re.S)
+
+
+# =============================================================================
+# Rendering
+# =============================================================================
+
+def build_user_agent(config):
+    """SIP User-Agent string, same rules as build_user_agent in provision.sh"""
+    custom_ua = _value(config, ('settings', 'sip_user_agent'))
+    if custom_ua and custom_ua != DEFAULT_USER_AGENT:
+        return custom_ua
+    env_ua = os.environ.get('SIP_USER_AGENT', '')
+    if env_ua and env_ua != DEFAULT_USER_AGENT:
+        return env_ua
+    license_key = _value(config, ('license', 'key'), 'UNLICENSED')
+    client = _value(config, ('license', 'client_name'))
+    if client:
+        return f"{DEFAULT_USER_AGENT}-({license_key})-{client.replace(' ', '_')}"
+    return f"{DEFAULT_USER_AGENT}-({license_key})"
+
+
+def validate(config):
+    """Raise ProvisionError where provision.sh would stop (validate_config)"""
+    if not _value(config, ('settings', 'fs_domain')):
+        raise ProvisionError("JSON config: settings.fs_domain is required")
+    if _length(_get(config, 'users')) == 0 and _length(_get(config, 'gateways')) == 0:
+        raise ProvisionError("JSON config: At least one user or gateway must be defined")
+
+
+def _render_vars(config):
+    return VARS_XML % {
+        'domain': _value(config, ('settings', 'fs_domain'), _env('FS_DOMAIN')),
+        'ext_sip': _value(config, ('settings', 'external_sip_ip'), _env('EXTERNAL_SIP_IP')),
+        'ext_rtp': _value(config, ('settings', 'external_rtp_ip'), _env('EXTERNAL_RTP_IP')),
+        'int_port': _value(config, ('settings', 'internal_sip_port'), _env('INTERNAL_SIP_PORT', '5060')),
+        'ext_port': _value(config, ('settings', 'external_sip_port'), _env('EXTERNAL_SIP_PORT', '5080')),
+        'rtp_start': _env('RTP_START_PORT', '16384'),
+        'rtp_end': _env('RTP_END_PORT', '32768'),
+        'tls_version': _env('SIP_TLS_VERSION', 'tlsv1.2'),
+        'codec': _value(config, ('settings', 'codec_prefs'), 'PCMU,PCMA,G729,opus'),
+        'out_codec': _value(config, ('settings', 'outbound_codec_prefs'), 'PCMU,PCMA,G729'),
+    }
+
+
+def _render_event_socket():
+    acl_value = _env('API_ACL', _env('FS_ALLOWED_IPS', '127.0.0.1'))
+    acl = 'loopback.auto' if acl_value == '127.0.0.1' else 'any_v4.auto'
+    return EVENT_SOCKET_XML % {
+        'port': _env('API_PORT', _env('FS_PORT', '8021')),
+        'password': _env('APIKEY', _env('FS_PASS', 'ClueCon')),
+        'acl': acl,
+    }
+
+
+def _render_xml_curl():
+    port = _env('XML_CURL_PORT', _env('ADMIN_PORT', '8888'))
+    base_url = f"http://{_env('ADMIN_HOST', '127.0.0.1')}:{port}/api/freeswitch"
+    dialplan_binding = ''
+    if _env('XML_CURL_DIALPLAN', 'false') == 'true':
+        dialplan_binding = XML_CURL_DIALPLAN_BINDING % f"{base_url}/dialplan"
+    return XML_CURL_XML % {'url': f"{base_url}/directory", 'dialplan_binding': dialplan_binding}
+
+
+def _render_profiles(config, user_agent, has_acl_users, has_blacklist):
+    inbound_acl = 'blacklist,' if has_blacklist else ''
+    inbound_acl += 'domains,acl_users' if has_acl_users else 'domains'
+    register_acl_line = '<param name="apply-register-acl" value="blacklist"/>' if has_blacklist else ''
+    debug = {'user_agent': user_agent, 'sip_debug': _env('SIP_DEBUG', '0'),
+             'sip_trace': _env('SIP_TRACE', 'no')}
+    internal = INTERNAL_XML % dict(debug, inbound_acl=inbound_acl,
+                                   register_acl_line=register_acl_line)
+    external = EXTERNAL_XML % dict(debug, blacklist_acl=EXTERNAL_BLACKLIST_ACL if has_blacklist else '')
+    return internal, external
+
+
+def _render_users(config, files, outbound_caller_id):
+    for user in _items(config, 'users'):
+        username = _jq(_get(user, 'username'))
+        password = _jq(_get(user, 'password'))
+        extension = _jq(_get(user, 'extension'))
+        if not _enabled(user):
+            continue
+        if not username or not password:
+            continue
+        extension = extension or username
+        files[f"directory/default/{_file_name(username, 'user')}.xml"] = USER_XML % {
+            'username': username,
+            'extension': extension,
+            'password': password,
+            'caller_id': outbound_caller_id or extension,
+        }
+
+
+def _cidr(ip):
+    return ip if '/' in ip else ip + '/32'
+
+
+def _render_acl(config, files, outbound_caller_id, has_blacklist):
+    parts = [ACL_HEADER]
+    for acl_user in _items(config, 'acl_users'):
+        username = _jq(_get(acl_user, 'username'))
+        extension = _jq(_get(acl_user, 'extension'))
+        caller_id = _jq(_get(acl_user, 'caller_id'))
+        if not _enabled(acl_user):
+            continue
+        if not username:
+            continue
+        extension = extension or username
+        caller_id = caller_id or outbound_caller_id or extension
+
+        ips = _get(acl_user, 'ips')
+        for j in range(_length(ips)):
+            parts.append(ACL_ALLOW_NODE % _cidr(_jq_raw(_get(ips, j))))
+
+        files[f"directory/default/{_file_name(username, 'ACL user')}.xml"] = ACL_USER_XML % {
+            'username': username,
+            'extension': extension,
+            'caller_id': caller_id,
+        }
+    parts.append(ACL_LIST_END)
+
+    if has_blacklist:
+        parts.append(ACL_BLACKLIST_HEADER)
+        for entry in _items(config, 'security', 'blacklist'):
+            ip = _jq(_get(entry, 'ip'))
+            if ip:
+                parts.append(ACL_DENY_NODE % _cidr(ip))
+        parts.append(ACL_LIST_END)
+    parts.append(ACL_FOOTER)
+    return ''.join(parts)
+
+
+def _render_gateway(gateway):
+    name = _jq(_get(gateway, 'name'))
+    host = _jq(_get(gateway, 'host'))
+    username = _jq(_get(gateway, 'username'))
+    password = _jq(_get(gateway, 'password'))
+    auth_user = _jq(_get(gateway, 'auth_username')) or username
+
+    parts = [GATEWAY_HEADER % {'name': name}]
+    if username:
+        parts.append(GATEWAY_USER % {'username': username, 'from_user': auth_user or username})
+    if auth_user and auth_user != username:
+        parts.append(GATEWAY_AUTH_USER % auth_user)
+    if password:
+        parts.append(GATEWAY_PASSWORD % password)
+    parts.append(GATEWAY_FOOTER % {
+        'host': host,
+        'port': _jq(_get(gateway, 'port'), '5060'),
+        'register': _jq(_get(gateway, 'register'), 'true'),
+        'transport': _jq(_get(gateway, 'transport'), 'udp'),
+    })
+    return ''.join(parts)
+
+
+def _render_gateways(config, files):
+    for gateway in _items(config, 'gateways'):
+        if not _enabled(gateway):
+            continue
+        name = _jq(_get(gateway, 'name'))
+        if not name or not _jq(_get(gateway, 'host')):
+            continue
+        files[f"sip_profiles/external/{_file_name(name, 'gateway')}.xml"] = _render_gateway(gateway)
+
+
+def routing_tables(config):
+    """
+    Routes as the generated dialplan applies them, in dialplan order.
+
+    Entries missing a required field are dropped, the default gateway only
+    applies without outbound pattern routes and the default extension only
+    without inbound routes (same as provision.sh). Shared by the renderers
+    below and route_matcher.
+    """
+    tables = {
+        'country_code': _value(config, ('settings', 'default_country_code'), '49'),
+        'user_routes': [],
+        'outbound': [],
+        'default_gateway': '',
+        'inbound': [],
+        'default_extension': '',
+    }
+    for route in _items(config, 'routes', 'user_routes'):
+        username = _jq(_get(route, 'username'))
+        gateway = _jq(_get(route, 'gateway'))
+        if username and gateway:
+            tables['user_routes'].append((username, gateway))
+
+    if _length(_get(config, 'routes', 'outbound')) > 0:
+        for route in _items(config, 'routes', 'outbound'):
+            pattern = _jq(_get(route, 'pattern'))
+            gateway = _jq(_get(route, 'gateway'))
+            if pattern and gateway:
+                tables['outbound'].append((pattern, gateway, _jq(_get(route, 'prepend')),
+                                           _jq(_get(route, 'strip'))))
+    else:
+        tables['default_gateway'] = _value(config, ('routes', 'default_gateway'))
+
+    if _length(_get(config, 'routes', 'inbound')) > 0:
+        for route in _items(config, 'routes', 'inbound'):
+            gateway = _jq(_get(route, 'gateway'))
+            extension = _jq(_get(route, 'extension'))
+            if not gateway or not extension:
+                continue
+            # host: only for extension targets (registered PBX sending without gw=)
+            host = '' if _GATEWAY_REF.fullmatch(extension) else _gateway_host(config, gateway)
+            tables['inbound'].append((gateway, extension, host))
+    else:
+        tables['default_extension'] = _value(config, ('routes', 'default_extension'))
+    return tables
+
+
+def _render_user_routing(tables):
+    parts = [USER_ROUTING_HEADER]
+    for username, gateway in tables['user_routes']:
+        parts.append(USER_ROUTE_XML % {'username': username, 'gateway': gateway,
+                                       'country_code': tables['country_code']})
+    return ''.join(parts)
+
+
+def render_outbound_route(pattern, gateway, prepend, strip, index):
+    """Dialplan extension of one outbound pattern route"""
+    parts = [OUTBOUND_ROUTE_HEADER % {'pattern': pattern, 'gateway': gateway, 'index': index}]
+    dial_number = '$1'
+    if strip:
+        parts.append(OUTBOUND_ROUTE_STRIP % strip)
+        dial_number = '${stripped_number}'
+    if prepend:
+        parts.append(OUTBOUND_ROUTE_PREPEND % (prepend + dial_number))
+        dial_number = '${final_number}'
+    parts.append(OUTBOUND_ROUTE_FOOTER % {'gateway': gateway, 'dial_number': dial_number})
+    return ''.join(parts)
+
+
+def _render_outbound(tables):
+    parts = [OUTBOUND_HEADER]
+    for index, route in enumerate(tables['outbound']):
+        parts.append(render_outbound_route(*route, index))
+    if tables['default_gateway']:
+        parts.append(OUTBOUND_DEFAULT_XML % {'gateway': tables['default_gateway'],
+                                             'country_code': tables['country_code']})
+    return ''.join(parts)
+
+
+def _gateway_host(config, name):
+    """First host of a gateway with this name, like `jq ... | head -1`"""
+    for gateway in _items(config, 'gateways'):
+        if _get(gateway, 'name') != name:
+            continue
+        host = _get(gateway, 'host')
+        if host is None or host is False:
+            continue
+        return _jq(host).split('\n')[0]
+    return ''
+
+
+def render_inbound_route(gateway, extension, host):
+    """Dialplan extension(s) of one inbound route"""
+    ref = _GATEWAY_REF.fullmatch(extension)
+    if ref:
+        return INBOUND_TO_GATEWAY_XML % {'gateway': gateway, 'out_gateway': ref.group(1)}
+    values = {'gateway': gateway, 'extension': extension}
+    xml = INBOUND_TO_EXTENSION_XML % values
+    if host:
+        xml += INBOUND_VIA_REGISTRATION_XML % dict(values, host=host)
+    return xml
+
+
+def render_inbound_default(default_extension):
+    """Dialplan extension of the default inbound route"""
+    ref = _GATEWAY_REF.fullmatch(default_extension)
+    if ref:
+        return INBOUND_DEFAULT_GATEWAY_XML % ref.group(1)
+    return INBOUND_DEFAULT_XML % default_extension
+
+
+def _render_inbound(tables):
+    parts = [INBOUND_HEADER]
+    for route in tables['inbound']:
+        parts.append(render_inbound_route(*route))
+    if tables['default_extension']:
+        parts.append(render_inbound_default(tables['default_extension']))
+    return ''.join(parts)
+
+
+def render(config):
+    """
+    Render all provisioned files for a raw config document.
+
+    Returns {path relative to FS_CONF: content}, in the order provision.sh
+    writes them. Raises ProvisionError for configs provision.sh rejects.
+    """
+    validate(config)
+    user_agent = build_user_agent(config)
+    has_acl_users = _length(_get(config, 'acl_users')) > 0
+    has_blacklist = _length(_get(config, 'security', 'blacklist')) > 0
+    outbound_caller_id = _value(config, ('routes', 'outbound_caller_id'))
+    tables = routing_tables(config)
+
+    files = {
+        'vars.xml': _render_vars(config),
+        'autoload_configs/modules.conf.xml': MODULES_XML,
+        'autoload_configs/event_socket.conf.xml': _render_event_socket(),
+        'autoload_configs/xml_curl.conf.xml': _render_xml_curl(),
+    }
+    files['sip_profiles/internal.xml'], files['sip_profiles/external.xml'] = \
+        _render_profiles(config, user_agent, has_acl_users, has_blacklist)
+    files['directory/default.xml'] = DIRECTORY_XML
+    _render_users(config, files, outbound_caller_id)
+    if has_acl_users or has_blacklist:
+        files['autoload_configs/acl.conf.xml'] = _render_acl(config, files, outbound_caller_id,
+                                                             has_blacklist)
+    _render_gateways(config, files)
+    files['dialplan/default/00_local_extensions.xml'] = LOCAL_EXTENSIONS_XML
+    files['dialplan/default/000_user_routing.xml'] = _render_user_routing(tables)
+    files['dialplan/default/00_outbound.xml'] = _render_outbound(tables)
+    files['dialplan/public/00_inbound.xml'] = _render_inbound(tables)
+    files['dialplan/default.xml'] = DIALPLAN_WRAPPER_XML % {'context': 'default'}
+    files['dialplan/public.xml'] = DIALPLAN_WRAPPER_XML % {'context': 'public'}
+    return files
+
+
+# =============================================================================
+# Writing
+# =============================================================================
+
+def _is_generated(rel_path):
+    """Path is in the tree provision.sh regenerates (CLEAN_GLOBS)"""
+    return any(fnmatch.fnmatch(rel_path, pattern) for pattern in CLEAN_GLOBS)
+
+
+def load_manifest(fs_conf):
+    """{path: {'sha1', 'size'}} of the files written by the last run"""
+    try:
+        with open(Path(fs_conf) / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (IOError, json.JSONDecodeError):
+        return {}
+
+
+def plan_files(files, fs_conf):
+    """
+    Compare rendered files with the manifest and the files on disk.
+
+    Returns {'write': {path: bytes}, 'create': [paths], 'delete': [paths],
+    'unchanged': [paths]} - 'create' lists the written paths not on disk yet.
+    Files are rewritten when their hash changed or the file on disk is
+    missing / has another size; generated files that are no longer rendered
+    (removed users, gateways) are deleted, including leftovers of provision.sh.
+    """
+    root = Path(fs_conf)
+    manifest = load_manifest(fs_conf)
+    write, create, unchanged = {}, [], []
+    for rel_path, content in files.items():
+        data = content.encode('utf-8')
+        entry = manifest.get(rel_path)
+        try:
+            size = os.path.getsize(root / rel_path)
+        except OSError:
+            size = None
+        if size != len(data):
+            same = False
+        elif isinstance(entry, dict) and entry.get('size') == size:
+            same = entry.get('sha1') == hashlib.sha1(data).hexdigest()
+        else:
+            # Not in the manifest (first run, provision.sh tree): compare content
+            same = (root / rel_path).read_bytes() == data
+        if same:
+            unchanged.append(rel_path)
+        else:
+            write[rel_path] = data
+            if size is None:
+                create.append(rel_path)
+
+    orphans = {p for p in manifest if p not in files and _is_generated(p)}
+    for pattern in CLEAN_GLOBS:
+        for path in root.glob(pattern):
+            rel_path = path.relative_to(root).as_posix()
+            if rel_path not in files:
+                orphans.add(rel_path)
+    return {'write': write, 'create': create, 'delete': sorted(orphans), 'unchanged': unchanged}
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def write_files(files, fs_conf, plan=None):
+    """
+    Write only changed files, delete orphans and update the manifest.
+
+    Returns {'written': [paths], 'created': [paths], 'deleted': [paths],
+    'unchanged': count}; 'created' is the part of 'written' that is new.
+    """
+    root = Path(fs_conf)
+    for name in CONF_DIRS:
+        (root / name).mkdir(parents=True, exist_ok=True)
+    plan = plan or plan_files(files, fs_conf)
+
+    # FreeSWITCH only reads these on reloadxml (after this), so plain writes are fine
+    for rel_path, data in plan['write'].items():
+        with open(root / rel_path, 'wb') as f:
+            f.write(data)
+    for rel_path in plan['delete']:
+        try:
+            (root / rel_path).unlink()
+        except FileNotFoundError:
+            pass
+
+    old = load_manifest(fs_conf)
+    manifest = {}
+    for rel_path in plan['unchanged']:
+        manifest[rel_path] = old.get(rel_path) or {
+            'sha1': hashlib.sha1(files[rel_path].encode('utf-8')).hexdigest(),
+            'size': os.path.getsize(root / rel_path)}
+    for rel_path, data in plan['write'].items():
+        manifest[rel_path] = {'sha1': hashlib.sha1(data).hexdigest(), 'size': len(data)}
+    _write_atomic(root / MANIFEST_FILE, json.dumps(manifest, indent=1, sort_keys=True).encode('utf-8'))
+
+    return {'written': list(plan['write']), 'created': plan['create'],
+            'deleted': plan['delete'], 'unchanged': len(plan['unchanged'])}
+
+
+def reload_commands(changes):
+    """FreeSWITCH commands needed for a set of written/deleted files"""
+    changed = changes['written'] + changes['deleted']
+    if _env('XML_CURL_DIALPLAN', 'false') == 'true':
+        changed = [p for p in changed if p not in ROUTE_FILES]
+    if not changed:
+        return []
+    commands = ['reloadxml']
+    if any(p in PROFILE_FILES for p in changed):
+        return commands + ['sofia profile internal rescan', 'sofia profile external rescan']
+    if 'autoload_configs/acl.conf.xml' in changed:
+        commands.append('reloadacl')
+    gateways = [p for p in changed if p.startswith('sip_profiles/external/')]
+    for rel_path in gateways:
+        if rel_path not in changes['created']:
+            commands.append(f"sofia profile external killgw {Path(rel_path).stem}")
+    if any(p in changes['written'] for p in gateways):
+        commands.append('sofia profile external rescan')
+    return commands
+
+
+def backup(fs_conf, backup_dir=None):
+    """tar.gz of FS_CONF, same name as provision.sh; None if skipped/failed"""
+    if not os.path.isdir(fs_conf):
+        return None
+    backup_dir = backup_dir or BACKUP_DIR
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')
+    target = os.path.join(backup_dir, f'freeswitch-{stamp}.tar.gz')
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        with tarfile.open(target, 'w:gz') as tar:
+            conf = os.path.abspath(fs_conf)
+            tar.add(conf, arcname=os.path.basename(conf))
+    except (OSError, tarfile.TarError) as e:
+        _log(f"WARNING: Backup failed: {e}")
+        return None
+    return target
+
+
+def provision(fs_conf=None, config=None, dry_run=False):
+    """
+    Render the current config and write what changed to FS_CONF.
+
+    Returns the write_files() summary (paths relative to FS_CONF); dry_run
+    returns the same summary without touching FS_CONF. Raises ProvisionError
+    if there is no config or it is not provisionable.
+    """
+    if config is None:
+        config = config_store.load_raw_config()
+    if config is None:
+        raise ProvisionError(f"No JSON config: {config_store.get_config_path()}")
+    fs_conf = fs_conf or FS_CONF
+    files = render(config)
+    if not dry_run:
+        return write_files(files, fs_conf)
+    plan = plan_files(files, fs_conf)
+    return {'written': list(plan['write']), 'created': plan['create'],
+            'deleted': plan['delete'], 'unchanged': len(plan['unchanged'])}
+
+
+def write_routing_config_json(export=None, path=None):
+    """
+    routing_config.json / .js: config_store.export_for_provision(), the file
+    /api/crud/apply writes - app.py diffs the next apply against it, so after
+    a restart it must have the same shape (provision.sh's ENV format does not)
+    """
+    export = config_store.export_for_provision() if export is None else export
+    path = path or ROUTING_CONFIG_FILE
+    content = json.dumps(export, indent=2)
+    with open(path, 'w') as f:
+        f.write(content)
+    os.chmod(path, 0o644)
+
+    js_path = os.path.splitext(path)[0] + '.js'
+    with open(js_path, 'w') as f:
+        f.write(f"// Auto-generated by provisioning.py - {time.strftime('%a %b %d %H:%M:%S %Z %Y')}\n")
+        f.write(f"window.ROUTING_CONFIG = {content};\n")
+    os.chmod(js_path, 0o644)
+
+
+def apply(changes):
+    """Reload what changed if FreeSWITCH is running (apply_config in provision.sh)"""
+    commands = reload_commands(changes)
+    if os.environ.get('RESTART_PROFILES') == 'true':
+        commands += ['sofia profile internal restart reloadxml',
+                     'sofia profile external restart reloadxml']
+    if not commands:
+        _log("No files changed, skipping reload")
+        return
+    if shutil.which('pgrep') is None or subprocess.run(
+            ['pgrep', '-x', 'freeswitch'], stdout=subprocess.DEVNULL).returncode != 0:
+        _log("FreeSWITCH is not running, skipping reload")
+        return
+    if shutil.which('fs_cli') is None:
+        _log("WARNING: fs_cli not found, cannot reload configuration")
+        return
+    for command in commands:
+        if subprocess.run(['fs_cli', '-x', command]).returncode != 0:
+            _log(f"WARNING: '{command}' failed")
+    _log("Configuration applied")
+
+
+def main(argv=None):
+    """CLI entry point - same steps as provision.sh main() in JSON mode"""
+    import argparse
+    parser = argparse.ArgumentParser(description='Generate FreeSWITCH config from the JSON config')
+    parser.add_argument('--fs-conf', default=FS_CONF, help='FreeSWITCH config directory')
+    parser.add_argument('--no-backup', action='store_true', help='skip the tar.gz backup')
+    parser.add_argument('--no-apply', action='store_true', help='do not reload FreeSWITCH')
+    args = parser.parse_args(argv)
+
+    config = config_store.load_raw_config()
+    if config is None:
+        _log(f"No JSON config at {config_store.get_config_path()} - use provision.sh (ENV mode)")
+        return 2
+
+    started = time.perf_counter()
+    try:
+        files = render(config)
+    except ProvisionError as e:
+        _log(f"ERROR: {e}")
+        return 1
+    _log(f"SIP User-Agent: {build_user_agent(config)}")
+
+    plan = plan_files(files, args.fs_conf)
+    if not args.no_backup and (plan['write'] or plan['delete']):
+        target = backup(args.fs_conf)
+        if target:
+            _log(f"Backup saved to: {target}")
+    changes = write_files(files, args.fs_conf, plan)
+    _log(f"Rendered {len(files)} files in {args.fs_conf}: {len(changes['written'])} written, "
+         f"{len(changes['deleted'])} deleted, {changes['unchanged']} unchanged "
+         f"({(time.perf_counter() - started) * 1000:.0f} ms)")
+    for rel_path in changes['deleted']:
+        _log(f"  Removed: {rel_path}")
+
+    try:
+        write_routing_config_json()
+    except OSError as e:
+        _log(f"WARNING: Could not write routing config: {e}")
+
+    if not args.no_apply:
+        apply(changes)
+    _log("Provisioning completed successfully!")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
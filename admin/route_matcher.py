@@ -0,0 +1,311 @@
+"""
+Route Matcher - compiled routing tables for the XML CURL dialplan binding
+
+The static dialplan (provisioning.py / provision.sh) only changes with a
+reprovision + reloadxml. With XML_CURL_DIALPLAN=true FreeSWITCH asks
+/api/freeswitch/dialplan instead, and the answer comes from the routes
+compiled here once per config version:
+- user routes: hash on the caller's username
+- outbound pattern routes: one combined regex, alternatives in route order,
+  so the first matching route wins like in the XML dialplan
+- inbound routes: hash on the gw= request parameter, then the
+  registered-gateway host conditions in route order
+
+Resolution follows the generated dialplan exactly (same extension order,
+same country code normalization, strip/prepend) and the answer is the very
+extension provisioning would have written, so FreeSWITCH evaluates the same
+conditions and actions. Calls without a matching route get "not found" and
+fall back to the static dialplan XML (custom files keep working).
+
+The matcher follows config_store.get_indexes(): a new index object
+(config file changed or saved) triggers a recompile.
+"""
+
+import re
+
+import config_store
+import directory_cache
+import provisioning
+
+DIALPLAN_XML = '''<?xml version="1.0" encoding="UTF-8"?>
+<document type="freeswitch/xml">
+  <section name="dialplan" description="Routes from the admin config">
+    <context name="%(context)s">
+%(extension)s    </context>
+  </section>
+</document>'''
+
+# Number formats of a user route / the default gateway, in dialplan order:
+# (extension name suffix, destination_number expression)
+NUMBER_FORMATS = (
+    ('international', r'(\+|00)(.+)'),
+    ('with_country_code', r'(%(country_code)s[1-9][0-9]+)'),
+    ('national', r'0([1-9][0-9]+)'),
+    ('default', r'([1-9][0-9]+)'),
+)
+
+LOCAL_EXTENSION = re.compile(r'1[0-9]{3}')
+
+_GATEWAY_REF = re.compile(r'gateway@(.+)', re.S)
+
+# (indexes the matcher was built from, matcher)
+_cache = (None, None)
+
+
+class RouteMatcher:
+    """Routes of one config version, compiled for lookups"""
+
+    def __init__(self, tables):
+        self.country_code = tables['country_code']
+        self.errors = []
+
+        self._formats = []
+        for name, expression in NUMBER_FORMATS:
+            expression = expression % {'country_code': self.country_code}
+            self._formats.append((name, self._compile(expression, f'{name} number format')))
+
+        # First route per username wins, like the first matching extension
+        self._user_routes = {}
+        for username, gateway in tables['user_routes']:
+            self._user_routes.setdefault(username, gateway)
+
+        self._outbound = tables['outbound']
+        self._outbound_groups = {}  # group number of a route's ^(pattern)$ -> route index
+        self._outbound_patterns = []  # (route index, compiled pattern)
+        self._strip = {}  # route index -> compiled ^strip(.*)
+        alternatives = []
+        groups = 0
+        for index, (pattern, gateway, prepend, strip) in enumerate(self._outbound):
+            compiled = self._compile(pattern, f'outbound route {index} pattern')
+            if compiled is None:
+                continue
+            self._outbound_patterns.append((index, compiled))
+            if strip:
+                self._strip[index] = self._compile(f'{strip}(.*)', f'outbound route {index} strip')
+            alternatives.append(f'({pattern})')
+            self._outbound_groups[groups + 1] = index
+            groups += 1 + compiled.groups
+        self._patterns = None
+        if alternatives:
+            try:
+                self._patterns = re.compile('|'.join(alternatives))
+            except re.error as e:
+                # e.g. inline flags or back references - match route by route instead
+                self.errors.append(f'outbound routes not combinable, matching one by one: {e}')
+        self.default_gateway = tables['default_gateway']
+
+        self._inbound = tables['inbound']
+        self._inbound_by_gateway = {}
+        self._inbound_hosts = []  # (route index, compiled host condition), in route order
+        for index, (gateway, extension, host) in enumerate(self._inbound):
+            self._inbound_by_gateway.setdefault(gateway, index)
+            if host:
+                compiled = self._compile(host, f'inbound route {index} host')
+                if compiled is not None:
+                    self._inbound_hosts.append((index, compiled))
+        self.default_extension = tables['default_extension']
+
+    def _compile(self, expression, what):
+        """Compile a route expression, None (route never matches) if invalid"""
+        try:
+            return re.compile(expression)
+        except re.error as e:
+            self.errors.append(f'{what}: {e}')
+            return None
+
+    # -------------------------------------------------------------------------
+    # Outbound (context default)
+    # -------------------------------------------------------------------------
+
+    def _number_format(self, number):
+        """(format index, number as dialed) for the normalization extensions"""
+        for position, (name, compiled) in enumerate(self._formats):
+            if compiled is None:
+                continue
+            match = compiled.fullmatch(number)
+            if match is None:
+                continue
+            if name == 'international':
+                return position, number
+            if name == 'with_country_code':
+                return position, '+' + number
+            if name == 'national':
+                return position, '+' + self.country_code + match.group(1)
+            return position, '+' + self.country_code + number
+        return None
+
+    def _outbound_route(self, number):
+        """Index of the first outbound pattern route matching number, None if none"""
+        if self._patterns is None:
+            for index, compiled in self._outbound_patterns:
+                if compiled.fullmatch(number):
+                    return index
+            return None
+        match = self._patterns.fullmatch(number)
+        if match is None:
+            return None
+        # The route's outer group closes last, so lastindex is its group number
+        return self._outbound_groups[match.lastindex]
+
+    def _resolve_outbound(self, number, username=''):
+        """(result, dialplan extension XML) for a call from username, None if no route"""
+        gateway = self._user_routes.get(username) if username else None
+        if gateway is not None:
+            found = self._number_format(number)
+            if found is not None:
+                position, dial_number = found
+                values = {'username': username, 'gateway': gateway,
+                          'country_code': self.country_code}
+                return (self._bridge('user_route', f'user_{username}_{NUMBER_FORMATS[position][0]}',
+                                     gateway, dial_number),
+                        provisioning.USER_ROUTE_EXTENSIONS[position] % values)
+
+        if LOCAL_EXTENSION.fullmatch(number):
+            result = {'context': 'default', 'route': 'local', 'extension': 'local_extensions',
+                      'action': 'local', 'gateway': None, 'number': number, 'dial_string': None}
+            return result, provisioning.LOCAL_EXTENSION_XML
+
+        index = self._outbound_route(number)
+        if index is not None:
+            pattern, gateway, prepend, strip = self._outbound[index]
+            dial_number = number
+            if strip:
+                # ${regex($1|^strip(.*)|$1)}: the original number if strip does not match
+                compiled = self._strip.get(index)
+                match = compiled.match(number) if compiled is not None else None
+                if match is not None:
+                    dial_number = match.group(1)
+            dial_number = prepend + dial_number
+            return (self._bridge('outbound', f'outbound_{gateway}_{index}', gateway, dial_number),
+                    provisioning.render_outbound_route(pattern, gateway, prepend, strip, index))
+
+        if self.default_gateway:
+            found = self._number_format(number)
+            if found is not None:
+                position, dial_number = found
+                values = {'gateway': self.default_gateway, 'country_code': self.country_code}
+                return (self._bridge('default_gateway', f'outbound_{NUMBER_FORMATS[position][0]}',
+                                     self.default_gateway, dial_number),
+                        provisioning.OUTBOUND_DEFAULT_EXTENSIONS[position] % values)
+        return None
+
+    @staticmethod
+    def _bridge(route, extension, gateway, dial_number):
+        return {'context': 'default', 'route': route, 'extension': extension,
+                'action': 'bridge', 'gateway': gateway, 'number': dial_number,
+                'dial_string': f'sofia/gateway/{gateway}/{dial_number}'}
+
+    def resolve_outbound(self, number, username=''):
+        """Where the default context sends number (dict), None if no route matches"""
+        found = self._resolve_outbound(number, username)
+        return found[0] if found is not None else None
+
+    # -------------------------------------------------------------------------
+    # Inbound (context public)
+    # -------------------------------------------------------------------------
+
+    def _resolve_inbound(self, number, sip_req_params='', sip_from_host=''):
+        """(result, dialplan extension XML) for an inbound call, None if no route"""
+        best = None
+        for param in sip_req_params.split(';'):
+            if param.startswith('gw='):
+                index = self._inbound_by_gateway.get(param[3:])
+                if index is not None and (best is None or index < best):
+                    best = index
+        via_registration = False
+        if number and sip_from_host:
+            for index, compiled in self._inbound_hosts:
+                if best is not None and index >= best:
+                    break
+                if compiled.search(sip_from_host):
+                    best, via_registration = index, True
+                    break
+
+        if best is not None:
+            gateway, extension, host = self._inbound[best]
+            ref = _GATEWAY_REF.fullmatch(extension)
+            if ref:
+                result = {'route': 'inbound', 'extension': f'inbound_{gateway}', 'action': 'bridge',
+                          'gateway': ref.group(1), 'number': number,
+                          'dial_string': f'sofia/gateway/{ref.group(1)}/{number}'}
+                xml = provisioning.INBOUND_TO_GATEWAY_XML % {'gateway': gateway,
+                                                             'out_gateway': ref.group(1)}
+            else:
+                values = {'gateway': gateway, 'extension': extension}
+                name = f'inbound_{gateway}'
+                if via_registration:
+                    name += '_via_registration'
+                    xml = provisioning.INBOUND_VIA_REGISTRATION_XML % dict(values, host=host)
+                else:
+                    xml = provisioning.INBOUND_TO_EXTENSION_XML % values
+                result = {'route': 'inbound', 'extension': name, 'action': 'transfer',
+                          'gateway': None, 'number': extension, 'dial_string': None}
+            result['context'] = 'public'
+            return result, xml
+
+        if self.default_extension and number:
+            ref = _GATEWAY_REF.fullmatch(self.default_extension)
+            if ref:
+                result = {'action': 'bridge', 'gateway': ref.group(1), 'number': number,
+                          'dial_string': f'sofia/gateway/{ref.group(1)}/{number}'}
+            else:
+                result = {'action': 'transfer', 'gateway': None,
+                          'number': self.default_extension, 'dial_string': None}
+            result.update({'context': 'public', 'route': 'default_extension',
+                           'extension': 'inbound_default'})
+            return result, provisioning.render_inbound_default(self.default_extension)
+        return None
+
+    def resolve_inbound(self, number, sip_req_params='', sip_from_host=''):
+        """Where the public context sends number (dict), None if no route matches"""
+        found = self._resolve_inbound(number, sip_req_params, sip_from_host)
+        return found[0] if found is not None else None
+
+    # -------------------------------------------------------------------------
+    # XML CURL answer
+    # -------------------------------------------------------------------------
+
+    def dialplan(self, context, number, username='', sip_req_params='', sip_from_host=''):
+        """
+        Dialplan document (bytes) for an xml_curl dialplan request.
+
+        Returns (document, result) - result is None and the document is
+        "not found" when the context is not ours or no route matches.
+        """
+        if context == 'default':
+            found = self._resolve_outbound(number, username)
+        elif context == 'public':
+            found = self._resolve_inbound(number, sip_req_params, sip_from_host)
+        else:
+            found = None
+        if found is None:
+            return directory_cache.NOT_FOUND, None
+        result, xml = found
+        document = DIALPLAN_XML % {'context': context, 'extension': xml}
+        return document.encode('utf-8'), result
+
+
+def get_matcher():
+    """Matcher for the current config, recompiled only when the config changed"""
+    global _cache
+    indexes = config_store.get_indexes()
+    cached_indexes, matcher = _cache
+    if indexes is not cached_indexes:
+        matcher = RouteMatcher(provisioning.routing_tables(config_store.load_raw_config() or {}))
+        _cache = (indexes, matcher)
+        for error in matcher.errors:
+            print(f"[Routes] WARNING: {error}")
+    return matcher
+
+
+def candidate_matcher(routes):
+    """Matcher for the current config with the routes dict merged in (not saved)"""
+    config = dict(config_store.load_raw_config() or {})
+    config['routes'] = dict(config.get('routes') or {}, **routes)
+    return RouteMatcher(provisioning.routing_tables(config))
+
+
+def invalidate():
+    """Drop the compiled routes (next lookup recompiles)"""
+    global _cache
+    _cache = (None, None)
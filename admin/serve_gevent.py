@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Admin Portal on a single gevent hub (ADMIN_SERVER=gevent)
+
+python app.py serves requests on OS threads while the ESL subscriber runs
+its own gevent hub in another thread. Here the standard library is
+monkey-patched before the app is imported, so everything is a greenlet on
+one hub:
+- gevent's WSGI server: one greenlet per connection
+- the ESL subscriber (esl_events.single_hub() -> spawned, not threaded)
+- fs_cli / send_command connections (greenswitch is gevent-native)
+- the dashboard pool and snapshot collection (patched threads and locks)
+- subprocess calls (patched subprocess)
+
+A greenlet that blocks without yielding (CPU-heavy request, large file
+read) stalls the others - the thread mode does not have that limit.
+
+Usage: python serve_gevent.py (ADMIN_PORT, default 8888)
+See benchmarks/bench_server_modes.py for a comparison with python app.py.
+"""
+
+from gevent import monkey
+monkey.patch_all()
+
+import os
+
+from gevent.pywsgi import WSGIServer
+
+import app as admin_app
+import esl_events
+
+
+def main():
+    port = int(os.environ.get('ADMIN_PORT', 8888))
+    print(f"[Admin] Serving on http://0.0.0.0:{port} (gevent, single hub)")
+
+    if esl_events.ESL_AVAILABLE:
+        print("[ESL] Starting event subscriber...")
+        esl_events.start_subscriber()
+
+    # log=None: no access log line per poll
+    server = WSGIServer(('0.0.0.0', port), admin_app.app, log=None)
+    try:
+        server.serve_forever()
+    finally:
+        if esl_events.ESL_AVAILABLE:
+            esl_events.stop_subscriber()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+Single Flight - coalescing of identical concurrent FreeSWITCH queries
+
+Every open dashboard tab polls the same status commands (sofia status,
+show calls, ...). Without coordination each poll opens its own ESL
+connection for an identical command. fs_cli() runs read-only commands
+through SingleFlight instead:
+- the first caller of a command executes it, callers arriving while it is
+  in flight wait for that request and get its result
+- a successful result is kept for a short TTL per command family, callers
+  within the TTL get it without any request
+- commands without a TTL (reloadxml, siptrace on, ...) are never coalesced
+  and drop the cached results, since they may change what status shows;
+  a request that was in flight during the invalidation is not cached either
+  (its result may predate the change)
+
+stats() reports how many calls were answered without their own request.
+"""
+
+import os
+import threading
+import time
+
+# Read-only command families: (command prefix, result TTL in seconds), first match wins.
+# TTL 0 still shares in-flight requests but keeps no result.
+COMMAND_TTLS = (
+    ('sofia status', float(os.environ.get('FS_CLI_TTL_SOFIA', '1'))),
+    ('show ', float(os.environ.get('FS_CLI_TTL_SHOW', '1'))),
+    ('status', float(os.environ.get('FS_CLI_TTL_STATUS', '2'))),
+)
+
+# Expired results are dropped when more commands than this are cached
+MAX_RESULTS = 256
+
+
+def ttl_for(command):
+    """Result TTL for command, None if it must not be coalesced"""
+    for prefix, ttl in COMMAND_TTLS:
+        if command.startswith(prefix):
+            return ttl
+    return None
+
+
+class _Flight:
+    """One in-flight request, waited on by its followers"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
+
+class SingleFlight:
+    """Share one execution per key between concurrent callers"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}  # key -> _Flight
+        self._results = {}  # key -> (expires, result)
+        self._generation = 0  # bumped by invalidate()
+        self._counters = {'calls': 0, 'executed': 0, 'shared': 0, 'cached': 0}
+
+    def call(self, key, ttl, fn):
+        """Result of fn() for key - shared with concurrent callers, cached for ttl seconds"""
+        with self._lock:
+            self._counters['calls'] += 1
+            cached = self._results.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self._counters['cached'] += 1
+                return cached[1]
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                generation = self._generation
+            else:
+                self._counters['shared'] += 1
+
+        if not leader:
+            flight.done.wait()
+            return flight.result
+
+        try:
+            flight.result = fn()
+        finally:
+            with self._lock:
+                del self._flights[key]
+                self._counters['executed'] += 1
+                # Failures (None) are not kept - the next caller tries again
+                if ttl > 0 and flight.result is not None and generation == self._generation:
+                    now = time.monotonic()
+                    if len(self._results) >= MAX_RESULTS:
+                        self._results = {k: v for k, v in self._results.items() if v[0] > now}
+                    self._results[key] = (now + ttl, flight.result)
+            flight.done.set()
+        return flight.result
+
+    def invalidate(self):
+        """Drop all cached results (in-flight requests finish normally, but are not cached)"""
+        with self._lock:
+            self._generation += 1
+            self._results.clear()
+
+    def stats(self):
+        """Counters, hit rate (calls answered without own request) and TTLs"""
+        with self._lock:
+            result = dict(self._counters)
+            result['in_flight'] = len(self._flights)
+            result['cached_results'] = len(self._results)
+        calls = result['calls']
+        result['hit_rate'] = round((result['shared'] + result['cached']) / calls, 3) if calls else 0.0
+        result['ttls'] = {prefix.strip(): ttl for prefix, ttl in COMMAND_TTLS}
+        return result
+
+
+# fs_cli() status queries
+fs_commands = SingleFlight()
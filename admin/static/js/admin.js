@@ -26,26 +26,30 @@ function setLang(lang) {
     }).then(() => location.reload());
 }
 
-// Refresh status from API
+// Dashboard snapshot version this tab has seen (0 = next response is a full snapshot)
+// and the epoch of the worker process it came from
+let dashboardVersion = 0;
+let dashboardEpoch = '';
+
+// Refresh status from API - one /api/dashboard request per tick,
+// only sections that changed since dashboardVersion come back
 function refreshStatus() {
-    // Refresh main status (gateways, users, profiles)
-    fetch(_base + '/api/status')
+    // Only ask for the sections this page shows
+    const sections = ['status'];
+    if (document.getElementById('active-calls-container')) sections.push('active_calls');
+    if (document.getElementById('call-stats-container')) sections.push('call_stats');
+    if (document.getElementById('cdr-container')) sections.push('cdr');
+    if (document.getElementById('logs-preview-container')) sections.push('logs');
+
+    fetch(`${_base}/api/dashboard?sections=${sections.join(',')}&since_version=${dashboardVersion}&epoch=${dashboardEpoch}`)
         .then(r => r.json())
         .then(data => {
-            updateDashboardUI(data);
-            updateUsersUI(data.registrations);
-            updateGatewaysUI(data.gateways);
+            dashboardVersion = data.version || 0;
+            dashboardEpoch = data.epoch || '';
+            applyDashboardSections(data.sections || {});
+            renderUnavailable(data.stale || []);
         })
-        .catch(err => console.error('Status refresh failed:', err));
-
-    // Refresh active calls
-    refreshActiveCalls();
-
-    // Refresh call logs (CDR) - silent refresh without loading indicator
-    refreshCDRSilent();
-
-    // Refresh logs preview
-    refreshLogsSilent();
+        .catch(err => console.error('Dashboard refresh failed:', err));
 
     // Call page-specific refresh if defined
     if (typeof window.pageRefresh === 'function') {
@@ -53,33 +57,166 @@ function refreshStatus() {
     }
 }
 
+// Render the sections of a dashboard snapshot / delta
+function applyDashboardSections(sections) {
+    if (sections.status) {
+        updateDashboardUI(sections.status);
+        updateUsersUI(sections.status.registrations);
+        updateGatewaysUI(sections.status.gateways);
+        renderGatewayList(sections.status.gateways);
+        renderRegistrationList(sections.status.registrations);
+    }
+    if (sections.active_calls) renderActiveCalls(sections.active_calls);
+    if (sections.call_stats) renderCallStats(sections.call_stats);
+    if (sections.cdr) renderCDR(sections.cdr);
+    if (sections.logs) renderLogsPreview(sections.logs);
+}
+
+// Sections that missed their deadline (dashboard warning)
+function renderUnavailable(stale) {
+    const alert = document.getElementById('dashboard-unavailable');
+    const list = document.getElementById('dashboard-unavailable-list');
+    if (!alert || !list) return;
+    list.textContent = stale.join(', ');
+    alert.style.display = stale.length ? '' : 'none';
+}
+
+// Gateway status table (dashboard)
+function renderGatewayList(gateways) {
+    const container = document.getElementById('gateways-container');
+    if (!container || !gateways) return;
+
+    if (gateways.length === 0) {
+        container.innerHTML = '<div class="p-4 text-center text-muted"><i class="bi bi-inbox fs-1 d-block mb-2"></i>No gateways configured</div>';
+        return;
+    }
+
+    let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
+    html += '<th>Name</th>';
+    html += '<th>Status</th>';
+    html += `<th>${TRANSLATIONS.registered}</th>`;
+    html += '</tr></thead><tbody>';
+
+    gateways.forEach(gw => {
+        const isOnline = gw.status === 'online';
+        html += `<tr data-gateway="${escapeHtml(gw.name)}">`;
+        html += `<td><strong>${escapeHtml(gw.name)}</strong></td>`;
+        html += `<td><span class="badge ${isOnline ? 'bg-success' : 'bg-secondary'}">${isOnline ? TRANSLATIONS.online : TRANSLATIONS.offline}</span></td>`;
+        html += gw.registered
+            ? '<td><i class="bi bi-check-circle text-success"></i></td>'
+            : '<td><i class="bi bi-x-circle text-muted"></i></td>';
+        html += '</tr>';
+    });
+
+    html += '</tbody></table></div>';
+    container.innerHTML = html;
+}
+
+// User registrations table (dashboard)
+function renderRegistrationList(registrations) {
+    const container = document.getElementById('registrations-container');
+    if (!container || !registrations) return;
+
+    if (registrations.length === 0) {
+        container.innerHTML = '<div class="p-4 text-center text-muted"><i class="bi bi-inbox fs-1 d-block mb-2"></i>No users registered</div>';
+        return;
+    }
+
+    let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
+    html += '<th>User</th>';
+    html += '<th>Status</th>';
+    html += '<th>User Agent</th>';
+    html += '</tr></thead><tbody>';
+
+    registrations.forEach(reg => {
+        html += '<tr>';
+        html += `<td><strong>${escapeHtml(reg.user || '-')}</strong></td>`;
+        html += `<td><span class="badge bg-success">${TRANSLATIONS.registered}</span></td>`;
+        html += `<td><small class="text-muted">${escapeHtml(reg.agent || '-')}</small></td>`;
+        html += '</tr>';
+    });
+
+    html += '</tbody></table></div>';
+    container.innerHTML = html;
+}
+
+// Call statistics per profile (dashboard)
+function renderCallStats(stats) {
+    const container = document.getElementById('call-stats-container');
+    const card = document.getElementById('call-stats-card');
+    if (!container || !card) return;
+
+    if (!stats.internal || !stats.external || !stats.total) {
+        container.innerHTML = '';
+        card.style.display = 'none';
+        return;
+    }
+    card.style.display = '';
+
+    const failedClass = n => n > 0 ? 'text-danger' : 'text-muted';
+    const profile = (label, icon, p) => {
+        let html = '<div class="col-md-6"><div class="border rounded p-2">';
+        html += '<div class="d-flex justify-content-between align-items-center mb-2">';
+        html += `<strong><i class="bi ${icon} me-1"></i> ${label}</strong>`;
+        html += `<span class="badge bg-secondary">${p.registrations} reg</span></div>`;
+        html += '<div class="row text-center g-2">';
+        html += `<div class="col-3"><div class="small text-muted">IN</div><div class="fs-5 text-success">${p.calls_in}</div></div>`;
+        html += `<div class="col-3"><div class="small text-muted">FAIL IN</div><div class="fs-5 ${failedClass(p.failed_in)}">${p.failed_in}</div></div>`;
+        html += `<div class="col-3"><div class="small text-muted">OUT</div><div class="fs-5 text-primary">${p.calls_out}</div></div>`;
+        html += `<div class="col-3"><div class="small text-muted">FAIL OUT</div><div class="fs-5 ${failedClass(p.failed_out)}">${p.failed_out}</div></div>`;
+        html += '</div></div></div>';
+        return html;
+    };
+    const total = (label, value, failed, color) => {
+        let html = '<div class="col"><div class="bg-light rounded py-2">';
+        html += `<small class="text-muted d-block">${label}</small>`;
+        html += `<span class="fs-4 fw-bold ${color}">${value}</span>`;
+        if (failed > 0) html += ` <span class="text-danger small">(${failed} failed)</span>`;
+        html += '</div></div>';
+        return html;
+    };
+
+    let html = '<div class="row g-3">';
+    html += profile('Internal', 'bi-telephone', stats.internal);
+    html += profile('External', 'bi-globe', stats.external);
+    html += '</div><div class="row mt-3 text-center">';
+    html += total('Total In', stats.total.calls_in, stats.total.failed_in, 'text-success');
+    html += total('Total Out', stats.total.calls_out, stats.total.failed_out, 'text-primary');
+    html += '</div>';
+    container.innerHTML = html;
+}
+
 // Refresh Logs Preview (dashboard)
 function refreshLogsSilent() {
-    const container = document.getElementById('logs-preview-container');
-    if (!container) return;
+    if (!document.getElementById('logs-preview-container')) return;
 
     fetch(_base + '/api/logs?count=10')
         .then(r => r.json())
-        .then(data => {
-            if (!data.logs || data.logs.length === 0) {
-                container.innerHTML = '<div class="p-2 text-center text-muted small">No logs</div>';
-                return;
-            }
-
-            let html = '';
-            data.logs.forEach(log => {
-                let classes = 'px-2 py-1 border-bottom';
-                if (log.level === 'error') classes += ' bg-danger bg-opacity-10 text-danger';
-                else if (log.level === 'warning') classes += ' bg-warning bg-opacity-10';
-                else if (log.level === 'debug') classes += ' text-muted';
-                const text = log.text.length > 120 ? log.text.substring(0, 120) + '...' : log.text;
-                html += `<div class="${classes}">${escapeHtml(text)}</div>`;
-            });
-            container.innerHTML = html;
-        })
+        .then(renderLogsPreview)
         .catch(err => console.error('Logs refresh failed:', err));
 }
 
+function renderLogsPreview(data) {
+    const container = document.getElementById('logs-preview-container');
+    if (!container) return;
+
+    if (!data.logs || data.logs.length === 0) {
+        container.innerHTML = '<div class="p-2 text-center text-muted small">No logs</div>';
+        return;
+    }
+
+    let html = '';
+    data.logs.forEach(log => {
+        let classes = 'px-2 py-1 border-bottom';
+        if (log.level === 'error') classes += ' bg-danger bg-opacity-10 text-danger';
+        else if (log.level === 'warning') classes += ' bg-warning bg-opacity-10';
+        else if (log.level === 'debug') classes += ' text-muted';
+        const text = log.text.length > 120 ? log.text.substring(0, 120) + '...' : log.text;
+        html += `<div class="${classes}">${escapeHtml(text)}</div>`;
+    });
+    container.innerHTML = html;
+}
+
 // Escape HTML
 function escapeHtml(text) {
     const div = document.createElement('div');
@@ -89,137 +226,148 @@ function escapeHtml(text) {
 
 // Refresh Active Calls
 function refreshActiveCalls() {
-    const container = document.getElementById('active-calls-container');
-    const card = document.getElementById('active-calls-card');
-    if (!container || !card) return;
+    if (!document.getElementById('active-calls-container')) return;
 
     fetch(_base + '/api/active-calls')
         .then(r => r.json())
-        .then(data => {
-            // Update call count in stat card
-            const countEl = document.querySelector('[data-stat="calls"]');
-            if (countEl) countEl.textContent = data.count || 0;
+        .then(renderActiveCalls)
+        .catch(err => console.error('Active calls refresh failed:', err));
+}
 
-            // Update active calls table
-            if (!data.calls || data.calls.length === 0) {
-                container.innerHTML = '';
-                card.style.display = 'none';
-                return;
-            }
+function renderActiveCalls(data) {
+    const container = document.getElementById('active-calls-container');
+    const card = document.getElementById('active-calls-card');
+    if (!container || !card) return;
 
-            // Show the card
-            card.style.display = '';
+    // Update call count in stat card
+    const countEl = document.querySelector('[data-stat="calls"]');
+    if (countEl) countEl.textContent = data.count || 0;
 
-            // Update header count
-            const headerCount = card.querySelector('.card-header');
-            if (headerCount) {
-                headerCount.innerHTML = '<i class="bi bi-telephone-forward me-2"></i>Active Calls (' + data.calls.length + ')';
-            }
+    // Update active calls table
+    if (!data.calls || data.calls.length === 0) {
+        container.innerHTML = '';
+        card.style.display = 'none';
+        return;
+    }
 
-            // Build table
-            let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
-            html += '<th style="width: 100px;">Direction</th>';
-            html += '<th>Connection</th>';
-            html += '<th style="width: 100px;">Status</th>';
-            html += '<th style="width: 120px;">Time</th>';
-            html += '</tr></thead><tbody>';
+    // Show the card
+    card.style.display = '';
 
-            data.calls.forEach(call => {
-                html += '<tr>';
-                // Direction
-                if (call.direction === 'inbound') {
-                    html += '<td><span class="badge bg-success"><i class="bi bi-telephone-inbound me-1"></i>In</span></td>';
-                } else {
-                    html += '<td><span class="badge bg-primary"><i class="bi bi-telephone-outbound me-1"></i>Out</span></td>';
-                }
-                // Call flow
-                html += '<td><div class="d-flex align-items-center gap-1 flex-wrap">';
-                if (call.direction === 'inbound') {
-                    html += `<code class="bg-light px-1">${call.cid_num || '?'}</code>`;
-                    html += '<i class="bi bi-arrow-right text-muted small"></i>';
-                    html += `<span class="text-info small">${call.name || 'GW'}</span>`;
-                    html += '<i class="bi bi-arrow-right text-muted small"></i>';
-                    html += `<code class="bg-success bg-opacity-10 text-success px-1">${call.dest || '?'}</code>`;
-                } else {
-                    html += `<code class="bg-success bg-opacity-10 text-success px-1">${call.cid_num || '?'}</code>`;
-                    html += '<i class="bi bi-arrow-right text-muted small"></i>';
-                    html += `<span class="text-info small">${call.name || 'GW'}</span>`;
-                    html += '<i class="bi bi-arrow-right text-muted small"></i>';
-                    html += `<code class="bg-light px-1">${call.dest || '?'}</code>`;
-                }
-                html += '</div></td>';
-                // State
-                html += `<td><span class="badge bg-warning text-dark"><i class="bi bi-activity me-1"></i>${call.state}</span></td>`;
-                // Time
-                html += `<td><small class="text-muted">${call.created}</small></td>`;
-                html += '</tr>';
-            });
+    // Update header count
+    const headerCount = card.querySelector('.card-header');
+    if (headerCount) {
+        headerCount.innerHTML = '<i class="bi bi-telephone-forward me-2"></i>Active Calls (' + data.calls.length + ')';
+    }
 
-            html += '</tbody></table></div>';
-            container.innerHTML = html;
-        })
-        .catch(err => console.error('Active calls refresh failed:', err));
+    // Build table
+    let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
+    html += '<th style="width: 100px;">Direction</th>';
+    html += '<th>Connection</th>';
+    html += '<th style="width: 100px;">Status</th>';
+    html += '<th style="width: 120px;">Time</th>';
+    html += '</tr></thead><tbody>';
+
+    data.calls.forEach(call => {
+        html += '<tr>';
+        // Direction
+        if (call.direction === 'inbound') {
+            html += '<td><span class="badge bg-success"><i class="bi bi-telephone-inbound me-1"></i>In</span></td>';
+        } else {
+            html += '<td><span class="badge bg-primary"><i class="bi bi-telephone-outbound me-1"></i>Out</span></td>';
+        }
+        // Call flow
+        html += '<td><div class="d-flex align-items-center gap-1 flex-wrap">';
+        if (call.direction === 'inbound') {
+            html += `<code class="bg-light px-1">${call.cid_num || '?'}</code>`;
+            html += '<i class="bi bi-arrow-right text-muted small"></i>';
+            html += `<span class="text-info small">${call.name || 'GW'}</span>`;
+            html += '<i class="bi bi-arrow-right text-muted small"></i>';
+            html += `<code class="bg-success bg-opacity-10 text-success px-1">${call.dest || '?'}</code>`;
+        } else {
+            html += `<code class="bg-success bg-opacity-10 text-success px-1">${call.cid_num || '?'}</code>`;
+            html += '<i class="bi bi-arrow-right text-muted small"></i>';
+            html += `<span class="text-info small">${call.name || 'GW'}</span>`;
+            html += '<i class="bi bi-arrow-right text-muted small"></i>';
+            html += `<code class="bg-light px-1">${call.dest || '?'}</code>`;
+        }
+        html += '</div></td>';
+        // State
+        html += `<td><span class="badge bg-warning text-dark"><i class="bi bi-activity me-1"></i>${call.state}</span></td>`;
+        // Time
+        html += `<td><small class="text-muted">${call.created}</small></td>`;
+        html += '</tr>';
+    });
+
+    html += '</tbody></table></div>';
+    container.innerHTML = html;
 }
 
 // Silent CDR refresh (no loading indicator)
 function refreshCDRSilent() {
-    const container = document.getElementById('cdr-container');
-    if (!container) return;
+    if (!document.getElementById('cdr-container')) return;
 
     fetch(_base + '/api/cdr?count=10')
         .then(r => r.json())
-        .then(data => {
-            if (!data.calls || data.calls.length === 0) {
-                container.innerHTML = '<div class="p-4 text-center text-muted"><i class="bi bi-telephone-x fs-1 d-block mb-2"></i>No calls recorded</div>';
-                return;
-            }
+        .then(renderCDR)
+        .catch(err => console.error('CDR refresh failed:', err));
+}
 
-            let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
-            html += '<th style="width: 100px;">Direction</th>';
-            html += '<th>From</th>';
-            html += '<th>To</th>';
-            html += '<th style="width: 80px;">Duration</th>';
-            html += '<th style="width: 100px;">Result</th>';
-            html += '<th style="width: 150px;">Time</th>';
-            html += '</tr></thead><tbody>';
+function renderCDR(data) {
+    const container = document.getElementById('cdr-container');
+    if (!container) return;
 
-            data.calls.forEach(call => {
-                html += '<tr>';
-                if (call.direction === 'inbound') {
-                    html += '<td><span class="badge bg-success"><i class="bi bi-telephone-inbound me-1"></i>In</span></td>';
-                } else {
-                    html += '<td><span class="badge bg-primary"><i class="bi bi-telephone-outbound me-1"></i>Out</span></td>';
-                }
-                html += `<td><code>${call.caller_num}</code></td>`;
-                html += `<td><code>${call.dest}</code></td>`;
-                const dur = parseInt(call.billsec) || 0;
-                const mins = Math.floor(dur / 60);
-                const secs = dur % 60;
-                const durStr = `${mins}:${secs.toString().padStart(2, '0')}`;
-                html += dur > 0
-                    ? `<td><span class="text-success">${durStr}</span></td>`
-                    : '<td><span class="text-muted">0:00</span></td>';
-                const cause = call.hangup_cause || '';
-                if (cause.includes('NORMAL') || cause.includes('SUCCESS')) {
-                    html += '<td><span class="badge bg-success">OK</span></td>';
-                } else if (cause.includes('BUSY')) {
-                    html += '<td><span class="badge bg-warning text-dark">Busy</span></td>';
-                } else if (cause.includes('NO_ANSWER')) {
-                    html += '<td><span class="badge bg-secondary">No Answer</span></td>';
-                } else if (cause.includes('CANCEL')) {
-                    html += '<td><span class="badge bg-secondary">Cancelled</span></td>';
-                } else {
-                    html += `<td><span class="badge bg-danger" title="${cause}">Failed</span></td>`;
-                }
-                const time = call.start && call.start.length > 19 ? call.start.slice(-19) : call.start;
-                html += `<td><small class="text-muted">${time}</small></td>`;
-                html += '</tr>';
-            });
+    const countEl = document.getElementById('cdr-count');
+    if (countEl) countEl.textContent = data.calls ? data.calls.length : 0;
 
-            html += '</tbody></table></div>';
-            container.innerHTML = html;
-        })
-        .catch(err => console.error('CDR refresh failed:', err));
+    if (!data.calls || data.calls.length === 0) {
+        container.innerHTML = '<div class="p-4 text-center text-muted"><i class="bi bi-telephone-x fs-1 d-block mb-2"></i>No calls recorded</div>';
+        return;
+    }
+
+    let html = '<div class="table-responsive"><table class="table table-sm table-hover mb-0"><thead><tr>';
+    html += '<th style="width: 100px;">Direction</th>';
+    html += '<th>From</th>';
+    html += '<th>To</th>';
+    html += '<th style="width: 80px;">Duration</th>';
+    html += '<th style="width: 100px;">Result</th>';
+    html += '<th style="width: 150px;">Time</th>';
+    html += '</tr></thead><tbody>';
+
+    data.calls.forEach(call => {
+        html += '<tr>';
+        if (call.direction === 'inbound') {
+            html += '<td><span class="badge bg-success"><i class="bi bi-telephone-inbound me-1"></i>In</span></td>';
+        } else {
+            html += '<td><span class="badge bg-primary"><i class="bi bi-telephone-outbound me-1"></i>Out</span></td>';
+        }
+        html += `<td><code>${call.caller_num}</code></td>`;
+        html += `<td><code>${call.dest}</code></td>`;
+        const dur = parseInt(call.billsec) || 0;
+        const mins = Math.floor(dur / 60);
+        const secs = dur % 60;
+        const durStr = `${mins}:${secs.toString().padStart(2, '0')}`;
+        html += dur > 0
+            ? `<td><span class="text-success">${durStr}</span></td>`
+            : '<td><span class="text-muted">0:00</span></td>';
+        const cause = call.hangup_cause || '';
+        if (cause.includes('NORMAL') || cause.includes('SUCCESS')) {
+            html += '<td><span class="badge bg-success">OK</span></td>';
+        } else if (cause.includes('BUSY')) {
+            html += '<td><span class="badge bg-warning text-dark">Busy</span></td>';
+        } else if (cause.includes('NO_ANSWER')) {
+            html += '<td><span class="badge bg-secondary">No Answer</span></td>';
+        } else if (cause.includes('CANCEL')) {
+            html += '<td><span class="badge bg-secondary">Cancelled</span></td>';
+        } else {
+            html += `<td><span class="badge bg-danger" title="${cause}">Failed</span></td>`;
+        }
+        const time = call.start && call.start.length > 19 ? call.start.slice(-19) : call.start;
+        html += `<td><small class="text-muted">${time}</small></td>`;
+        html += '</tr>';
+    });
+
+    html += '</tbody></table></div>';
+    container.innerHTML = html;
 }
 
 // Update dashboard statistics
@@ -228,7 +376,7 @@ function updateDashboardUI(data) {
     const gwOnline = data.gateways ? data.gateways.filter(g => g.status === 'online').length : 0;
     const gwTotal = data.gateways ? data.gateways.length : 0;
     const gwEl = document.querySelector('[data-stat="gateways"]');
-    if (gwEl) gwEl.textContent = `${gwOnline}/${gwTotal}`;
+    if (gwEl) gwEl.innerHTML = `<span class="text-success">${gwOnline}</span><small class="text-muted">/${gwTotal}</small>`;
 
     // Update user count
     const usersOnline = data.registrations ? data.registrations.length : 0;
@@ -237,8 +385,9 @@ function updateDashboardUI(data) {
 
     // Update profiles
     const profilesOnline = data.profiles ? data.profiles.filter(p => p.status === 'online').length : 0;
+    const profilesTotal = data.profiles ? data.profiles.length : 0;
     const profilesEl = document.querySelector('[data-stat="profiles"]');
-    if (profilesEl) profilesEl.textContent = profilesOnline;
+    if (profilesEl) profilesEl.innerHTML = `<span class="text-success">${profilesOnline}</span><small class="text-muted">/${profilesTotal}</small>`;
 }
 
 // Update users UI
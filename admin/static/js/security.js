@@ -483,13 +483,24 @@ async function unbanFromFail2ban(ip) {
 // =============================================================================
 
 async function applyConfig() {
-    if (!confirm('Apply configuration and reload FreeSWITCH?')) return;
+    // Dry run first - show which FreeSWITCH commands will be executed
+    const plan = await apiGet('/api/crud/apply/plan');
+    if (plan.error) {
+        showToast('Error', plan.error, 'error');
+        return;
+    }
+    if (!plan.commands || plan.commands.length === 0) {
+        showToast('Info', 'No changes - nothing to apply', 'info');
+        return;
+    }
+    const steps = plan.commands.map(c => `- ${c.command}\n    (${c.reason})`).join('\n');
+    if (!confirm(`Apply configuration? FreeSWITCH will run:\n\n${steps}`)) return;
 
     const result = await apiPost('/api/crud/apply', {});
     if (result.success) {
         showToast('Success', result.message, 'success');
     } else {
-        showToast('Error', result.message, 'error');
+        showToast('Error', result.error || result.message, 'error');
     }
 }
 
@@ -15,12 +15,33 @@ echo_log() {
 # Run Provisioning
 ################################################################################
 
+# FS_API_SERVER=true: FreeSWITCH callbacks (xml_curl) are served by fs_api.py
+# on FS_API_PORT instead of the admin portal - provisioning points xml_curl there
+if [ "$FS_API_SERVER" = "true" ]; then
+  export XML_CURL_PORT="${FS_API_PORT:-8889}"
+fi
+
 if [ "$SKIP_PROVISION" != "true" ]; then
-  echo_log "Running provisioning..."
-  /usr/local/bin/provision.sh || {
+  # PROVISION_ENGINE=python (default): render from the JSON config in one process
+  # PROVISION_ENGINE=shell: always use provision.sh
+  # The Python engine exits 2 when there is no JSON config yet -> provision.sh (ENV mode)
+  provision_rc=2
+  if [ "${PROVISION_ENGINE:-python}" = "python" ] && [ -f /opt/admin/provisioning.py ]; then
+    echo_log "Running provisioning (python engine)..."
+    provision_rc=0
+    (cd /opt/admin && /opt/admin/venv/bin/python provisioning.py) || provision_rc=$?
+  fi
+
+  if [ "$provision_rc" -eq 2 ]; then
+    echo_log "Running provisioning..."
+    provision_rc=0
+    /usr/local/bin/provision.sh || provision_rc=$?
+  fi
+
+  if [ "$provision_rc" -ne 0 ]; then
     echo_log "ERROR: Provisioning failed"
     exit 1
-  }
+  fi
 else
   echo_log "Provisioning skipped (SKIP_PROVISION=true)"
 fi
@@ -32,9 +53,25 @@ fi
 if [ "$SKIP_ADMIN" != "true" ] && [ -d "/opt/admin" ]; then
   echo_log "Starting Admin Portal on port ${ADMIN_PORT:-8888}..."
   cd /opt/admin
-  /opt/admin/venv/bin/python app.py &
+  # ADMIN_WORKERS set: gunicorn with that many workers sharing one ESL
+  # subscriber (event_bus.py); ADMIN_SERVER=gevent: one process on a single
+  # gevent hub (serve_gevent.py); otherwise the threaded single-process server
+  if [ -n "$ADMIN_WORKERS" ] && [ -x /opt/admin/venv/bin/gunicorn ]; then
+    /opt/admin/venv/bin/gunicorn -c gunicorn.conf.py app:app &
+  elif [ "$ADMIN_SERVER" = "gevent" ]; then
+    /opt/admin/venv/bin/python serve_gevent.py &
+  else
+    /opt/admin/venv/bin/python app.py &
+  fi
   ADMIN_PID=$!
   echo_log "Admin Portal started (PID: $ADMIN_PID)"
+
+  if [ "$FS_API_SERVER" = "true" ]; then
+    echo_log "Starting FreeSWITCH API server on port ${FS_API_PORT:-8889}..."
+    /opt/admin/venv/bin/python fs_api.py &
+    FS_API_PID=$!
+    echo_log "FreeSWITCH API server started (PID: $FS_API_PID)"
+  fi
 else
   echo_log "Admin Portal skipped"
 fi
@@ -569,9 +569,25 @@ generate_xml_curl() {
   echo_log "Generating xml_curl.conf.xml..."
 
   # Get admin portal URL from environment or use default
+  # XML_CURL_PORT: dedicated FreeSWITCH API server (fs_api.py) instead of the admin portal
   local admin_host="${ADMIN_HOST:-127.0.0.1}"
-  local admin_port="${ADMIN_PORT:-8888}"
+  local admin_port="${XML_CURL_PORT:-${ADMIN_PORT:-8888}}"
   local directory_url="http://${admin_host}:${admin_port}/api/freeswitch/directory"
+  local dialplan_url="http://${admin_host}:${admin_port}/api/freeswitch/dialplan"
+
+  # XML_CURL_DIALPLAN=true: routes are answered from the admin config (route_matcher.py)
+  local dialplan_binding=""
+  if [ "${XML_CURL_DIALPLAN:-false}" = "true" ]; then
+    dialplan_binding="
+    <!-- Dialplan binding: routes answered from the admin config (no reloadxml) -->
+    <!-- Calls without a matching route fall back to the static dialplan XML -->
+    <binding name=\"dialplan\">
+      <param name=\"gateway-url\" value=\"$dialplan_url\" bindings=\"dialplan\"/>
+      <param name=\"method\" value=\"POST\"/>
+      <param name=\"timeout\" value=\"5\"/>
+      <param name=\"disable-100-continue\" value=\"true\"/>
+    </binding>"
+  fi
 
   cat > "$FS_CONF/autoload_configs/xml_curl.conf.xml" <<EOF
 <?xml version="1.0" encoding="UTF-8"?>
@@ -585,12 +601,15 @@ generate_xml_curl() {
       <param name="timeout" value="5"/>
       <!-- Disable caching to always get fresh user data -->
       <param name="disable-100-continue" value="true"/>
-    </binding>
+    </binding>${dialplan_binding}
   </bindings>
 </configuration>
 EOF
 
   echo_log "  Directory URL: $directory_url"
+  if [ -n "$dialplan_binding" ]; then
+    echo_log "  Dialplan URL: $dialplan_url"
+  fi
   echo_log "xml_curl.conf.xml generated"
 }
 
@@ -931,7 +950,7 @@ generate_users() {
       username=$(jq -r ".users[$i].username // empty" "$CONFIG_FILE")
       password=$(jq -r ".users[$i].password // empty" "$CONFIG_FILE")
       extension=$(jq -r ".users[$i].extension // empty" "$CONFIG_FILE")
-      enabled=$(jq -r ".users[$i].enabled // true" "$CONFIG_FILE")
+      enabled=$(jq -r ".users[$i].enabled | if . == null then true else . end" "$CONFIG_FILE")
 
       if [ "$enabled" != "true" ]; then
         echo_log "Skipping disabled user: $username"
@@ -1096,7 +1115,7 @@ EOF
       username=$(jq -r ".acl_users[$i].username // empty" "$CONFIG_FILE")
       extension=$(jq -r ".acl_users[$i].extension // empty" "$CONFIG_FILE")
       caller_id=$(jq -r ".acl_users[$i].caller_id // empty" "$CONFIG_FILE")
-      enabled=$(jq -r ".acl_users[$i].enabled // true" "$CONFIG_FILE")
+      enabled=$(jq -r ".acl_users[$i].enabled | if . == null then true else . end" "$CONFIG_FILE")
 
       if [ "$enabled" != "true" ]; then
         echo_log "Skipping disabled ACL user: $username"
@@ -1363,7 +1382,7 @@ generate_gateways() {
       gw_register=$(jq -r ".gateways[$i].register // true" "$CONFIG_FILE")
       gw_transport=$(jq -r ".gateways[$i].transport // \"udp\"" "$CONFIG_FILE")
       gw_auth_user=$(jq -r ".gateways[$i].auth_username // empty" "$CONFIG_FILE")
-      enabled=$(jq -r ".gateways[$i].enabled // true" "$CONFIG_FILE")
+      enabled=$(jq -r ".gateways[$i].enabled | if . == null then true else . end" "$CONFIG_FILE")
 
       if [ "$enabled" != "true" ]; then
         echo_log "Skipping disabled gateway: $gw_name"